@@ -0,0 +1,126 @@
+# app/api/v1/endpoints/files.py
+import os
+import re
+from typing import Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from app.api.deps import get_current_user
+from app.services.storage import storage_service
+
+router = APIRouter()
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 1024 * 1024
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Premier octet et longueur d'un en-tête Range à intervalle unique.
+
+    Retourne None pour un en-tête ignoré (multi-intervalles, syntaxe inconnue) :
+    le fichier complet est alors servi, comme le permet la RFC 9110.
+    Lève une HTTPException 416 pour un intervalle non satisfiable.
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Intervalle suffixe : les N derniers octets
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end - start + 1
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _base_headers(object_name: str, info: Dict) -> Dict[str, str]:
+    return {
+        "Accept-Ranges": "bytes",
+        "ETag": info["etag"],
+        "Last-Modified": info["last_modified"].strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        "Content-Disposition": f'attachment; filename="{os.path.basename(object_name)}"'
+    }
+
+def _stat_or_404(object_name: str) -> Dict:
+    # Clés internes : même réponse qu'un fichier absent
+    info = storage_service.stat_fits_file(object_name) if storage_service.is_user_visible(object_name) else None
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"File {object_name} not found")
+    return info
+
+# Déclarée avant les routes génériques, qui captureraient aussi ce chemin
+@router.get("/presigned/{object_name:path}")
+async def get_presigned_url(object_name: str, current_user = Depends(get_current_user)):
+    """URL de téléchargement direct depuis MinIO (FITS, résultats de traitement, mosaïques)"""
+    presigned = None
+    if storage_service.is_user_visible(object_name):
+        presigned = storage_service.get_presigned_url(object_name, current_user.id)
+    if presigned is None:
+        raise HTTPException(status_code=404, detail=f"File {object_name} not found")
+    return presigned
+
+@router.get("/inventory/{telescope}/{target}")
+async def get_inventory(telescope: str, target: str, product_type: Optional[str] = None,
+                        current_user = Depends(get_current_user)):
+    """Fichiers déjà stockés pour une cible, lus dans le manifeste sans lister le bucket"""
+    if storage_service.manifest is None:
+        raise HTTPException(status_code=503, detail="Storage manifest unavailable")
+    return storage_service.manifest.inventory(telescope, target, product_type)
+
+@router.get("/usage")
+async def get_usage(telescope: Optional[str] = None, current_user = Depends(get_current_user)):
+    """Volume stocké par télescope"""
+    if storage_service.manifest is None:
+        raise HTTPException(status_code=503, detail="Storage manifest unavailable")
+    return storage_service.manifest.usage(telescope)
+
+@router.head("/{object_name:path}")
+async def head_file(object_name: str):
+    """Décrit un fichier stocké (taille, ETag) pour préparer une reprise"""
+    info = _stat_or_404(object_name)
+    headers = _base_headers(object_name, info)
+    headers["Content-Length"] = str(info["size"])
+    return Response(headers=headers, media_type="application/fits")
+
+@router.get("/{object_name:path}")
+async def download_file(
+    object_name: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
+    """Télécharge un fichier stocké en streaming, avec reprise par Range et cache par ETag"""
+    info = _stat_or_404(object_name)
+    size = info["size"]
+    headers = _base_headers(object_name, info)
+
+    if _etag_matches(if_none_match, info["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    # If-Range : on ne reprend que si le fichier n'a pas changé depuis le début du transfert
+    if range_header and (not if_range or if_range.strip() == info["etag"]):
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range is None:
+        start, length, status_code = 0, size, status.HTTP_200_OK
+    else:
+        start, length = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+    headers["Content-Length"] = str(length)
+
+    # Seul un morceau à la fois est en mémoire, quelle que soit la taille du fichier
+    body = storage_service.iter_fits_range(info["content_name"], start, length, CHUNK_SIZE) if length else iter(())
+    return StreamingResponse(body, status_code=status_code, headers=headers, media_type="application/fits")
@@ -38,8 +38,8 @@ async def health_check():
         health_status["status"] = "unhealthy"
 
     try:
-        # Vérification de MinIO
-        storage_service.client.bucket_exists("fits-files")
+        # Vérification du stockage (MinIO par défaut)
+        storage_service.backend.ensure_bucket()
     except Exception as e:
         health_status["services"]["minio"] = f"unhealthy: {str(e)}"
         health_status["status"] = "unhealthy"
@@ -0,0 +1,55 @@
+# app/api/v1/endpoints/processing.py
+import base64
+import logging
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from fastapi import APIRouter, HTTPException, Response
+from app.core.config import settings
+from app.schemas.processing import ProcessingRequest
+from app.tasks.processing import preview_fits, process_fits
+
+router = APIRouter()
+
+# Statut d'échec de la tâche d'aperçu -> code HTTP
+PREVIEW_ERRORS = {'busy': 429, 'invalid': 422, 'not_found': 404}
+
+# Route synchrone : FastAPI l'exécute dans son pool de threads, hors de la boucle d'événements
+@router.post("/preview")
+def preview(request: ProcessingRequest):
+    """Aperçu PNG du workflow à résolution réduite, pour le réglage des paramètres.
+
+    Le calcul se fait sur un worker, dans la limite de PREVIEW_CONCURRENCY
+    aperçus simultanés ; une requête qui expire retire sa tâche de la file.
+    """
+    task = preview_fits.delay(request.observation_id, request.workflow_id, request.parameters)
+    try:
+        result = task.get(timeout=settings.PREVIEW_TIMEOUT)
+    except CeleryTimeoutError:
+        task.revoke()
+        raise HTTPException(status_code=504, detail="Preview timed out")
+    except Exception as e:
+        logging.error(f"Preview failed for {request.observation_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Preview failed")
+    finally:
+        # L'image n'a pas à rester dans le backend de résultats
+        task.forget()
+
+    if result['status'] != 'success':
+        status_code = PREVIEW_ERRORS.get(result['status'], 500)
+        headers = {"Retry-After": "1"} if status_code == 429 else None
+        raise HTTPException(status_code=status_code, detail=result['message'], headers=headers)
+    return Response(
+        content=base64.b64decode(result['image']),
+        media_type="image/png",
+        headers={
+            "Cache-Control": "no-store",
+            "Server-Timing": f"preview;dur={result['elapsed'] * 1000:.0f}",
+            "X-Steps-Computed": str(result['computed']),
+            "X-Steps-Cached": str(result['cached'])
+        }
+    )
+
+@router.post("/run")
+async def run(request: ProcessingRequest):
+    """Lance le traitement pleine résolution avec les paramètres validés"""
+    task = process_fits.delay(request.observation_id, request.workflow_id, request.parameters)
+    return {"task_id": task.id, "status": "pending", "message": "Traitement lancé"}
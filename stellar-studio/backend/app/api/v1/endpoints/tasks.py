@@ -1,6 +1,6 @@
 # app/api/v1/endpoints/tasks.py
 from fastapi import APIRouter, Depends
-from app.services.task import task_service, download_fits
+from app.services.task import task_service
 from app.api.deps import get_current_user
 from app.schemas.task import DownloadRequest
 
@@ -16,10 +16,8 @@ async def start_download(
     request: DownloadRequest,
     current_user = Depends(get_current_user)
 ):
-    """Initie un téléchargement d'observation"""
-    task = download_fits.delay(
-    object_name=request.object_name, 
-    telescope=request.telescope
+    """Initie un téléchargement d'observation, ou rejoint un téléchargement identique en cours"""
+    return task_service.submit_download(
+        object_name=request.object_name,
+        telescope=request.telescope
     )
-
-    return {"task_id": task.id}
@@ -1,7 +1,7 @@
 # app/api/v1/router.py
 from fastapi import APIRouter, Depends
 from app.api.deps import get_current_user
-from app.api.v1.endpoints import auth, telescopes, telescope_management, objects, observations, tasks, health
+from app.api.v1.endpoints import auth, telescopes, telescope_management, objects, observations, tasks, health, files, processing
 
 api_router = APIRouter()
 
@@ -43,6 +43,20 @@ api_router.include_router(
     tags=["objects"]
 )
 
+api_router.include_router(
+    files.router,
+    prefix="/files",
+    tags=["files"],
+    dependencies=[Depends(get_current_user)]
+)
+
+api_router.include_router(
+    processing.router,
+    prefix="/processing",
+    tags=["processing"],
+    dependencies=[Depends(get_current_user)]
+)
+
 api_router.include_router(
     health.router,
     prefix="/health",
@@ -1,11 +1,14 @@
 # app/core/celery.py
+import os
 from celery import Celery
+from celery.signals import worker_init
+from app.core.config import settings
 
 celery_app = Celery(
     "stellar_studio",
     broker="redis://redis:6379/0",
     backend="redis://redis:6379/0",
-    include=['app.services.task.service']
+    include=['app.services.task.service', 'app.tasks.processing']
 )
 
 celery_app.conf.update(
@@ -14,5 +17,28 @@ celery_app.conf.update(
     accept_content=['json'],
     result_serializer='json',
     timezone='Europe/Paris',
-    enable_utc=True
-)
\ No newline at end of file
+    enable_utc=True,
+    beat_schedule={
+        'collect-storage-garbage': {
+            'task': 'collect_storage_garbage',
+            'schedule': settings.GC_INTERVAL
+        }
+    }
+)
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Expose les métriques du worker (cache FITS, limiteurs MAST...) à Prometheus.
+
+    En mode multiprocess, le serveur agrège les valeurs écrites par chaque process prefork.
+    """
+    if not settings.WORKER_METRICS_PORT:
+        return
+    from prometheus_client import REGISTRY, CollectorRegistry, start_http_server
+    from prometheus_client import multiprocess
+
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(settings.WORKER_METRICS_PORT, registry=registry)
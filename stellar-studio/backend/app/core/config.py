@@ -31,6 +31,80 @@ class Settings(BaseSettings):
     MINIO_URL: str
     MINIO_ACCESS_KEY: str
     MINIO_SECRET_KEY: str
+    MINIO_PUBLIC_URL: Optional[str] = None  # Adresse de MinIO vue des clients, pour les URLs présignées
+    MINIO_REGION: str = "us-east-1"
+    MINIO_POOL_MAXSIZE: int = 32  # Connexions par hôte et par process (threads d'upload, blocs de tableaux)
+    MINIO_CONNECT_TIMEOUT: float = 5.0
+    MINIO_READ_TIMEOUT: float = 60.0
+    MINIO_MAX_RETRIES: int = 3
+    PRESIGNED_URL_EXPIRY: int = 900  # Secondes
+    PRESIGNED_URL_RENEW_MARGIN: int = 60  # Une URL en cache n'est plus servie à moins de N secondes de l'expiration
+    STORAGE_PART_SIZE: int = 16 * 1024 * 1024  # Taille des parts multipart (min. 5 MiB)
+    # Backend de stockage : "minio", "filesystem" (STORAGE_ROOT) ou "memory"
+    STORAGE_BACKEND: str = "minio"
+    STORAGE_ROOT: str = "/app/tmp/storage"
+    # Upload multipart parallèle des gros résultats (piles, mosaïques)
+    UPLOAD_PART_SIZE: int = 64 * 1024 * 1024
+    UPLOAD_CONCURRENCY: int = 4
+    UPLOAD_PART_RETRIES: int = 3
+    UPLOAD_RETRY_DELAY: float = 1.0  # Secondes, doublé à chaque nouvel essai
+    # Compression FITS par tuiles à l'ingestion (optionnelle)
+    FITS_TILE_COMPRESSION: bool = False
+    FITS_FLOAT_COMPRESSION: str = "quantized"  # "quantized" (RICE_1) ou "lossless" (GZIP_2)
+    FITS_QUANTIZE_LEVEL: float = 16.0
+    FITS_SPOOL_SIZE: int = 256 * 1024 * 1024  # Au-delà, les fichiers de travail passent sur disque
+    # Cache disque local des workers
+    FITS_CACHE_DIR: str = "/tmp/fits-cache"  # Propre au conteneur, non partagé entre répliques
+    FITS_CACHE_MAX_BYTES: int = 20 * 1024 * 1024 * 1024
+    # Intermédiaires de traitement en tableaux découpés (blocs carrés de N pixels)
+    ARRAY_CHUNK_SIZE: int = 512
+    # Étapes de workflow exécutées en parallèle par un même job (branches indépendantes)
+    PROCESSING_CONCURRENCY: int = 4
+    # Étapes locales (filtres) sur les grandes images : tuiles avec halo, mémoire plafonnée par job
+    PROCESSING_MEMORY_LIMIT: int = 2 * 1024 * 1024 * 1024
+    PROCESSING_TILE_SIZE: int = 2048
+    PROCESSING_TILE_WORKERS: int = 4
+    # Aperçu interactif : même workflow sur des sources réduites sous ce nombre de pixels
+    PREVIEW_MAX_PIXELS: int = 2 * 1000 * 1000
+    PREVIEW_CONCURRENCY: int = 2  # Aperçus calculés en même temps sur l'ensemble des workers
+    PREVIEW_TIMEOUT: int = 60  # Secondes d'attente de l'API avant d'abandonner un aperçu
+
+    # Métriques des workers Celery (0 pour désactiver)
+    WORKER_METRICS_PORT: int = 9808
+
+    # Téléchargements MAST
+    MAST_DOWNLOAD_URL: str = "https://mast.stsci.edu/api/v0.1/Download/file"
+    MAST_CONNECT_TIMEOUT: float = 10.0
+    MAST_READ_TIMEOUT: float = 120.0
+    MAST_QUERY_CACHE_TTL: int = 6 * 3600  # Secondes
+    MAST_PRODUCTS_CACHE_TTL: int = 24 * 3600  # Secondes
+    MAST_CACHE_MAX_ENTRIES: int = 5000
+    # Budgets partagés par tous les workers (seaux à jetons Redis)
+    MAST_QUERY_RATE: float = 5.0  # Requêtes par seconde
+    MAST_QUERY_BURST: int = 10
+    MAST_BANDWIDTH: int = 100 * 1024 * 1024  # Octets par seconde
+    MAST_BANDWIDTH_BURST: int = 64 * 1024 * 1024
+    DOWNLOAD_MAX_CONCURRENCY_PER_TASK: int = 4  # Fichiers en vol pour une même tâche
+    DOWNLOAD_MAX_CONCURRENCY_PER_WORKER: int = 8  # Fichiers en vol pour un même worker (tous process confondus)
+    DOWNLOAD_MAX_RETRIES: int = 5
+    DOWNLOAD_RETRY_DELAY: int = 30  # Secondes
+    # Attente d'une place libre (par produit) : au-delà de la durée de vie d'une place, abandon
+    DOWNLOAD_SLOT_RETRY_DELAY: int = 2  # Secondes
+    DOWNLOAD_SLOT_MAX_RETRIES: int = 2000
+    DOWNLOAD_CHECKPOINT_TTL: int = 7 * 24 * 3600  # Secondes
+    DOWNLOAD_INFLIGHT_TTL: int = 6 * 3600  # Durée max de regroupement sur une tâche en cours
+    DOWNLOAD_RESULT_FRESHNESS: int = 3600  # Réutilisation d'un téléchargement réussi
+
+    # Ramasse-miettes du stockage (durées en secondes)
+    GC_INTERVAL: int = 3600
+    GC_BATCH_SIZE: int = 1000  # Clés par suppression groupée
+    GC_MAX_OBJECTS_PER_RUN: int = 100000  # Le parcours reprend au passage suivant
+    GC_TRANSFER_RETENTION: int = 7 * 24 * 3600  # Transferts interrompus (durée des points de reprise)
+    GC_CONTENT_RETENTION: int = 2 * 24 * 3600
+    GC_INTERMEDIATE_RETENTION: int = 24 * 3600
+    GC_MOSAIC_RETENTION: int = 7 * 24 * 3600
+    GC_STEP_CACHE_RETENTION: int = 7 * 24 * 3600  # Résultats d'étapes réutilisables entre jobs
+    STEP_CACHE_TOUCH_INTERVAL: int = 3600  # Un résultat réutilisé repart pour une rétention complète
 
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
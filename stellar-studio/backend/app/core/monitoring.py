@@ -1,12 +1,82 @@
 # app/core/monitoring.py
 import logging
 from prometheus_fastapi_instrumentator import Instrumentator
-from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
 
 logger = logging.getLogger(__name__)
 # Configurer le niveau de log
 logging.basicConfig(level=logging.DEBUG)
 
+# Métriques applicatives, exposées sur /metrics avec celles de l'instrumentator
+MAST_CACHE_REQUESTS = Counter(
+    "stellar_mast_cache_requests_total",
+    "Accès au cache des requêtes MAST",
+    ["kind", "result"]
+)
+
+MAST_RATE_LIMITER_WAIT = Histogram(
+    "stellar_mast_rate_limiter_wait_seconds",
+    "Attente imposée par le limiteur de débit MAST",
+    ["bucket"],
+    buckets=(0, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+FITS_CACHE_REQUESTS = Counter(
+    "stellar_fits_cache_requests_total",
+    "Accès au cache disque local des FITS",
+    ["result"]
+)
+
+FITS_CACHE_BYTES_SAVED = Counter(
+    "stellar_fits_cache_bytes_saved_total",
+    "Octets servis par le cache disque local au lieu de MinIO"
+)
+
+FITS_CACHE_EVICTIONS = Counter(
+    "stellar_fits_cache_evictions_total",
+    "Fichiers évincés du cache disque local"
+)
+
+GC_OBJECTS_DELETED = Counter(
+    "stellar_storage_gc_objects_deleted_total",
+    "Objets supprimés par le ramasse-miettes du stockage",
+    ["rule"]
+)
+
+GC_BYTES_RECLAIMED = Counter(
+    "stellar_storage_gc_bytes_reclaimed_total",
+    "Octets libérés par le ramasse-miettes du stockage",
+    ["rule"]
+)
+
+PROCESSING_STEP_RESULTS = Counter(
+    "stellar_processing_step_results_total",
+    "Étapes de workflow calculées ou reprises du cache de résultats",
+    ["result"]
+)
+
+MINIO_REQUEST_LATENCY = Histogram(
+    "stellar_minio_request_latency_seconds",
+    "Latence des requêtes MinIO, jusqu'à la réception des en-têtes",
+    ["method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+# livesum : en mode multiprocess, les valeurs des process vivants sont additionnées
+MINIO_POOL_IN_USE = Gauge(
+    "stellar_minio_pool_connections_in_use",
+    "Connexions MinIO empruntées au pool",
+    ["host"],
+    multiprocess_mode="livesum"
+)
+
+MINIO_POOL_SIZE = Gauge(
+    "stellar_minio_pool_size",
+    "Taille maximale des pools de connexions MinIO",
+    ["host"],
+    multiprocess_mode="livesum"
+)
+
 def setup_monitoring(app):
     logger.debug("Démarrage de la configuration du monitoring...")
     
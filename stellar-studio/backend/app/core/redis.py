@@ -1,8 +1,4 @@
 from redis import Redis
 from app.core.config import settings
 
-redis_client = Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB
-)
+redis_client = Redis.from_url(settings.REDIS_URL)
@@ -1,7 +1,7 @@
 # app/domain/models/observation.py
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from ..value_objects.coordinates import Coordinates
 
 @dataclass
@@ -16,3 +16,4 @@ class Observation:
     filters: List[str]
     fits_files: List[str]
     preview_url: Optional[str] = None
+    fits_metadata: Optional[Dict[str, Dict[str, Any]]] = None
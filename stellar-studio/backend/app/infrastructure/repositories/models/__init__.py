@@ -1,6 +1,7 @@
 # app/infrastructure/repositories/models/__init__.py
 from .observation import Observation
 from .processing import ProcessingJob, JobStatus
+from .stored_file import StoredFile
 from .task import Task
 from .telescope import SpaceTelescope
 from .user import User, UserLevel
@@ -10,6 +11,7 @@ __all__ = [
     "Observation",
     "ProcessingJob",
     "JobStatus",
+    "StoredFile",
     "Task",
     "SpaceTelescope",
     "User",
@@ -17,4 +17,5 @@ class Observation(Base):
     instrument = Column(String(100), nullable=False)
     filters = Column(JSON)
     fits_files = Column(JSON)
+    fits_metadata = Column(JSON, nullable=True)  # En-têtes extraits à l'ingestion, par fichier
     preview_url = Column(String(255), nullable=True)
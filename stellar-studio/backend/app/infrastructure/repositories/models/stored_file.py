@@ -0,0 +1,39 @@
+# app/infrastructure/repositories/models/stored_file.py
+from sqlalchemy import Column, String, BigInteger, DateTime, Index
+from app.db.base_class import Base
+from datetime import datetime
+
+class StoredFile(Base):
+    """Index des fichiers FITS du bucket : l'inventaire se lit ici, sans lister MinIO"""
+    __tablename__ = "stored_files"
+
+    id = Column(String(36), primary_key=True)  # uuid5 de la clé : une réécriture met la ligne à jour
+    object_key = Column(String(512), nullable=False, unique=True)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 du contenu (fichiers adressés par contenu)
+    size = Column(BigInteger, nullable=False)
+    telescope = Column(String(50), nullable=False)
+    target = Column(String(255), nullable=False)  # Nom de cible normalisé (minuscules, espaces simples)
+    product_type = Column(String(50), nullable=True)  # Suffixe MAST : i2d, drz, cal...
+    filter = Column(String(100), nullable=True)
+    instrument = Column(String(100), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Inventaire par cible (et type de produit), quotas par télescope
+        Index("ix_stored_files_inventory", "telescope", "target", "product_type"),
+        Index("ix_stored_files_content_hash", "content_hash"),
+    )
+
+    def to_dict(self):
+        return {
+            'object_key': self.object_key,
+            'content_hash': self.content_hash,
+            'size': self.size,
+            'telescope': self.telescope,
+            'target': self.target,
+            'product_type': self.product_type,
+            'filter': self.filter,
+            'instrument': self.instrument,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -33,7 +33,8 @@ class ObservationRepository(BaseRepository[Observation]):
             instrument=db_observation.instrument,
             filters=db_observation.filters,
             fits_files=db_observation.fits_files,
-            preview_url=db_observation.preview_url
+            preview_url=db_observation.preview_url,
+            fits_metadata=db_observation.fits_metadata
         )
 
     async def list_by_telescope(self, telescope_id: str) -> List[Observation]:
@@ -55,7 +56,8 @@ class ObservationRepository(BaseRepository[Observation]):
                 instrument=db_observation.instrument,
                 filters=db_observation.filters,
                 fits_files=db_observation.fits_files,
-                preview_url=db_observation.preview_url
+                preview_url=db_observation.preview_url,
+                fits_metadata=db_observation.fits_metadata
             )
             for db_observation in db_observations
         ]
@@ -72,7 +74,8 @@ class ObservationRepository(BaseRepository[Observation]):
             instrument=observation.instrument,
             filters=observation.filters,
             fits_files=observation.fits_files,
-            preview_url=observation.preview_url
+            preview_url=observation.preview_url,
+            fits_metadata=observation.fits_metadata
         )
         
         self.db_session.add(db_observation)
@@ -99,6 +102,7 @@ class ObservationRepository(BaseRepository[Observation]):
         db_observation.filters = observation.filters
         db_observation.fits_files = observation.fits_files
         db_observation.preview_url = observation.preview_url
+        db_observation.fits_metadata = observation.fits_metadata
         
         await self.db_session.commit()
         await self.db_session.refresh(db_observation)
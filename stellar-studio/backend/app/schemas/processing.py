@@ -0,0 +1,9 @@
+# app/schemas/processing.py
+from typing import Any, Dict
+from pydantic import BaseModel
+
+class ProcessingRequest(BaseModel):
+    observation_id: str
+    workflow_id: str
+    # Surcharges par type d'étape : {'stretching': {'stretch': 50}, ...}
+    parameters: Dict[str, Dict[str, Any]] = {}
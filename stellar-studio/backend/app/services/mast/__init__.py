@@ -0,0 +1,5 @@
+from .service import MastService
+
+mast_service = MastService()
+
+__all__ = ['mast_service']
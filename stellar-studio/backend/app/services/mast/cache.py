@@ -0,0 +1,77 @@
+# app/services/mast/cache.py
+import io
+import time
+import zlib
+import logging
+from typing import Optional
+from astropy.table import Table
+from redis import Redis
+from redis.exceptions import RedisError
+from app.core.monitoring import MAST_CACHE_REQUESTS
+from app.core.redis import redis_client
+
+class MastCache:
+    """Cache Redis des tables MAST, partagé par les replicas de l'API et les workers.
+
+    Les tables sont sérialisées en FITS binaire compressé (masques conservés),
+    chaque entrée a son propre TTL et un index trié par date d'accès permet
+    d'évincer les entrées les moins récemment utilisées au-delà de max_entries.
+    """
+
+    def __init__(self, max_entries: int, client: Redis = redis_client,
+                 prefix: str = "mast:cache:"):
+        self.client = client
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self.lru_key = f"{prefix}lru"
+
+    @staticmethod
+    def _serialize(table: Table) -> bytes:
+        buffer = io.BytesIO()
+        table.write(buffer, format='fits', serialize_method='data_mask')
+        return zlib.compress(buffer.getvalue())
+
+    @staticmethod
+    def _deserialize(payload: bytes) -> Table:
+        # Colonnes texte en str, comme dans la table d'origine (filter_products compare des str)
+        return Table.read(io.BytesIO(zlib.decompress(payload)), format='fits', character_as_bytes=False)
+
+    def get(self, kind: str, key: str) -> Optional[Table]:
+        cache_key = f"{self.prefix}{kind}:{key}"
+        try:
+            payload = self.client.get(cache_key)
+            if payload is None:
+                self.client.zrem(self.lru_key, cache_key)
+                MAST_CACHE_REQUESTS.labels(kind=kind, result="miss").inc()
+                return None
+            self.client.zadd(self.lru_key, {cache_key: time.time()})
+            MAST_CACHE_REQUESTS.labels(kind=kind, result="hit").inc()
+            return self._deserialize(payload)
+        except RedisError as e:
+            logging.warning(f"MAST cache unavailable: {str(e)}")
+            MAST_CACHE_REQUESTS.labels(kind=kind, result="error").inc()
+            return None
+
+    def set(self, kind: str, key: str, table: Table, ttl: int) -> None:
+        cache_key = f"{self.prefix}{kind}:{key}"
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(cache_key, self._serialize(table), ex=ttl)
+            pipe.zadd(self.lru_key, {cache_key: time.time()})
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+        except RedisError as e:
+            logging.warning(f"MAST cache unavailable: {str(e)}")
+        except Exception as e:
+            # Table non sérialisable (colonnes objet, texte non ASCII) : MAST a déjà
+            # répondu, la requête réussit sans mise en cache
+            logging.warning(f"MAST table not cacheable ({kind}): {str(e)}")
+
+    def _evict(self, count: int) -> None:
+        """Supprime les count entrées les moins récemment utilisées"""
+        evicted = self.client.zpopmin(self.lru_key, count)
+        if evicted:
+            self.client.delete(*[key for key, _ in evicted])
+            MAST_CACHE_REQUESTS.labels(kind="all", result="evicted").inc(len(evicted))
@@ -0,0 +1,54 @@
+# app/services/mast/rate_limiter.py
+import time
+import logging
+from redis import Redis
+from redis.exceptions import RedisError
+from app.core.monitoring import MAST_RATE_LIMITER_WAIT
+from app.core.redis import redis_client
+
+# Seau à jetons avec réservation : la demande est toujours débitée, quitte à rendre
+# le solde négatif, et le script renvoie l'attente nécessaire pour résorber la dette.
+# Chaque appelant passe ainsi dans l'ordre d'arrivée, sans boucle de réessai.
+_RESERVE = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 60)
+if tokens < 0 then
+    return tostring(-tokens / rate)
+end
+return '0'
+"""
+
+class RateLimiter:
+    """Limiteur de débit partagé par tous les workers et replicas, via Redis"""
+
+    def __init__(self, name: str, rate: float, capacity: float,
+                 client: Redis = redis_client, prefix: str = "mast:ratelimit:"):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.key = f"{prefix}{name}"
+        self._reserve = client.register_script(_RESERVE)
+
+    def acquire(self, amount: float = 1) -> float:
+        """Réserve amount jetons et attend leur disponibilité, retourne l'attente en secondes"""
+        try:
+            wait = float(self._reserve(keys=[self.key], args=[self.rate, self.capacity, amount]))
+        except RedisError as e:
+            # Sans Redis on ne bloque pas les téléchargements, on perd seulement la coordination
+            logging.warning(f"Rate limiter {self.name} unavailable: {str(e)}")
+            return 0.0
+        MAST_RATE_LIMITER_WAIT.labels(bucket=self.name).observe(wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
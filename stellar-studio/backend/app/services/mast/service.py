@@ -0,0 +1,103 @@
+# app/services/mast/service.py
+import requests
+from astropy.coordinates import Angle
+from astropy.table import Table
+from astroquery.mast import Observations
+from app.core.config import settings
+from .cache import MastCache
+from .rate_limiter import RateLimiter
+
+class ProductStream:
+    """Corps HTTP d'un produit MAST, lu sous le contrôle du budget de bande passante"""
+
+    def __init__(self, response: requests.Response, bandwidth: RateLimiter):
+        self.response = response
+        self.bandwidth = bandwidth
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.response.raw.read(size)
+        if data:
+            self.bandwidth.acquire(len(data))
+        return data
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class MastService:
+    def __init__(self):
+        # Session partagée : réutilise les connexions HTTP vers MAST entre les fichiers
+        self.session = requests.Session()
+        self.cache = MastCache(settings.MAST_CACHE_MAX_ENTRIES)
+        self.queries = RateLimiter("queries", settings.MAST_QUERY_RATE, settings.MAST_QUERY_BURST)
+        self.bandwidth = RateLimiter("bytes", settings.MAST_BANDWIDTH, settings.MAST_BANDWIDTH_BURST)
+
+    @staticmethod
+    def _normalize_object_name(object_name: str) -> str:
+        return " ".join(object_name.split()).lower()
+
+    @staticmethod
+    def _normalize_radius(radius) -> str:
+        """Rayon en degrés, quel que soit le format fourni (0.2, ".02 deg", ...)"""
+        return f"{Angle(radius, unit='deg').deg:.6f}"
+
+    def query_object(self, object_name: str, radius=".02 deg") -> Table:
+        """Observations.query_object, avec cache partagé"""
+        key = f"{self._normalize_object_name(object_name)}:{self._normalize_radius(radius)}"
+        table = self.cache.get("query", key)
+        if table is None:
+            self.queries.acquire()
+            table = Observations.query_object(object_name, radius=radius)
+            self.cache.set("query", key, table, settings.MAST_QUERY_CACHE_TTL)
+        return table
+
+    def get_product_list(self, observations) -> Table:
+        """Observations.get_product_list, avec cache partagé par obsid"""
+        obsids = observations['obsid'] if isinstance(observations, Table) else [observations['obsid']]
+        key = ",".join(sorted(str(obsid) for obsid in obsids))
+        table = self.cache.get("products", key)
+        if table is None:
+            self.queries.acquire()
+            table = Observations.get_product_list(observations)
+            self.cache.set("products", key, table, settings.MAST_PRODUCTS_CACHE_TTL)
+        return table
+
+    def filter_products(self, products: Table, **filters) -> Table:
+        """Filtrage local des produits, sans appel réseau"""
+        return Observations.filter_products(products, **filters)
+
+    def get_download_url(self, data_uri: str) -> str:
+        """Construit l'URL de téléchargement MAST d'un produit"""
+        return f"{settings.MAST_DOWNLOAD_URL}?uri={data_uri}"
+
+    def open_product_stream(self, data_uri: str, start: int = 0) -> ProductStream:
+        """Ouvre le corps HTTP d'un produit MAST en streaming, sans le lire.
+
+        Avec start > 0, demande la suite du fichier via un en-tête Range : l'appelant
+        doit vérifier le code 206, MAST pouvant renvoyer le fichier complet (200).
+        """
+        headers = {'Range': f'bytes={start}-'} if start else {}
+        self.queries.acquire()
+        response = self.session.get(
+            self.get_download_url(data_uri),
+            headers=headers,
+            stream=True,
+            timeout=(settings.MAST_CONNECT_TIMEOUT, settings.MAST_READ_TIMEOUT)
+        )
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        # Le flux brut est consommé par MinIO : on laisse urllib3 décoder gzip/deflate
+        response.raw.decode_content = True
+        return ProductStream(response, self.bandwidth)
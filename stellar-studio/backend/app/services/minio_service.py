@@ -1,20 +1,121 @@
 # app/services/minio_service.py
+import os
+import time
+import socket
+import threading
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+import urllib3
+from urllib3.connection import HTTPConnection
 from minio import Minio
 from app.core.config import settings
+from app.core.monitoring import MINIO_REQUEST_LATENCY, MINIO_POOL_IN_USE, MINIO_POOL_SIZE
 
-def get_minio_client():
-    return Minio(
-        "minio:9000",  # Utiliser le nom du service dans docker-compose
-        access_key="minioadmin",
-        secret_key="minioadmin",
-        secure=False
+class InstrumentedPoolManager(urllib3.PoolManager):
+    """PoolManager qui mesure la latence des requêtes (jusqu'aux en-têtes) et l'occupation des pools"""
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        start = time.perf_counter()
+        try:
+            return super().urlopen(method, url, redirect=redirect, **kw)
+        finally:
+            MINIO_REQUEST_LATENCY.labels(method=method).observe(time.perf_counter() - start)
+            self.record_pool_usage()
+
+    def record_pool_usage(self) -> None:
+        for key in list(self.pools.keys()):
+            pool = self.pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            # La file contient les connexions libres (ou des places vides) : le reste est emprunté
+            MINIO_POOL_SIZE.labels(host=pool.host).set(pool.pool.maxsize)
+            MINIO_POOL_IN_USE.labels(host=pool.host).set(pool.pool.maxsize - pool.pool.qsize())
+
+def _socket_options():
+    """Keep-alive TCP : les connexions inactives du pool restent utilisables derrière un NAT"""
+    options = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options += [
+            (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 15),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 4)
+        ]
+    return options
+
+def _pool_manager() -> urllib3.PoolManager:
+    return InstrumentedPoolManager(
+        num_pools=4,
+        maxsize=settings.MINIO_POOL_MAXSIZE,
+        # Au-delà de maxsize, les threads attendent une connexion au lieu d'en ouvrir une jetable
+        block=True,
+        timeout=urllib3.Timeout(connect=settings.MINIO_CONNECT_TIMEOUT, read=settings.MINIO_READ_TIMEOUT),
+        retries=urllib3.Retry(
+            total=settings.MINIO_MAX_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        ),
+        socket_options=_socket_options()
     )
 
+def _endpoint(url: str) -> Tuple[str, bool]:
+    """Hôte:port et TLS d'une URL MinIO, avec ou sans schéma (« minio:9000 »)"""
+    # Sans « // », urlparse prendrait « minio » pour le schéma et « 9000 » pour le chemin
+    parsed = urlparse(url if "//" in url else f"http://{url}")
+    return parsed.netloc, parsed.scheme == "https"
+
+_client: Optional[Minio] = None
+_signing_client: Optional[Minio] = None
+_lock = threading.Lock()
+
+def _reset_after_fork() -> None:
+    # Les process prefork de Celery ne doivent pas partager les sockets du parent
+    global _client, _signing_client, _lock
+    _client = None
+    _signing_client = None
+    _lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_minio_client() -> Minio:
+    """Client MinIO partagé par tout le process, avec un pool de connexions réglé"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                endpoint, secure = _endpoint(settings.MINIO_URL)
+                _client = Minio(
+                    endpoint,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=secure,
+                    http_client=_pool_manager()
+                )
+    return _client
+
+def get_signing_client() -> Minio:
+    """Client de signature : les URLs présignées doivent viser l'adresse publique de MinIO.
+
+    La région est fixée pour que la signature ne déclenche aucun appel réseau.
+    """
+    global _signing_client
+    if _signing_client is None:
+        with _lock:
+            if _signing_client is None:
+                endpoint, secure = _endpoint(settings.MINIO_PUBLIC_URL or settings.MINIO_URL)
+                _signing_client = Minio(
+                    endpoint,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=secure,
+                    region=settings.MINIO_REGION
+                )
+    return _signing_client
+
 def init_minio():
-    client = get_minio_client()
+    # Le bucket (ou la racine locale) est préparé par le backend configuré
+    from app.services.storage import storage_service
     try:
-        # Créer le bucket s'il n'existe pas
-        if not client.bucket_exists("fits-files"):
-            client.make_bucket("fits-files")
+        storage_service.backend.ensure_bucket()
     except Exception as e:
-        print(f"Erreur lors de l'initialisation de MinIO : {e}")
+        print(f"Erreur lors de l'initialisation du stockage : {e}")
@@ -1,17 +1,18 @@
 # app/services/mosaic_service.py
+import uuid
+from io import BytesIO
 from astropy.io import fits
 from PIL import Image
 import numpy as np
+from app.services.processing.stretch import stretch_to_uint
+from app.services.storage import fits_cache, storage_service
 
 class MosaicService:
-    def create_mosaic_from_fits(self, fits_files: list, minio_client) -> str:
+    def create_mosaic_from_fits(self, fits_files: list) -> str:
         images = []
         for fits_file in fits_files:
-            # Récupérer le fichier FITS depuis MinIO
-            data = minio_client.get_object("fits-files", fits_file).read()
-            
-            # Convertir FITS en image
-            with fits.open(BytesIO(data)) as hdul:
+            # Lecture via le cache local du worker : pas de nouveau transfert depuis le stockage
+            with fits_cache.open(fits_file) as hdul:
                 img_data = hdul[0].data
                 # Normalisation pour conversion en PNG
                 img_data = self.normalize_fits_data(img_data)
@@ -27,15 +28,18 @@ class MosaicService:
             img = img.resize((mosaic_width, mosaic_height // len(images)))
             mosaic.paste(img, (0, idx * (mosaic_height // len(images))))
 
-        # Sauvegarder dans MinIO
+        # Sauvegarder sur le backend de stockage
         mosaic_path = f"mosaics/{uuid.uuid4()}.png"
         with BytesIO() as bio:
             mosaic.save(bio, format='PNG')
-            minio_client.put_object(
-                "fits-files", 
-                mosaic_path, 
-                bio.getvalue(),
-                len(bio.getvalue()),
-                content_type="image/png"
-            )
+            storage_service.store_object(mosaic_path, bio.getvalue(), content_type="image/png")
         return mosaic_path
+
+    def normalize_fits_data(self, data: np.ndarray) -> np.ndarray:
+        """Image 8 bits affichable : étirement MTF automatique, via une table"""
+        data = np.array(data, dtype=np.float32, order='C')
+        if data.ndim > 2:
+            # Cube : premier plan
+            data = np.ascontiguousarray(data.reshape((-1,) + data.shape[-2:])[0])
+        return stretch_to_uint(data, method='mtf', black_percentile=0.0, white_percentile=100.0,
+                               dtype=np.uint8)
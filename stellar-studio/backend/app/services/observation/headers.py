@@ -0,0 +1,106 @@
+# app/services/observation/headers.py
+import warnings
+from typing import Any, Dict, List, Optional
+from astropy.io import fits
+from astropy.time import Time
+from astropy.wcs import WCS, FITSFixedWarning
+from app.services.storage.remote_fits import header_dtype, image_header
+
+# Mots-clés équivalents selon les instruments HST / JWST, par ordre de préférence
+EXPOSURE_KEYWORDS = ('EFFEXPTM', 'XPOSURE', 'EXPTIME', 'TEXPTIME')
+RA_KEYWORDS = ('TARG_RA', 'RA_TARG')
+DEC_KEYWORDS = ('TARG_DEC', 'DEC_TARG')
+FILTER_KEYWORDS = ('FILTER', 'FILTER1', 'FILTER2')
+
+def _first(headers: List[fits.Header], keywords) -> Optional[Any]:
+    for keyword in keywords:
+        for header in headers:
+            value = header.get(keyword)
+            if value not in (None, ""):
+                return value
+    return None
+
+def _science_header(headers: List[fits.Header]) -> Optional[fits.Header]:
+    """En-tête SCI, ou à défaut le premier HDU portant une image"""
+    for header in headers:
+        if header.get('EXTNAME') == 'SCI':
+            return header
+    for header in headers:
+        if header.get('NAXIS', 0) >= 2:
+            return header
+    return None
+
+def _start_time(headers: List[fits.Header]) -> Optional[str]:
+    """Début d'exposition en ISO 8601 (DATE-BEG pour JWST, DATE-OBS/TIME-OBS pour HST)"""
+    date_beg = _first(headers, ('DATE-BEG',))
+    if date_beg:
+        return Time(date_beg).isot
+    date_obs = _first(headers, ('DATE-OBS',))
+    if date_obs:
+        time_obs = _first(headers, ('TIME-OBS',))
+        return Time(f"{date_obs}T{time_obs}" if time_obs and "T" not in date_obs else date_obs).isot
+    expstart = _first(headers, ('EXPSTART',))
+    return Time(expstart, format='mjd').isot if expstart else None
+
+def _filters(headers: List[fits.Header]) -> List[str]:
+    filters = []
+    for keyword in FILTER_KEYWORDS:
+        value = _first(headers, (keyword,))
+        # Les roues à filtres HST ont une position CLEAR sans intérêt ici
+        if value and not str(value).upper().startswith('CLEAR') and value not in filters:
+            filters.append(str(value))
+    return filters
+
+def _wcs(header: fits.Header) -> Optional[Dict[str, Any]]:
+    """Solution WCS céleste normalisée, avec le centre de l'image"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FITSFixedWarning)
+        try:
+            wcs = WCS(header).celestial
+        except Exception:
+            return None
+    if not wcs.has_celestial:
+        return None
+    center = None
+    if header.get('NAXIS1') and header.get('NAXIS2'):
+        ra, dec = wcs.all_pix2world([[header['NAXIS1'] / 2, header['NAXIS2'] / 2]], 0)[0]
+        center = [float(ra), float(dec)]
+    return {
+        'header': {key: value for key, value in wcs.to_header().items()},
+        'center': center
+    }
+
+def extract_fits_metadata(headers: List[fits.Header]) -> Dict[str, Any]:
+    """Métadonnées d'un produit FITS (en-têtes primaire et SCI), sérialisables en JSON"""
+    # Les images compressées par tuiles sont décrites comme les images d'origine
+    headers = [image_header(header) for header in headers]
+    primary = headers[0] if headers else fits.Header()
+    science = _science_header(headers)
+    ordered = [h for h in (science, primary) if h is not None]
+
+    exposure = _first(ordered, EXPOSURE_KEYWORDS)
+    ra = _first(ordered, RA_KEYWORDS)
+    dec = _first(ordered, DEC_KEYWORDS)
+    wcs = _wcs(science) if science is not None else None
+    if (ra is None or dec is None) and wcs and wcs['center']:
+        ra, dec = wcs['center']
+
+    shape = None
+    if science is not None:
+        # Ordre numpy : axes FITS inversés
+        shape = [science.get(f'NAXIS{axis}') for axis in range(science.get('NAXIS', 0), 0, -1)]
+
+    return {
+        'telescope': _first(ordered, ('TELESCOP',)),
+        'instrument': _first(ordered, ('INSTRUME',)),
+        'detector': _first(ordered, ('DETECTOR',)),
+        'filters': _filters(ordered),
+        'exposure_time': float(exposure) if exposure is not None else None,
+        'start_time': _start_time(ordered),
+        'ra': float(ra) if ra is not None else None,
+        'dec': float(dec) if dec is not None else None,
+        'shape': shape,
+        'dtype': header_dtype(science) if science is not None else None,
+        'bunit': science.get('BUNIT') if science is not None else None,
+        'wcs': wcs
+    }
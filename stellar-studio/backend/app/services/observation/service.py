@@ -1,15 +1,18 @@
 from typing import Optional, Dict, Any, List
-from astroquery.mast import Observations
+from datetime import datetime
+import uuid
 from astroquery.simbad import Simbad
 import logging
 from app.db.session import SessionLocal
 from app.infrastructure.repositories.models.target import Target
+from app.infrastructure.repositories.models.observation import Observation as ObservationModel
+from ..mast import mast_service
 
 class ObservationService:
     def get_target_preview(self, object_name: str, telescope: str) -> Optional[str]:
         """Récupère l'URL de preview pour un objet et un télescope donnés"""
         try:
-            obs_table = Observations.query_object(object_name, radius=0.2)
+            obs_table = mast_service.query_object(object_name, radius=0.2)
             if len(obs_table) == 0:
                 logging.warning(f"No observations found for {object_name}")
                 return None
@@ -19,8 +22,8 @@ class ObservationService:
                 logging.warning(f"No {telescope} observations found for {object_name}")
                 return None
                 
-            products = Observations.get_product_list(obs_filtered[0:1])
-            preview_products = Observations.filter_products(
+            products = mast_service.get_product_list(obs_filtered[0:1])
+            preview_products = mast_service.filter_products(
                 products,
                 productType=["PREVIEW"],
                 extension="jpg"
@@ -59,7 +62,7 @@ class ObservationService:
     async def get_telescope_observations(self, telescope_id: str, target_name: str) -> Dict[str, Any]:
         """Récupère les observations d'un télescope pour une cible donnée"""
         try:
-            obs_table = Observations.query_object(target_name, radius=".02 deg")
+            obs_table = mast_service.query_object(target_name, radius=".02 deg")
             obs_filtered = obs_table[obs_table['obs_collection'] == telescope_id]
             
             if len(obs_filtered) == 0:
@@ -76,3 +79,48 @@ class ObservationService:
         except Exception as e:
             logging.error(f"Error fetching observations: {str(e)}")
             return {"status": "error", "message": str(e)}
+
+    def save_ingested_observation(self, obsid: str, telescope: str, object_name: str,
+                                  files: List[Dict[str, Any]]) -> Optional[str]:
+        """Enregistre en une écriture les métadonnées extraites des fichiers d'une observation.
+
+        files contient, pour chaque fichier stocké, son chemin ('path') et les
+        métadonnées de ses en-têtes ('metadata'). L'id est dérivé de l'obsid MAST :
+        un nouveau téléchargement met à jour la ligne au lieu d'en créer une autre.
+        """
+        described = [f for f in files if f.get('path') and f.get('metadata')]
+        if not described:
+            return None
+
+        metadata = [f['metadata'] for f in described]
+        start_times = [m['start_time'] for m in metadata if m.get('start_time')]
+        exposures = [m['exposure_time'] for m in metadata if m.get('exposure_time') is not None]
+        reference = next((m for m in metadata if m.get('ra') is not None and m.get('dec') is not None), None)
+        instrument = next((m['instrument'] for m in metadata if m.get('instrument')), None)
+        if not start_times or reference is None or instrument is None:
+            logging.warning(f"Incomplete FITS headers for observation {obsid}, metadata not saved")
+            return None
+
+        observation_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"mast:{obsid}"))
+        observation = ObservationModel(
+            id=observation_id,
+            telescope_id=telescope,
+            target_id=object_name,
+            coordinates_ra=str(reference['ra']),
+            coordinates_dec=str(reference['dec']),
+            start_time=datetime.fromisoformat(min(start_times)),
+            # Produits combinés (i2d, drz) : l'exposition la plus longue est celle de l'observation
+            exposure_time=int(round(max(exposures))) if exposures else 0,
+            instrument=instrument,
+            filters=sorted({f for m in metadata for f in m.get('filters', [])}),
+            fits_files=[f['path'] for f in described],
+            fits_metadata={f['path']: f['metadata'] for f in described}
+        )
+        try:
+            with SessionLocal() as db:
+                db.merge(observation)
+                db.commit()
+            return observation_id
+        except Exception as e:
+            logging.error(f"Error saving observation {obsid}: {str(e)}")
+            return None
@@ -0,0 +1,17 @@
+from app.core.config import settings
+from app.services.storage import array_store, fits_cache, storage_service
+from .dag import WorkflowDag
+from .executor import WorkflowExecutor
+from .service import ProcessingService
+
+workflow_executor = WorkflowExecutor(
+    array_store, storage_service, fits_cache,
+    max_workers=settings.PROCESSING_CONCURRENCY,
+    memory_limit=settings.PROCESSING_MEMORY_LIMIT,
+    tile_size=settings.PROCESSING_TILE_SIZE,
+    tile_workers=settings.PROCESSING_TILE_WORKERS,
+    cache_touch_interval=settings.STEP_CACHE_TOUCH_INTERVAL
+)
+processing_service = ProcessingService(workflow_executor)
+
+__all__ = ['processing_service', 'workflow_executor', 'WorkflowDag']
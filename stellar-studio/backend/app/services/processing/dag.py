@@ -0,0 +1,148 @@
+# app/services/processing/dag.py
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+from app.domain.models.workflow import ProcessingStep, ProcessingStepType, Workflow
+from .steps import STEP_FUNCTIONS
+
+# Étapes qui réunissent les branches : stacking réunit les fichiers d'un filtre,
+# color_balance réunit les filtres. Les autres s'appliquent branche par branche.
+FILE_MERGE_STEPS = {ProcessingStepType.STACKING}
+FILTER_MERGE_STEPS = {ProcessingStepType.COLOR_BALANCE}
+IMPLICIT_STACK = ProcessingStep(type=ProcessingStepType.STACKING, order=-1, parameters={},
+                                description="Combinaison implicite des expositions")
+
+@dataclass
+class StepNode:
+    """Nœud du graphe : un fichier source, ou une étape appliquée à ses entrées"""
+    id: str
+    step: Optional[ProcessingStep] = None
+    inputs: List[str] = field(default_factory=list)
+    source: Optional[str] = None  # Clé de l'objet FITS d'un nœud source
+    filter: Optional[str] = None
+    key: Optional[str] = None  # Empreinte des entrées et paramètres, fixée par compute_keys
+
+    @property
+    def is_source(self) -> bool:
+        return self.step is None
+
+class WorkflowDag:
+    """Graphe d'exécution d'un workflow sur les fichiers d'une observation.
+
+    Les étapes triées par order sont déroulées sur trois niveaux : une branche
+    par fichier jusqu'au stacking, une branche par filtre jusqu'à
+    color_balance, puis une chaîne unique. Les branches d'un même niveau sont
+    indépendantes et peuvent s'exécuter en parallèle. Plusieurs fichiers d'un
+    filtre sans étape de stacking sont combinés implicitement avant de passer
+    au niveau suivant.
+    """
+
+    def __init__(self, workflow: Workflow, files_by_filter: Dict[str, Sequence[str]]):
+        self.workflow = workflow
+        self.nodes: Dict[str, StepNode] = {}  # Ordre d'insertion = ordre topologique
+        self.outputs: List[str] = []
+        self._build(files_by_filter)
+
+    def _add(self, node: StepNode) -> str:
+        self.nodes[node.id] = node
+        return node.id
+
+    def _apply(self, step: ProcessingStep, position: int, inputs: List[str], label: str,
+               filter_name: Optional[str]) -> str:
+        return self._add(StepNode(
+            id=f"{label}/{position}:{step.type.value}",
+            step=step,
+            inputs=inputs,
+            filter=filter_name
+        ))
+
+    def _build(self, files_by_filter: Dict[str, Sequence[str]]) -> None:
+        steps = sorted(self.workflow.steps, key=lambda step: step.order)
+        unknown = [step.type.value for step in steps if step.type not in STEP_FUNCTIONS]
+        if unknown:
+            raise ValueError(f"Unsupported processing steps: {', '.join(unknown)}")
+        if not steps:
+            raise ValueError(f"Workflow {self.workflow.id} has no processing steps")
+        if not files_by_filter:
+            raise ValueError("No input files for workflow")
+
+        # Niveau fichier : une branche par fichier source
+        branches: Dict[str, List[str]] = {}
+        for filter_name, objects in files_by_filter.items():
+            branches[filter_name] = [
+                self._add(StepNode(id=f"{filter_name}/source:{index}", source=object_key, filter=filter_name))
+                for index, object_key in enumerate(objects)
+            ]
+        position = 0
+        while position < len(steps) and steps[position].type not in FILE_MERGE_STEPS | FILTER_MERGE_STEPS:
+            step = steps[position]
+            for filter_name, heads in branches.items():
+                branches[filter_name] = [
+                    self._apply(step, position, [head], f"{filter_name}/{index}", filter_name)
+                    for index, head in enumerate(heads)
+                ]
+            position += 1
+
+        # Passage au niveau filtre
+        stack_step, stack_position = IMPLICIT_STACK, position
+        if position < len(steps) and steps[position].type in FILE_MERGE_STEPS:
+            stack_step = steps[position]
+            position += 1
+        filters: Dict[str, str] = {}
+        for filter_name, heads in branches.items():
+            if len(heads) == 1 and stack_step is IMPLICIT_STACK:
+                filters[filter_name] = heads[0]
+            else:
+                filters[filter_name] = self._apply(stack_step, stack_position, heads, filter_name, filter_name)
+
+        while position < len(steps) and steps[position].type not in FILTER_MERGE_STEPS:
+            step = steps[position]
+            for filter_name, head in filters.items():
+                filters[filter_name] = self._apply(step, position, [head], filter_name, filter_name)
+            position += 1
+
+        if position == len(steps):
+            # Pas de fusion des filtres : une sortie par filtre
+            self.outputs = list(filters.values())
+            return
+
+        # Niveau image : chaîne unique à partir de la fusion
+        head = None
+        for step in steps[position:]:
+            inputs = list(filters.values()) if head is None else [head]
+            head = self._apply(step, position, inputs, "combined", None)
+            position += 1
+        self.outputs = [head]
+
+    def compute_keys(self, fingerprints: Dict[str, str], proxy_pixels: Optional[int] = None) -> None:
+        """Clé de chaque nœud : empreinte de son contenu d'entrée et de ses paramètres.
+
+        fingerprints associe à chaque objet source une empreinte de son contenu.
+        Les clés se composent de proche en proche : changer les paramètres d'une
+        étape ne change que sa clé et celles des étapes en aval. En mode aperçu,
+        la taille du proxy entre dans la clé des sources, et donc de tout le graphe.
+        """
+        for node in self.nodes.values():
+            if node.is_source:
+                node.key = _digest({'source': fingerprints[node.source], 'proxy': proxy_pixels})
+                continue
+            _, version = STEP_FUNCTIONS[node.step.type]
+            node.key = _digest({
+                'step': node.step.type.value,
+                'version': version,
+                'parameters': node.step.parameters,
+                'inputs': [self.nodes[input_id].key for input_id in node.inputs]
+            })
+
+    def dependents(self) -> Dict[str, List[str]]:
+        """Nœuds aval de chaque nœud"""
+        dependents = {node_id: [] for node_id in self.nodes}
+        for node in self.nodes.values():
+            for input_id in node.inputs:
+                dependents[input_id].append(node.id)
+        return dependents
+
+def _digest(value: Dict[str, Any]) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
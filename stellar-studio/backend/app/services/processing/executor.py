@@ -0,0 +1,294 @@
+# app/services/processing/executor.py
+import os
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+import numpy as np
+from app.core.monitoring import PROCESSING_STEP_RESULTS
+from app.services.storage.arrays import ARRAY_PREFIX, ChunkedArrayStore
+from .dag import FILE_MERGE_STEPS, StepNode, WorkflowDag
+from .preview import downsample, proxy_factor
+from .stacking import StackParameters, StackRunner, common_shape
+from .steps import STEP_FUNCTIONS, scale_parameters
+from .tiling import TiledRunner, step_halo, tile_pool
+
+# Résultats d'étapes : arrays/step-{clé}/, partagés entre jobs et balayés par le GC
+STEP_CACHE_PREFIX = "step-"
+
+# progress(nœud, 'cached' | 'computed')
+ProgressCallback = Callable[[StepNode, str], None]
+# (forme, lecture d'une région, facteur de réduction) d'une entrée d'étape
+InputReader = Tuple[Tuple[int, ...], Callable[[Any], np.ndarray], int]
+
+def step_array_name(key: str) -> str:
+    return f"{STEP_CACHE_PREFIX}{key}"
+
+class WorkflowExecutor:
+    """Exécute un WorkflowDag en réutilisant les résultats déjà calculés.
+
+    Chaque résultat d'étape est enregistré dans le stockage de tableaux sous sa
+    clé (empreinte des entrées et des paramètres). Le parcours part des sorties :
+    un nœud déjà en cache n'est pas recalculé et ses entrées ne sont même pas
+    lues. Les nœuds restants s'exécutent dès que leurs entrées sont prêtes, en
+    parallèle d'une branche à l'autre.
+
+    En mode aperçu (proxy_pixels), chaque source est d'abord réduite par
+    moyenne de blocs sous proxy_pixels pixels ; ce proxy est mis en cache comme
+    un résultat d'étape, et les paramètres exprimés en pixels sont réduits
+    d'autant. Le même workflow s'exécute ainsi en temps interactif.
+
+    Les étapes locales (filtres) sur une image plus grande qu'une tuile passent
+    par un TiledRunner, et un stacking dont le cube dépasserait le plafond
+    mémoire par un StackRunner (bandes de lignes lues dans chaque entrée) :
+    les images ne sont jamais chargées en entier, et le plafond mémoire du job
+    est partagé entre les branches qui s'exécutent en parallèle.
+    """
+
+    def __init__(self, store: ChunkedArrayStore, storage, fits_cache, max_workers: int = 4,
+                 memory_limit: int = 2 * 1024 ** 3, tile_size: int = 2048, tile_workers: int = 4,
+                 cache_touch_interval: int = 3600):
+        self.store = store
+        self.storage = storage
+        self.fits_cache = fits_cache
+        self.max_workers = max_workers
+        self.memory_limit = memory_limit
+        self.tile_size = tile_size
+        self.tile_workers = tile_workers
+        self.cache_touch_interval = cache_touch_interval
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Un process enfant (prefork) ne peut pas réutiliser le pool de son parent
+        os.register_at_fork(after_in_child=self._forget_pool)
+
+    def _forget_pool(self) -> None:
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def tile_pool(self):
+        """Pool des tuiles, démarré au premier usage et gardé pour les étapes suivantes"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = tile_pool(self.tile_workers)
+            return self._pool
+
+    def fingerprint(self, object_name: str) -> Optional[str]:
+        """Empreinte du contenu d'un FITS source : hash de contenu, sinon clé et ETag"""
+        digest = self.storage.content_digest(object_name)
+        if digest:
+            return digest
+        info = self.storage.stat_fits_file(object_name)
+        return f"{info['content_name']}:{info['etag']}" if info else None
+
+    def prepare(self, dag: WorkflowDag, proxy_pixels: Optional[int] = None) -> None:
+        """Calcule les clés du graphe à partir du contenu des fichiers sources"""
+        fingerprints = {}
+        for node in dag.nodes.values():
+            if node.is_source and node.source not in fingerprints:
+                fingerprint = self.fingerprint(node.source)
+                if fingerprint is None:
+                    raise FileNotFoundError(f"Input file {node.source} not found")
+                fingerprints[node.source] = fingerprint
+        dag.compute_keys(fingerprints, proxy_pixels)
+
+    def _is_cached(self, node: StepNode) -> bool:
+        """Vrai si le résultat est en cache ; sa date est alors rafraîchie pour le GC"""
+        name = step_array_name(node.key)
+        if self.store.open(name) is None:
+            return False
+        self.store.touch(name, self.cache_touch_interval)
+        return True
+
+    def plan(self, dag: WorkflowDag, proxy: bool = False) -> Set[str]:
+        """Nœuds à calculer : ceux dont le résultat manque et qui mènent à une sortie manquante.
+
+        Les autres sont comptés comme réutilisés, y compris ceux en amont d'un
+        résultat en cache, qu'il n'est pas nécessaire de relire. Les sources
+        ne sont à calculer qu'en mode aperçu (construction du proxy).
+        """
+        pending: Set[str] = set()
+        visited: Set[str] = set()
+        stack = list(dag.outputs)
+        while stack:
+            node_id = stack.pop()
+            if node_id in visited:
+                continue
+            visited.add(node_id)
+            node = dag.nodes[node_id]
+            if (node.is_source and not proxy) or self._is_cached(node):
+                continue
+            pending.add(node_id)
+            stack.extend(node.inputs)
+        return pending
+
+    @contextmanager
+    def _source_hdu(self, object_name: str):
+        """HDU image d'un FITS (extension SCI, sinon premier HDU image), ouvert en memmap"""
+        with self.fits_cache.open(object_name) as hdul:
+            hdus = [hdu for hdu in hdul if hdu.header.get('EXTNAME') == 'SCI']
+            hdus += [hdu for hdu in hdul if hdu.is_image and len(hdu.shape) >= 2]
+            if not hdus:
+                raise ValueError(f"No image data in {object_name}")
+            yield hdus[0]
+
+    def _load_source(self, object_name: str) -> np.ndarray:
+        with self._source_hdu(object_name) as hdu:
+            return np.asarray(hdu.data, dtype=np.float32)
+
+    @contextmanager
+    def open_input(self, node: StepNode, proxy: bool = False) -> Iterator[InputReader]:
+        """Accès par régions au résultat d'un nœud, sans le charger en entier"""
+        if node.is_source and not proxy:
+            with self._source_hdu(node.source) as hdu:
+                # section ne lit que la région demandée (et applique BSCALE/BZERO)
+                yield tuple(hdu.shape), lambda region: np.asarray(hdu.section[region], dtype=np.float32), 1
+            return
+        array = self.store.open(step_array_name(node.key))
+        if array is None:
+            raise FileNotFoundError(f"Cached result of {node.id} disappeared")
+        yield array.shape, array.read, array.attrs.get('factor', 1)
+
+    def load(self, node: StepNode, proxy: bool = False) -> Tuple[np.ndarray, int]:
+        """Résultat complet d'un nœud et son facteur de réduction"""
+        if node.is_source and not proxy:
+            return self._load_source(node.source), 1
+        with self.open_input(node, proxy) as (_, read, factor):
+            return read(None), factor
+
+    def _compute_tiled(self, dag: WorkflowDag, node: StepNode, proxy: bool, tiler: TiledRunner) -> bool:
+        """Exécute une étape locale par tuiles ; False si elle doit passer par l'image entière"""
+        if len(node.inputs) != 1:
+            return False
+        with self.open_input(dag.nodes[node.inputs[0]], proxy) as (shape, read, factor):
+            parameters = scale_parameters(node.step.parameters, factor)
+            halo = step_halo(node.step.type, parameters)
+            if halo is None or not tiler.should_tile(shape):
+                return False
+            output = self.store.create(step_array_name(node.key), shape, np.float32, deferred=True, attrs={
+                'step': node.step.type.value,
+                'parameters': node.step.parameters,
+                'filter': node.filter,
+                'factor': factor
+            })
+            if tiler.pool is None:
+                tiler.pool = self.tile_pool()
+            count = tiler.run(node.step.type, parameters, halo, shape, read, output.write,
+                              alignment=output.chunks[-1])
+            self.store.commit(output)
+            logging.info(f"Processing step {node.id} ran on {count} tiles ({halo}px halo)")
+            return True
+
+    def _compute_stacked(self, dag: WorkflowDag, node: StepNode, proxy: bool, stacker: StackRunner) -> bool:
+        """Combine les entrées d'un stacking par bandes ; False si le cube tient en mémoire"""
+        with ExitStack() as stack:
+            inputs = [stack.enter_context(self.open_input(dag.nodes[input_id], proxy))
+                      for input_id in node.inputs]
+            shape = common_shape([shape for shape, _, _ in inputs])
+            if not stacker.should_stream(len(inputs), shape):
+                return False
+            parameters = StackParameters.from_parameters(node.step.parameters, len(inputs))
+            factor = max(factor for _, _, factor in inputs)
+            output = self.store.create(step_array_name(node.key), shape, np.float32, deferred=True, attrs={
+                'step': node.step.type.value,
+                'parameters': node.step.parameters,
+                'filter': node.filter,
+                'factor': factor
+            })
+            count = stacker.run(parameters, shape, [read for _, read, _ in inputs], output.write,
+                                alignment=output.chunks[-2])
+            self.store.commit(output)
+            logging.info(f"Processing step {node.id} stacked {len(inputs)} frames in {count} bands")
+            return True
+
+    def _compute(self, dag: WorkflowDag, node: StepNode, proxy_pixels: Optional[int],
+                 tiler: Optional[TiledRunner] = None, stacker: Optional[StackRunner] = None) -> None:
+        if node.is_source:
+            data = self._load_source(node.source)
+            factor = proxy_factor(data.shape, proxy_pixels)
+            self.store.save(step_array_name(node.key), downsample(data, factor), attrs={
+                'source': node.source,
+                'factor': factor,
+                'filter': node.filter
+            })
+            return
+
+        if tiler is not None and self._compute_tiled(dag, node, proxy_pixels is not None, tiler):
+            return
+        if (stacker is not None and node.step.type in FILE_MERGE_STEPS
+                and self._compute_stacked(dag, node, proxy_pixels is not None, stacker)):
+            return
+        function, _ = STEP_FUNCTIONS[node.step.type]
+        loaded = [self.load(dag.nodes[input_id], proxy=proxy_pixels is not None) for input_id in node.inputs]
+        factor = max(factor for _, factor in loaded)
+        parameters = scale_parameters(node.step.parameters, factor)
+        result = np.asarray(function([data for data, _ in loaded], parameters), dtype=np.float32)
+        self.store.save(step_array_name(node.key), result, attrs={
+            'step': node.step.type.value,
+            'parameters': node.step.parameters,
+            'filter': node.filter,
+            'factor': factor
+        })
+
+    def run(self, dag: WorkflowDag, progress: Optional[ProgressCallback] = None,
+            proxy_pixels: Optional[int] = None, memory_limit: Optional[int] = None) -> Dict[str, Any]:
+        """Exécute le graphe ; retourne les tableaux de sortie et le bilan du cache"""
+        self.prepare(dag, proxy_pixels)
+        # Chaque branche parallèle reçoit sa part du plafond mémoire du job
+        branch_memory = (memory_limit or self.memory_limit) // self.max_workers
+        tiler = TiledRunner(memory_limit=branch_memory, tile_size=self.tile_size, max_workers=self.tile_workers)
+        stacker = StackRunner(memory_limit=branch_memory, max_workers=self.tile_workers)
+        pending = self.plan(dag, proxy=proxy_pixels is not None)
+        steps = [node for node in dag.nodes.values() if not node.is_source]
+        for node in steps:
+            if node.id not in pending:
+                PROCESSING_STEP_RESULTS.labels(result="cached").inc()
+                if progress is not None:
+                    progress(node, 'cached')
+
+        # Dépendances restantes de chaque nœud à calculer
+        waiting = {
+            node_id: {input_id for input_id in dag.nodes[node_id].inputs if input_id in pending}
+            for node_id in pending
+        }
+        dependents = dag.dependents()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+
+            def submit_ready():
+                for node_id in [node_id for node_id, inputs in waiting.items() if not inputs]:
+                    del waiting[node_id]
+                    running[pool.submit(self._compute, dag, dag.nodes[node_id], proxy_pixels, tiler, stacker)] = node_id
+
+            submit_ready()
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node_id = running.pop(future)
+                    node = dag.nodes[node_id]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # Les branches déjà lancées finissent : leurs résultats restent en cache
+                        logging.error(f"Processing step {node_id} failed: {str(e)}")
+                        for other in running:
+                            other.cancel()
+                        raise
+                    if not node.is_source:
+                        PROCESSING_STEP_RESULTS.labels(result="computed").inc()
+                        if progress is not None:
+                            progress(node, 'computed')
+                    for dependent in dependents[node_id]:
+                        if dependent in waiting:
+                            waiting[dependent].discard(node_id)
+                submit_ready()
+
+        return {
+            'outputs': {
+                node_id: f"{ARRAY_PREFIX}/{step_array_name(dag.nodes[node_id].key)}"
+                for node_id in dag.outputs
+            },
+            'computed': sum(1 for node in steps if node.id in pending),
+            'cached': sum(1 for node in steps if node.id not in pending)
+        }
@@ -0,0 +1,31 @@
+# app/services/processing/export.py
+from typing import Any, Dict
+import numpy as np
+from astropy.io import fits
+from app.services.storage.arrays import ChunkedArray
+
+def write_fits(array: ChunkedArray, path: str, cards: Dict[str, Any]) -> None:
+    """Écrit un résultat d'étape en FITS float32, bande de blocs par bande de blocs.
+
+    Les données passent par un StreamingHDU dans l'ordre du fichier : la
+    mémoire reste bornée à une rangée de blocs, quelle que soit l'image.
+    """
+    header = fits.Header()
+    header['SIMPLE'] = True
+    header['BITPIX'] = -32
+    header['NAXIS'] = len(array.shape)
+    for axis, size in enumerate(reversed(array.shape), start=1):
+        header[f'NAXIS{axis}'] = size
+    header.update(cards)
+
+    height, rows = array.shape[-2], array.chunks[-2]
+    hdu = fits.StreamingHDU(path, header)
+    try:
+        # Plans (canaux) les uns après les autres, lignes de haut en bas
+        for plane in np.ndindex(*array.shape[:-2]):
+            lead = tuple(slice(index, index + 1) for index in plane)
+            for top in range(0, height, rows):
+                band = array.read(lead + (slice(top, min(top + rows, height)), slice(None)))
+                hdu.write(band.astype('>f4', copy=False))
+    finally:
+        hdu.close()
@@ -0,0 +1,49 @@
+# app/services/processing/preview.py
+import io
+import math
+import warnings
+from typing import Tuple
+import numpy as np
+from PIL import Image
+from .stretch import lookup_table, percentiles, quantize
+
+def proxy_factor(shape: Tuple[int, ...], max_pixels: int) -> int:
+    """Facteur de réduction entier ramenant une image sous max_pixels"""
+    pixels = shape[-2] * shape[-1]
+    return max(1, math.ceil(math.sqrt(pixels / max_pixels)))
+
+def downsample(data: np.ndarray, factor: int) -> np.ndarray:
+    """Réduction par moyenne de blocs factor x factor (filtre boîte, sans repliement).
+
+    Les bords qui ne remplissent pas un bloc entier sont écartés ; les pixels
+    invalides (NaN) sont ignorés dans la moyenne de leur bloc.
+    """
+    if factor <= 1:
+        return np.asarray(data, dtype=np.float32)
+    height = data.shape[-2] // factor * factor
+    width = data.shape[-1] // factor * factor
+    blocks = np.asarray(data[..., :height, :width], dtype=np.float32).reshape(
+        data.shape[:-2] + (height // factor, factor, width // factor, factor)
+    )
+    with warnings.catch_warnings():
+        # Blocs entièrement NaN (bords hors champ) : ils restent NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(blocks, axis=(-3, -1)).astype(np.float32)
+
+def render_png(data: np.ndarray) -> bytes:
+    """PNG 8 bits d'un résultat : niveaux de gris, ou RVB pour trois canaux"""
+    data = np.array(data, dtype=np.float32, order='C')
+    if data.ndim == 3 and data.shape[0] != 3:
+        data = np.ascontiguousarray(data.mean(axis=0))
+    black, white = 0.0, 1.0
+    finite = data[np.isfinite(data)]
+    if finite.size and (finite.min() < 0 or finite.max() > 1):
+        # Résultat non étiré : mise à l'échelle entre percentiles
+        black, white = percentiles(data, 0.5, 99.5)
+    pixels = quantize(data, lookup_table(None, np.uint8), black, white)
+    # FITS : origine en bas à gauche
+    pixels = pixels[..., ::-1, :]
+    image = Image.fromarray(np.moveaxis(pixels, 0, -1) if pixels.ndim == 3 else pixels)
+    with io.BytesIO() as output:
+        image.save(output, format='PNG')
+        return output.getvalue()
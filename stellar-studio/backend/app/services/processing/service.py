@@ -0,0 +1,166 @@
+# app/services/processing/service.py
+import os
+import time
+import logging
+import posixpath
+import tempfile
+import dataclasses
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.domain.models.workflow import ProcessingStep, ProcessingStepType, Workflow
+from app.infrastructure.repositories.models.observation import Observation
+from app.infrastructure.repositories.models.workflow import Workflow as WorkflowModel
+from .dag import WorkflowDag
+from .executor import ProgressCallback, WorkflowExecutor, step_array_name
+from .export import write_fits
+from .preview import render_png
+
+UNKNOWN_FILTER = "unknown"
+
+# Surcharges de paramètres par type d'étape : {'stretching': {'stretch': 50}, ...}
+StepOverrides = Dict[str, Dict[str, Any]]
+# Callback d'avancement d'un upload, par clé d'objet exporté
+UploadCallbackFactory = Callable[[str], Callable[[int, int], None]]
+
+def apply_overrides(workflow: Workflow, overrides: Optional[StepOverrides]) -> Workflow:
+    """Copie du workflow dont les étapes reçoivent les paramètres surchargés"""
+    if not overrides:
+        return workflow
+    steps = [
+        dataclasses.replace(step, parameters={**step.parameters, **overrides.get(step.type.value, {})})
+        for step in workflow.steps
+    ]
+    return dataclasses.replace(workflow, steps=steps)
+
+class ProcessingService:
+    """Prépare et exécute les workflows de traitement sur les observations ingérées"""
+
+    def __init__(self, executor: WorkflowExecutor):
+        self.executor = executor
+
+    def get_workflow(self, workflow_id: str) -> Optional[Workflow]:
+        with SessionLocal() as db:
+            row = db.get(WorkflowModel, workflow_id)
+            if row is None:
+                return None
+            return Workflow(
+                id=row.id,
+                name=row.name,
+                description=row.description,
+                steps=[
+                    ProcessingStep(
+                        type=ProcessingStepType(step['type']),
+                        order=step['order'],
+                        parameters=step.get('parameters') or {},
+                        description=step.get('description', '')
+                    )
+                    for step in row.steps or []
+                ],
+                is_default=row.is_default,
+                target_type=row.target_type,
+                required_filters=row.required_filters or []
+            )
+
+    def files_by_filter(self, observation_id: str, required_filters: List[str]) -> Dict[str, List[str]]:
+        """Fichiers d'une observation regroupés par filtre, d'après les en-têtes lus à l'ingestion.
+
+        Les filtres suivent l'ordre de required_filters (ordre des canaux), les
+        autres sont ignorés ; sans filtre requis, tous sont gardés, triés par nom.
+        """
+        with SessionLocal() as db:
+            observation = db.get(Observation, observation_id)
+            if observation is None:
+                raise ValueError(f"Observation {observation_id} not found")
+            fits_files = list(observation.fits_files or [])
+            metadata = observation.fits_metadata or {}
+
+        groups: Dict[str, List[str]] = {}
+        for object_name in fits_files:
+            filters = (metadata.get(object_name) or {}).get('filters') or [UNKNOWN_FILTER]
+            groups.setdefault("+".join(filters), []).append(object_name)
+
+        if required_filters:
+            missing = [name for name in required_filters if name not in groups]
+            if missing:
+                raise ValueError(f"Observation {observation_id} has no file for filters {', '.join(missing)}")
+            return {name: sorted(groups[name]) for name in required_filters}
+        return {name: sorted(groups[name]) for name in sorted(groups)}
+
+    def build_dag(self, observation_id: str, workflow_id: str,
+                  overrides: Optional[StepOverrides] = None) -> WorkflowDag:
+        workflow = self.get_workflow(workflow_id)
+        if workflow is None:
+            raise ValueError(f"Workflow {workflow_id} not found")
+        workflow = apply_overrides(workflow, overrides)
+        return WorkflowDag(workflow, self.files_by_filter(observation_id, workflow.required_filters))
+
+    def run_workflow(self, observation_id: str, workflow_id: str,
+                     overrides: Optional[StepOverrides] = None,
+                     progress: Optional[ProgressCallback] = None,
+                     memory_limit: Optional[int] = None,
+                     upload_progress: Optional[UploadCallbackFactory] = None) -> Dict[str, Any]:
+        """Exécute un workflow ; seules les étapes dont les entrées ou paramètres ont changé sont recalculées.
+
+        memory_limit remplace, pour ce job, le plafond mémoire des étapes par
+        tuiles. Les sorties sont ensuite exportées en FITS (voir export_outputs).
+        """
+        dag = self.build_dag(observation_id, workflow_id, overrides)
+        result = self.executor.run(dag, progress=progress, memory_limit=memory_limit)
+        logging.info(
+            f"Workflow {workflow_id} on {observation_id}: "
+            f"{result['computed']} steps computed, {result['cached']} reused"
+        )
+        result['files'] = self.export_outputs(dag, upload_progress)
+        return result
+
+    def export_outputs(self, dag: WorkflowDag,
+                       upload_progress: Optional[UploadCallbackFactory] = None) -> Dict[str, str]:
+        """Exporte chaque sortie en FITS à côté des fichiers sources ; retourne {nœud: clé}.
+
+        La clé dérive de celle du résultat : relancer un workflow inchangé
+        réécrit le même objet. Les gros fichiers partent en upload multipart
+        parallèle (StorageService.store_fits_file).
+        """
+        directory = posixpath.dirname(next(node.source for node in dag.nodes.values() if node.is_source))
+        files = {}
+        with tempfile.TemporaryDirectory(prefix="export-") as workdir:
+            for node_id in dag.outputs:
+                node = dag.nodes[node_id]
+                array = self.executor.store.open(step_array_name(node.key))
+                if array is None:
+                    raise FileNotFoundError(f"Result of {node_id} not found")
+                object_name = f"{directory}/processed/{node.key[:16]}_processed.fits"
+                path = os.path.join(workdir, posixpath.basename(object_name))
+                cards = {'WORKFLOW': dag.workflow.id, 'STEPKEY': node.key}
+                if node.filter:
+                    cards['FILTER'] = node.filter
+                write_fits(array, path, cards)
+                progress = upload_progress(object_name) if upload_progress is not None else None
+                if not self.executor.storage.store_fits_file(path, object_name, progress=progress):
+                    raise RuntimeError(f"Could not store {object_name}")
+                os.remove(path)
+                files[node_id] = object_name
+        return files
+
+    def preview(self, observation_id: str, workflow_id: str,
+                overrides: Optional[StepOverrides] = None,
+                max_pixels: int = settings.PREVIEW_MAX_PIXELS) -> Dict[str, Any]:
+        """Aperçu PNG du workflow sur des proxys réduits, pour un réglage interactif.
+
+        Les proxys et les étapes en amont du paramètre modifié sont repris du
+        cache : déplacer un curseur ne recalcule que la fin de la chaîne, sur
+        environ max_pixels pixels. La pleine résolution reste réservée à run_workflow.
+        """
+        started = time.monotonic()
+        dag = self.build_dag(observation_id, workflow_id, overrides)
+        result = self.executor.run(dag, proxy_pixels=max_pixels)
+        # Première sortie : l'image combinée, ou le premier filtre sans fusion
+        node = dag.nodes[dag.outputs[0]]
+        data, _ = self.executor.load(node, proxy=True)
+        return {
+            'image': render_png(data),
+            'computed': result['computed'],
+            'cached': result['cached'],
+            'elapsed': time.monotonic() - started
+        }
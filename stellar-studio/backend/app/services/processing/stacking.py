@@ -0,0 +1,216 @@
+# app/services/processing/stacking.py
+import logging
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+Region = Tuple[slice, ...]
+
+STACK_METHODS = ('median', 'mean', 'sigma_clip', 'winsorized')
+# Copies d'une bande de N images vivantes pendant sa combinaison : lecture,
+# tri de la médiane, puis cube winsorisé et temporaires de np.nanstd
+STACK_MEMORY_FACTOR = 5
+# Winsorisation : bornes à 1.5 sigma, et correction du biais de l'écart type
+# d'une gaussienne écrêtée à 1.5 sigma
+WINSORIZE_CLIP = 1.5
+WINSORIZE_CORRECTION = 1.134
+
+@dataclass
+class StackParameters:
+    """Paramètres de combinaison d'une étape de stacking"""
+    method: str = 'median'
+    weights: Optional[List[float]] = None  # Un poids par image (moyennes seulement)
+    sigma_low: float = 3.0
+    sigma_high: float = 3.0
+    iterations: int = 5
+
+    @classmethod
+    def from_parameters(cls, parameters: Dict[str, Any], frames: int) -> 'StackParameters':
+        method = parameters.get('method', 'median')
+        if method not in STACK_METHODS:
+            raise ValueError(f"Unknown stacking method: {method}")
+        weights = parameters.get('weights')
+        if weights is not None and len(weights) != frames:
+            raise ValueError(f"stacking has {len(weights)} weights for {frames} frames")
+        return cls(
+            method=method,
+            weights=[float(weight) for weight in weights] if weights is not None else None,
+            sigma_low=float(parameters.get('sigma_low', 3.0)),
+            sigma_high=float(parameters.get('sigma_high', 3.0)),
+            iterations=int(parameters.get('iterations', 5))
+        )
+
+def _weighted_mean(cube: np.ndarray, weights: Optional[Sequence[float]]) -> np.ndarray:
+    """Moyenne pondérée sur le premier axe, pixels NaN (rejetés) exclus ; cube est modifié"""
+    shape = (len(cube),) + (1,) * (cube.ndim - 1)
+    weights = np.ones(shape, dtype=np.float32) if weights is None else \
+        np.asarray(weights, dtype=np.float32).reshape(shape)
+    valid = np.isfinite(cube)
+    total = np.sum(valid * weights, axis=0, dtype=np.float32)
+    cube[~valid] = 0
+    cube *= weights
+    combined = cube.sum(axis=0, dtype=np.float32)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        combined /= total
+    # Aucune valeur conservée (ou poids nuls) : pixel invalide
+    combined[total <= 0] = np.nan
+    return combined
+
+def _nanmedian(cube: np.ndarray) -> np.ndarray:
+    """Médiane sur le premier axe en ignorant les NaN.
+
+    Les NaN sont triés en fin d'axe : la médiane se lit au milieu des valeurs
+    finies de chaque pixel. Plus rapide que np.nanmedian, qui passe par des
+    tableaux masqués pour un premier axe court (quelques dizaines d'images).
+    """
+    ordered = np.sort(cube, axis=0)
+    count = np.count_nonzero(~np.isnan(ordered), axis=0)
+    lower = np.take_along_axis(ordered, np.maximum(count - 1, 0)[None] // 2, axis=0)[0]
+    upper = np.take_along_axis(ordered, np.minimum(count // 2, len(cube) - 1)[None], axis=0)[0]
+    median = (lower + upper) / 2
+    median[count == 0] = np.nan
+    return median
+
+def _winsorized_sigma(values: np.ndarray, center: np.ndarray, sigma: np.ndarray,
+                      tolerance: float = 5e-4, max_iterations: int = 10) -> np.ndarray:
+    """Écart type robuste : valeurs ramenées à center ± 1.5 sigma jusqu'à convergence.
+
+    Seuls les pixels pas encore convergés sont recalculés à chaque itération.
+    """
+    sigma = sigma.copy()
+    active = np.arange(values.shape[1])
+    for _ in range(max_iterations):
+        current, middle = sigma[active], center[active]
+        clipped = np.clip(values[:, active], middle - WINSORIZE_CLIP * current, middle + WINSORIZE_CLIP * current)
+        updated = WINSORIZE_CORRECTION * np.nanstd(clipped, axis=0)
+        sigma[active] = updated
+        active = active[np.abs(updated - current) > tolerance * np.abs(current)]
+        if not active.size:
+            break
+    return sigma
+
+def reject(cube: np.ndarray, parameters: StackParameters) -> int:
+    """Rejet itératif des valeurs hors de médiane ± k sigma, remplacées par NaN.
+
+    En 'winsorized', sigma est estimé sur les valeurs winsorisées : une valeur
+    aberrante ne gonfle plus l'écart type qui sert à la rejeter, ce qui reste
+    efficace avec peu d'images. Après le premier passage, seuls les pixels
+    ayant perdu une valeur sont réévalués. Retourne le nombre de valeurs rejetées.
+    """
+    flat = cube.reshape(len(cube), -1)
+    active = np.arange(flat.shape[1])
+    rejected = 0
+    for iteration in range(parameters.iterations):
+        values = flat if iteration == 0 else flat[:, active]
+        center = _nanmedian(values)
+        sigma = np.nanstd(values, axis=0)
+        if parameters.method == 'winsorized':
+            sigma = _winsorized_sigma(values, center, sigma)
+        outliers = values < center - parameters.sigma_low * sigma
+        outliers |= values > center + parameters.sigma_high * sigma
+        frames, pixels = np.nonzero(outliers)
+        if not frames.size:
+            break
+        flat[frames, active[pixels]] = np.nan
+        rejected += frames.size
+        active = active[np.unique(pixels)]
+    return rejected
+
+def combine(cube: np.ndarray, parameters: StackParameters) -> np.ndarray:
+    """Combine un cube (images, ...) en une image ; cube (float32, contigu) est modifié.
+
+    'median' ignore les poids ; 'mean', 'sigma_clip' et 'winsorized' donnent
+    la moyenne pondérée des valeurs conservées.
+    """
+    with warnings.catch_warnings():
+        # Pixels invalides dans toutes les images : ils restent NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if parameters.method == 'median':
+            return _nanmedian(cube).astype(np.float32)
+        if parameters.method in ('sigma_clip', 'winsorized'):
+            reject(cube, parameters)
+        return _weighted_mean(cube, parameters.weights)
+
+def common_shape(shapes: Sequence[Tuple[int, ...]]) -> Tuple[int, ...]:
+    """Zone commune d'images de tailles voisines (les axes de tête doivent coïncider)"""
+    leads = {tuple(shape[:-2]) for shape in shapes}
+    if len(leads) != 1:
+        raise ValueError(f"Cannot stack inputs with different planes: {sorted(leads)}")
+    return leads.pop() + (min(shape[-2] for shape in shapes), min(shape[-1] for shape in shapes))
+
+def row_blocks(shape: Tuple[int, ...], rows: int) -> Iterator[Region]:
+    """Bandes de rows lignes sur toute la largeur (et tous les plans)"""
+    lead = tuple(slice(0, size) for size in shape[:-2])
+    height, width = shape[-2:]
+    for top in range(0, height, rows):
+        yield lead + (slice(top, min(top + rows, height)), slice(0, width))
+
+class StackRunner:
+    """Combine N images bande par bande, sous un plafond mémoire.
+
+    Chaque bande est lue dans toutes les entrées (lectures par région : section
+    FITS ou blocs du stockage de tableaux), combinée puis écrite : seules les
+    bandes en vol sont en mémoire, soit O(bande x N) quelle que soit la taille
+    des images. Les lectures se font depuis le thread appelant (une section
+    FITS n'est pas partagée entre threads) ; les combinaisons, où numpy libère
+    le GIL, s'exécutent en parallèle.
+    """
+
+    def __init__(self, memory_limit: int, max_workers: int = 4, min_rows: int = 16):
+        self.memory_limit = memory_limit
+        self.max_workers = max_workers
+        self.min_rows = min_rows
+
+    def should_stream(self, frames: int, shape: Tuple[int, ...]) -> bool:
+        """Vrai si le cube complet ne tient pas sous le plafond mémoire"""
+        pixels = int(np.prod(shape, dtype=np.int64))
+        return frames > 1 and STACK_MEMORY_FACTOR * frames * pixels * 4 > self.memory_limit
+
+    def plan(self, frames: int, shape: Tuple[int, ...], alignment: int) -> Tuple[int, int]:
+        """Hauteur de bande (multiple de alignment si possible) et nombre de bandes en vol"""
+        row_bytes = STACK_MEMORY_FACTOR * frames * int(np.prod(shape, dtype=np.int64)) // shape[-2] * 4
+        rows = max(self.min_rows, self.memory_limit // (self.max_workers * row_bytes))
+        rows = min(rows, shape[-2])
+        if rows >= alignment:
+            rows -= rows % alignment
+        if rows * row_bytes > self.memory_limit:
+            logging.warning(
+                f"Stacking band of {rows} rows over {frames} frames exceeds the "
+                f"{self.memory_limit / 2**20:.0f} MiB processing memory limit"
+            )
+        in_flight = max(1, min(self.max_workers, self.memory_limit // (rows * row_bytes)))
+        return rows, in_flight
+
+    def run(self, parameters: StackParameters, shape: Tuple[int, ...],
+            reads: List[Callable[[Region], np.ndarray]],
+            write: Callable[[Region, np.ndarray], None], alignment: int = 1) -> int:
+        """Lit, combine et écrit toutes les bandes ; retourne le nombre de bandes"""
+        rows, in_flight = self.plan(len(reads), shape, alignment)
+        pending = row_blocks(shape, rows)
+        count = 0
+        with ThreadPoolExecutor(max_workers=in_flight) as pool:
+            running = {}
+
+            def submit_next() -> bool:
+                region = next(pending, None)
+                if region is None:
+                    return False
+                cube = np.empty((len(reads),) + tuple(sel.stop - sel.start for sel in region), dtype=np.float32)
+                for index, read in enumerate(reads):
+                    cube[index] = read(region)
+                running[pool.submit(combine, cube, parameters)] = region
+                return True
+
+            # Au plus in_flight bandes chargées à la fois : la mémoire reste bornée
+            while len(running) < in_flight and submit_next():
+                pass
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    region = running.pop(future)
+                    write(region, future.result())
+                    count += 1
+                    submit_next()
+        return count
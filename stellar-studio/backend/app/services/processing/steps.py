@@ -0,0 +1,173 @@
+# app/services/processing/steps.py
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+from scipy import ndimage
+from app.domain.models.workflow import ProcessingStepType
+from . import stretch as stretching
+from .stacking import StackParameters, combine
+
+# Une étape reçoit ses entrées (une par branche amont) et ses paramètres, et
+# retourne un nouveau tableau float32 sans modifier ses entrées (elles peuvent
+# venir du cache ou être partagées entre branches).
+StepFunction = Callable[[List[np.ndarray], Dict[str, Any]], np.ndarray]
+
+# type -> (fonction, version). La version entre dans la clé de cache :
+# l'incrémenter quand le calcul d'une étape change invalide ses anciens résultats.
+STEP_FUNCTIONS: Dict[ProcessingStepType, Tuple[StepFunction, int]] = {}
+
+# Paramètres exprimés en pixels : divisés par le facteur de réduction en mode aperçu
+SPATIAL_PARAMETERS = {'sigma', 'size', 'radius', 'psf_sigma'}
+
+def scale_parameters(parameters: Dict[str, Any], factor: int) -> Dict[str, Any]:
+    """Paramètres équivalents sur une image réduite d'un facteur factor"""
+    if factor <= 1:
+        return parameters
+    scaled = dict(parameters)
+    for name in SPATIAL_PARAMETERS & scaled.keys():
+        if name == 'size':
+            # Taille de fenêtre : entière et impaire
+            scaled[name] = max(1, int(round(scaled[name] / factor)) | 1)
+        else:
+            scaled[name] = scaled[name] / factor
+    return scaled
+
+def step(step_type: ProcessingStepType, version: int = 1):
+    def register(function: StepFunction) -> StepFunction:
+        STEP_FUNCTIONS[step_type] = (function, version)
+        return function
+    return register
+
+def _single(inputs: List[np.ndarray], step_type: ProcessingStepType) -> np.ndarray:
+    if len(inputs) != 1:
+        raise ValueError(f"{step_type.value} expects one input, got {len(inputs)}")
+    return inputs[0]
+
+def _image_axes(data: np.ndarray) -> Tuple[int, int]:
+    """Axes image (les deux derniers), les autres étant des plans ou des canaux"""
+    return (data.ndim - 2, data.ndim - 1)
+
+def _planes(data: np.ndarray, function) -> np.ndarray:
+    """Applique une opération 2D à chaque plan d'un cube"""
+    if data.ndim == 2:
+        return function(data)
+    flat = data.reshape((-1,) + data.shape[-2:])
+    return np.stack([function(plane) for plane in flat]).reshape(data.shape)
+
+def _crop_common(inputs: List[np.ndarray]) -> List[np.ndarray]:
+    """Recadre des images de tailles voisines sur leur zone commune"""
+    height = min(data.shape[-2] for data in inputs)
+    width = min(data.shape[-1] for data in inputs)
+    return [data[..., :height, :width] for data in inputs]
+
+def _noise_sigma(plane: np.ndarray) -> float:
+    """Écart type du bruit estimé par MAD des différences entre pixels voisins"""
+    differences = np.diff(plane, axis=-1)
+    return float(1.4826 * np.nanmedian(np.abs(differences)) / np.sqrt(2))
+
+@step(ProcessingStepType.CALIBRATION)
+def calibrate(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Soustraction du fond de ciel (médiane par plan) et remplacement des pixels invalides"""
+    data = _single(inputs, ProcessingStepType.CALIBRATION).astype(np.float32, copy=True)
+    invalid = ~np.isfinite(data)
+    if parameters.get('background', 'median') == 'median':
+        background = np.nanmedian(np.where(invalid, np.nan, data), axis=_image_axes(data), keepdims=True)
+        data -= np.nan_to_num(background).astype(np.float32)
+    data[invalid] = parameters.get('nan_value', 0.0)
+    return data
+
+@step(ProcessingStepType.STACKING, version=2)
+def stack(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Combinaison des expositions d'un même filtre : médiane, moyenne pondérée,
+    ou moyenne après rejet sigma-clipping ou winsorisé (voir stacking.combine)"""
+    options = StackParameters.from_parameters(parameters, len(inputs))
+    if len(inputs) == 1:
+        return inputs[0].astype(np.float32)
+    cube = np.stack([np.asarray(data, dtype=np.float32) for data in _crop_common(inputs)])
+    return combine(cube, options)
+
+@step(ProcessingStepType.STRETCHING, version=2)
+def stretch(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Étirement non linéaire (asinh, log, mtf ou linéaire) entre deux percentiles, résultat dans [0, 1]"""
+    data = np.array(_single(inputs, ProcessingStepType.STRETCHING), dtype=np.float32, order='C')
+    return stretching.stretch(
+        data,
+        method=parameters.get('method', 'asinh'),
+        factor=float(parameters.get('stretch', 10.0)),
+        black_percentile=float(parameters.get('black_percentile', 0.5)),
+        white_percentile=float(parameters.get('white_percentile', 99.5)),
+        midtone=parameters.get('midtone'),
+        shadows_clip=float(parameters.get('shadows_clip', stretching.DEFAULT_SHADOWS_CLIP)),
+        target_background=float(parameters.get('target_background', stretching.DEFAULT_TARGET_BACKGROUND))
+    )
+
+@step(ProcessingStepType.COLOR_BALANCE)
+def color_balance(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Assemble les filtres en canaux (C, H, W), égalisés sur leur médiane puis pondérés.
+
+    Les canaux vont du plus bleu au plus rouge (ordre des filtres du workflow) :
+    temperature (-1 à 1) renforce l'un ou l'autre bout, saturation (1 = neutre)
+    écarte ou rapproche chaque canal de la luminance.
+    """
+    channels = _crop_common([data.astype(np.float32) for data in inputs])
+    weights = list(parameters.get('weights') or [1.0] * len(channels))
+    if len(weights) != len(channels):
+        raise ValueError(f"color_balance has {len(weights)} weights for {len(channels)} channels")
+    temperature = float(parameters.get('temperature', 0.0))
+    if temperature and len(channels) > 1:
+        weights[0] *= 1 - temperature / 2
+        weights[-1] *= 1 + temperature / 2
+    balanced = []
+    for channel, weight in zip(channels, weights):
+        median = float(np.nanmedian(channel))
+        balanced.append(channel * (weight / median if median > 0 else weight))
+    cube = np.stack(balanced)
+    saturation = float(parameters.get('saturation', 1.0))
+    if saturation != 1.0 and len(channels) > 1:
+        luminance = cube.mean(axis=0, keepdims=True)
+        cube -= luminance
+        cube *= saturation
+        cube += luminance
+    return cube
+
+@step(ProcessingStepType.NOISE_REDUCTION)
+def reduce_noise(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Lissage gaussien, médian ou par moyennes non locales, plan par plan"""
+    data = _single(inputs, ProcessingStepType.NOISE_REDUCTION).astype(np.float32)
+    method = parameters.get('method', 'gaussian')
+    if method == 'nl_means':
+        from skimage.restoration import denoise_nl_means
+
+        strength = float(parameters.get('h', 0.8))
+        return _planes(data, lambda plane: denoise_nl_means(
+            plane, h=strength * _noise_sigma(plane), fast_mode=True, patch_size=5, patch_distance=6
+        ).astype(np.float32))
+    if method == 'median':
+        size = int(parameters.get('size', 3))
+        return _planes(data, lambda plane: ndimage.median_filter(plane, size=size))
+    sigma = float(parameters.get('sigma', 1.0))
+    return _planes(data, lambda plane: ndimage.gaussian_filter(plane, sigma=sigma))
+
+@step(ProcessingStepType.SHARPENING)
+def sharpen(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Masque flou : data + amount * (data - flou)"""
+    data = _single(inputs, ProcessingStepType.SHARPENING).astype(np.float32)
+    radius = float(parameters.get('radius', 2.0))
+    amount = float(parameters.get('amount', 0.5))
+    blurred = _planes(data, lambda plane: ndimage.gaussian_filter(plane, sigma=radius))
+    return data + amount * (data - blurred)
+
+@step(ProcessingStepType.DECONVOLUTION)
+def deconvolve(inputs: List[np.ndarray], parameters: Dict[str, Any]) -> np.ndarray:
+    """Richardson-Lucy avec une PSF gaussienne"""
+    from skimage.restoration import richardson_lucy
+
+    data = _single(inputs, ProcessingStepType.DECONVOLUTION).astype(np.float32)
+    sigma = float(parameters.get('psf_sigma', 1.5))
+    radius = max(1, int(3 * sigma))
+    y, x = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    psf = np.exp(-(x ** 2 + y ** 2) / (2 * sigma ** 2)).astype(np.float32)
+    psf /= psf.sum()
+    iterations = int(parameters.get('iterations', 10))
+    return _planes(data, lambda plane: richardson_lucy(
+        np.clip(plane, 0, None), psf, num_iter=iterations, clip=False
+    ).astype(np.float32))
@@ -0,0 +1,273 @@
+# app/services/processing/stretch.py
+# Courbes d'étirement des images linéaires (linéaire écrêtée, asinh, log, MTF).
+#
+# Les fonctions travaillent en place sur des tableaux float32 contigus, par
+# blocs de BLOCK_SIZE éléments : les temporaires restent petits et tiennent en
+# cache, même sur des images de 100 MP. Les statistiques (percentiles, médiane,
+# MAD) sont estimées sur un échantillon régulier plutôt que par un tri complet.
+# Pour une sortie entière, une table précalculée remplace l'évaluation de
+# la normalisation et la courbe : une seule passe des données brutes à la sortie.
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Tuple
+import numpy as np
+
+BLOCK_SIZE = 1 << 20  # Éléments par bloc
+SAMPLE_SIZE = 1 << 20  # Pixels échantillonnés pour les statistiques
+# Niveaux d'entrée de la table : 16 fois la résolution d'une sortie 16 bits,
+# pour que les courbes raides près du noir (log, asinh fort) restent à quelques
+# niveaux de sortie près du calcul direct
+LUT_SIZE = 1 << 20
+MAD_TO_SIGMA = 1.4826
+# Paramètres par défaut de l'étirement automatique (STF de PixInsight)
+DEFAULT_SHADOWS_CLIP = -2.8
+DEFAULT_TARGET_BACKGROUND = 0.25
+
+Curve = Callable[[np.ndarray], None]
+
+def _float32(data: np.ndarray) -> np.ndarray:
+    if data.dtype != np.float32 or not data.flags.c_contiguous:
+        raise TypeError("Stretch functions work in place on C-contiguous float32 arrays")
+    return data
+
+def _blocks(data: np.ndarray) -> Iterator[np.ndarray]:
+    """Vues successives sur les données à plat"""
+    flat = _float32(data).reshape(-1)
+    for start in range(0, flat.size, BLOCK_SIZE):
+        yield flat[start:start + BLOCK_SIZE]
+
+def sample(data: np.ndarray, size: int = SAMPLE_SIZE) -> np.ndarray:
+    """Échantillon régulier des pixels finis, d'au plus size valeurs environ"""
+    flat = data.reshape(-1)
+    values = flat[::max(1, flat.size // size)]
+    return values[np.isfinite(values)]
+
+def percentiles(data: np.ndarray, *q: float) -> Tuple[float, ...]:
+    values = sample(data)
+    if values.size == 0:
+        return tuple(0.0 for _ in q)
+    return tuple(float(v) for v in np.percentile(values, q))
+
+# --- Courbes (entrée et sortie dans [0, 1]) ---
+
+def _clip_unit(block: np.ndarray) -> None:
+    # fmax/fmin ignorent les NaN : écrêtage et remplacement des NaN par 0
+    np.fmax(block, 0, out=block)
+    np.fmin(block, 1, out=block)
+
+def _scale(black: float, white: float) -> float:
+    return 1.0 / max(white - black, np.finfo(np.float32).tiny)
+
+def linear_clip(data: np.ndarray, black: float, white: float) -> np.ndarray:
+    """Ramène [black, white] sur [0, 1] et écrête ; les NaN deviennent 0"""
+    scale = _scale(black, white)
+    for block in _blocks(data):
+        block -= black
+        block *= scale
+        _clip_unit(block)
+    return data
+
+def _asinh_curve(factor: float) -> Curve:
+    norm = 1.0 / np.arcsinh(factor)
+
+    def curve(block: np.ndarray) -> None:
+        block *= factor
+        np.arcsinh(block, out=block)
+        block *= norm
+    return curve
+
+def _log_curve(factor: float) -> Curve:
+    norm = 1.0 / np.log1p(factor)
+
+    def curve(block: np.ndarray) -> None:
+        block *= factor
+        np.log1p(block, out=block)
+        block *= norm
+    return curve
+
+def _mtf_curve(midtone: float) -> Curve:
+    """MTF(m, x) = (m - 1) x / ((2m - 1) x - m) : vaut 0, 0.5 et 1 en 0, m et 1"""
+    def curve(block: np.ndarray) -> None:
+        denominator = block * (2 * midtone - 1)
+        denominator -= midtone
+        block *= midtone - 1
+        block /= denominator
+    return curve
+
+def _clip_curve(black: float, white: float) -> Curve:
+    scale = _scale(black, white)
+
+    def curve(block: np.ndarray) -> None:
+        block -= black
+        block *= scale
+        _clip_unit(block)
+    return curve
+
+def _chain(*curves: Optional[Curve]) -> Optional[Curve]:
+    curves = [curve for curve in curves if curve is not None]
+    if len(curves) < 2:
+        return curves[0] if curves else None
+
+    def curve(block: np.ndarray) -> None:
+        for function in curves:
+            function(block)
+    return curve
+
+def mtf(midtone: float, x):
+    """Fonction de transfert des tons moyens, pour des scalaires ou des tableaux"""
+    return (midtone - 1) * x / ((2 * midtone - 1) * x - midtone)
+
+def _apply(data: np.ndarray, curve: Curve) -> np.ndarray:
+    for block in _blocks(data):
+        curve(block)
+    return data
+
+def asinh_stretch(data: np.ndarray, factor: float = 10.0) -> np.ndarray:
+    """asinh(factor x) / asinh(factor), sur des données déjà dans [0, 1]"""
+    return _apply(data, _asinh_curve(factor)) if factor > 0 else data
+
+def log_stretch(data: np.ndarray, factor: float = 1000.0) -> np.ndarray:
+    """log(1 + factor x) / log(1 + factor), sur des données déjà dans [0, 1]"""
+    return _apply(data, _log_curve(factor)) if factor > 0 else data
+
+def mtf_stretch(data: np.ndarray, midtone: float) -> np.ndarray:
+    """Fonction de transfert des tons moyens, sur des données déjà dans [0, 1]"""
+    return _apply(data, _mtf_curve(midtone)) if midtone != 0.5 else data
+
+@dataclass
+class ScreenTransfer:
+    """Paramètres d'étirement automatique : point noir, tons moyens, point blanc"""
+    shadows: float
+    midtone: float
+    highlights: float = 1.0
+
+def auto_screen_transfer(data: np.ndarray, shadows_clip: float = DEFAULT_SHADOWS_CLIP,
+                         target_background: float = DEFAULT_TARGET_BACKGROUND) -> ScreenTransfer:
+    """Calcul automatique des paramètres (méthode STF de PixInsight).
+
+    Sur des données dans [0, 1] : le point noir est placé shadows_clip écarts
+    types (MAD normalisée) sous la médiane, puis les tons moyens sont choisis
+    pour que la médiane tombe sur target_background après étirement.
+    """
+    values = sample(data)
+    if values.size == 0:
+        return ScreenTransfer(0.0, 0.5)
+    median = float(np.median(values))
+    sigma = MAD_TO_SIGMA * float(np.median(np.abs(values - median)))
+    shadows = min(max(median + shadows_clip * sigma, 0.0), 1.0)
+    if shadows >= 1.0:
+        return ScreenTransfer(shadows, 0.5)
+    background = (median - shadows) / (1.0 - shadows)
+    midtone = float(mtf(target_background, background)) if background > 0 else 0.5
+    return ScreenTransfer(shadows, min(max(midtone, 1e-6), 1 - 1e-6))
+
+def normalize(data: np.ndarray, black_percentile: float = 0.0,
+              white_percentile: float = 100.0) -> np.ndarray:
+    """Ramène les données linéaires dans [0, 1] entre deux percentiles"""
+    black, white = percentiles(data, black_percentile, white_percentile)
+    return linear_clip(data, black, white)
+
+def _curve(method: str, factor: float, midtone: Optional[float]) -> Optional[Curve]:
+    if method == 'linear':
+        return None
+    if method == 'asinh':
+        return _asinh_curve(factor) if factor > 0 else None
+    if method == 'log':
+        return _log_curve(factor) if factor > 0 else None
+    if method == 'mtf':
+        return _mtf_curve(midtone) if midtone != 0.5 else None
+    raise ValueError(f"Unknown stretch method: {method}")
+
+def _plan(data: np.ndarray, method: str, factor: float, black_percentile: float,
+          white_percentile: float, midtone: Optional[float], shadows_clip: float,
+          target_background: float) -> Tuple[float, float, Optional[Curve]]:
+    """Bornes de normalisation et courbe à appliquer ensuite, sans toucher aux données.
+
+    Les statistiques de l'étirement automatique sont calculées sur l'échantillon
+    normalisé, pas sur l'image : elle n'est parcourue qu'au moment d'appliquer.
+    """
+    values = sample(data)
+    black, white = (tuple(float(v) for v in np.percentile(values, [black_percentile, white_percentile]))
+                    if values.size else (0.0, 1.0))
+    shadows = None
+    if method == 'mtf' and midtone is None:
+        values = values.copy()
+        _clip_curve(black, white)(values)
+        transfer = auto_screen_transfer(values, shadows_clip, target_background)
+        midtone = transfer.midtone
+        if transfer.shadows > 0:
+            shadows = _clip_curve(transfer.shadows, transfer.highlights)
+    return black, white, _chain(shadows, _curve(method, factor, midtone))
+
+def stretch(data: np.ndarray, method: str = 'asinh', factor: float = 10.0,
+            black_percentile: float = 0.5, white_percentile: float = 99.5,
+            midtone: Optional[float] = None, shadows_clip: float = DEFAULT_SHADOWS_CLIP,
+            target_background: float = DEFAULT_TARGET_BACKGROUND) -> np.ndarray:
+    """Étire en place des données linéaires ; résultat dans [0, 1].
+
+    Les données sont d'abord ramenées entre deux percentiles, puis la courbe est
+    appliquée : 'linear', 'asinh' et 'log' (intensité factor), ou 'mtf' avec
+    midtone explicite ou, à défaut, les paramètres automatiques.
+    """
+    black, white, curve = _plan(data, method, factor, black_percentile, white_percentile,
+                                midtone, shadows_clip, target_background)
+    return _apply(data, _chain(_clip_curve(black, white), curve))
+
+def auto_stretch(data: np.ndarray, shadows_clip: float = DEFAULT_SHADOWS_CLIP,
+                 target_background: float = DEFAULT_TARGET_BACKGROUND) -> np.ndarray:
+    """Étirement automatique MTF, sans réglage"""
+    return stretch(data, method='mtf', black_percentile=0.0, white_percentile=100.0,
+                   shadows_clip=shadows_clip, target_background=target_background)
+
+# --- Sortie entière par table de correspondance ---
+
+def lookup_table(curve: Optional[Curve], dtype=np.uint16) -> np.ndarray:
+    """Courbe précalculée sur LUT_SIZE intervalles de [0, 1], convertie vers dtype.
+
+    L'entrée i couvre [i, i + 1) / (LUT_SIZE - 1) : la courbe est évaluée au
+    centre de l'intervalle, quantize pouvant alors tronquer sans arrondir.
+    """
+    levels = np.arange(LUT_SIZE, dtype=np.float32)
+    levels += 0.5
+    levels /= LUT_SIZE - 1
+    _clip_unit(levels)
+    if curve is not None:
+        curve(levels)
+    _clip_unit(levels)
+    return (levels * np.iinfo(dtype).max + 0.5).astype(dtype)
+
+def quantize(data: np.ndarray, table: np.ndarray, black: float = 0.0, white: float = 1.0,
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Données ramenées de [black, white] vers des entiers via une table.
+
+    Normalisation et courbe tiennent en une passe : soustraction, mise à
+    l'échelle de la table, puis lecture. data sert de tampon et est modifiée ;
+    les NaN prennent la valeur du noir.
+    """
+    out = np.empty(data.shape, dtype=table.dtype) if out is None else out
+    top = len(table) - 1
+    scale = _scale(black, white) * top
+    # Index de type intp : np.take n'a alors ni conversion ni copie intermédiaire
+    index = np.empty(min(BLOCK_SIZE, data.size), dtype=np.intp)
+    flat_out = out.reshape(-1)
+    for start, block in zip(range(0, data.size, BLOCK_SIZE), _blocks(data)):
+        block -= black
+        block *= scale
+        np.fmax(block, 0, out=block)
+        np.fmin(block, top, out=block)
+        index_block = index[:block.size]
+        np.copyto(index_block, block, casting='unsafe')
+        np.take(table, index_block, out=flat_out[start:start + block.size], mode='clip')
+    return out
+
+def stretch_to_uint(data: np.ndarray, method: str = 'asinh', factor: float = 10.0,
+                    black_percentile: float = 0.5, white_percentile: float = 99.5,
+                    midtone: Optional[float] = None, shadows_clip: float = DEFAULT_SHADOWS_CLIP,
+                    target_background: float = DEFAULT_TARGET_BACKGROUND,
+                    dtype=np.uint16) -> np.ndarray:
+    """Étirement vers une sortie 8 ou 16 bits, mêmes paramètres que stretch.
+
+    data (float32) est modifiée : elle sert de tampon pendant la conversion.
+    """
+    black, white, curve = _plan(data, method, factor, black_percentile, white_percentile,
+                                midtone, shadows_clip, target_background)
+    return quantize(data, lookup_table(curve, dtype), black, white)
@@ -0,0 +1,163 @@
+# app/services/processing/tiling.py
+import math
+import logging
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import numpy as np
+from app.domain.models.workflow import ProcessingStepType
+from .steps import STEP_FUNCTIONS
+
+Region = Tuple[slice, ...]
+
+# Copies d'une tuile vivantes pendant son traitement : lecture, envoi au process,
+# temporaires du filtre et résultat
+TILE_MEMORY_FACTOR = 4
+
+def _gaussian_halo(sigma: float) -> int:
+    # scipy.ndimage tronque les noyaux gaussiens à 4 sigma
+    return int(math.ceil(4 * sigma))
+
+def _noise_reduction_halo(parameters: Dict[str, Any]) -> Optional[int]:
+    method = parameters.get('method', 'gaussian')
+    if method == 'median':
+        return int(parameters.get('size', 3)) // 2
+    if method == 'nl_means':
+        # Le seuil h dépend du bruit estimé sur toute l'image : non découpable
+        return None
+    return _gaussian_halo(float(parameters.get('sigma', 1.0)))
+
+def _deconvolution_halo(parameters: Dict[str, Any]) -> int:
+    # Chaque itération Richardson-Lucy convolue deux fois par la PSF
+    radius = max(1, int(3 * float(parameters.get('psf_sigma', 1.5))))
+    return 2 * radius * int(parameters.get('iterations', 10))
+
+# Étapes locales : halo (en pixels) nécessaire pour qu'une tuile donne le même
+# résultat que l'image entière. Les autres étapes dépendent de statistiques
+# globales (percentiles, médianes) et s'exécutent sur l'image complète.
+TILE_HALOS: Dict[ProcessingStepType, Callable[[Dict[str, Any]], Optional[int]]] = {
+    ProcessingStepType.NOISE_REDUCTION: _noise_reduction_halo,
+    ProcessingStepType.SHARPENING: lambda parameters: _gaussian_halo(float(parameters.get('radius', 2.0))),
+    ProcessingStepType.DECONVOLUTION: _deconvolution_halo
+}
+
+def step_halo(step_type: ProcessingStepType, parameters: Dict[str, Any]) -> Optional[int]:
+    """Halo d'une étape, None si elle ne peut pas s'exécuter par tuiles"""
+    halo = TILE_HALOS.get(step_type)
+    return halo(parameters) if halo else None
+
+@dataclass
+class Tile:
+    core: Region  # Zone écrite dans le résultat
+    read: Region  # Zone lue : le cœur et son halo, bornés à l'image
+    crop: Region  # Position du cœur dans la zone lue
+
+def tiles(shape: Tuple[int, ...], tile_size: int, halo: int) -> Iterator[Tile]:
+    """Découpe les deux derniers axes en tuiles, les axes de tête étant lus en entier"""
+    lead = tuple(slice(0, size) for size in shape[:-2])
+    height, width = shape[-2:]
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            bottom, right = min(top + tile_size, height), min(left + tile_size, width)
+            read_top, read_left = max(0, top - halo), max(0, left - halo)
+            read_bottom, read_right = min(height, bottom + halo), min(width, right + halo)
+            yield Tile(
+                core=lead + (slice(top, bottom), slice(left, right)),
+                read=lead + (slice(read_top, read_bottom), slice(read_left, read_right)),
+                crop=lead + (slice(top - read_top, bottom - read_top),
+                             slice(left - read_left, right - read_left))
+            )
+
+def tile_pool(workers: int, use_processes: bool = True) -> Executor:
+    """Pool de process pour les tuiles (les filtres scipy gardent le GIL).
+
+    Les process sont démarrés par spawn : le parent exécute déjà des threads
+    (branches du graphe, E/S des blocs), ce qui rend fork risqué. Un process
+    démon (pool multiprocessing classique) ne peut pas avoir d'enfants : les
+    tuiles passent alors par des threads.
+    """
+    if use_processes and not multiprocessing.current_process().daemon:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=workers)
+
+def _run_tile(step_type: str, parameters: Dict[str, Any], block: np.ndarray, crop: Region) -> np.ndarray:
+    """Traite une tuile dans un process du pool ; seul le cœur est renvoyé"""
+    function, _ = STEP_FUNCTIONS[ProcessingStepType(step_type)]
+    return np.asarray(function([block], parameters), dtype=np.float32)[crop]
+
+class TiledRunner:
+    """Exécute une étape locale tuile par tuile, sous un plafond mémoire.
+
+    Chaque tuile est lue avec un halo couvrant l'empreinte du noyau de l'étape :
+    au bord d'une tuile, le filtre voit les mêmes voisins que sur l'image
+    entière, et les cœurs se recollent sans couture. Les bords de l'image
+    restent traités par les conditions de bord du filtre, comme sans découpage.
+
+    La taille des tuiles et le nombre de tuiles en vol sont choisis pour que
+    leur empreinte totale reste sous memory_limit. Le pool (voir tile_pool) est
+    de préférence partagé entre étapes : le démarrage des process n'est payé
+    qu'une fois ; sans pool fourni, un pool temporaire est créé.
+    """
+
+    def __init__(self, memory_limit: int, tile_size: int = 2048, max_workers: int = 4,
+                 min_tile: int = 256, pool: Optional[Executor] = None):
+        self.memory_limit = memory_limit
+        self.tile_size = tile_size
+        self.max_workers = max_workers
+        self.min_tile = min_tile
+        self.pool = pool
+
+    def should_tile(self, shape: Tuple[int, ...]) -> bool:
+        return len(shape) >= 2 and shape[-2] * shape[-1] > self.tile_size ** 2
+
+    def plan(self, shape: Tuple[int, ...], halo: int, alignment: int) -> Tuple[int, int]:
+        """Taille de tuile (multiple de alignment si possible) et nombre de tuiles en vol"""
+        planes = int(np.prod(shape[:-2], dtype=np.int64)) if len(shape) > 2 else 1
+
+        def footprint(size: int) -> int:
+            return TILE_MEMORY_FACTOR * planes * (size + 2 * halo) ** 2 * np.dtype(np.float32).itemsize
+
+        tile_size = self.tile_size
+        while tile_size > self.min_tile and footprint(tile_size) > self.memory_limit:
+            tile_size //= 2
+        if tile_size >= alignment:
+            tile_size -= tile_size % alignment
+        if footprint(tile_size) > self.memory_limit:
+            logging.warning(
+                f"Tile of {tile_size}px with {halo}px halo exceeds the "
+                f"{self.memory_limit / 2**20:.0f} MiB processing memory limit"
+            )
+        in_flight = max(1, min(self.max_workers, self.memory_limit // footprint(tile_size)))
+        return tile_size, in_flight
+
+    def run(self, step_type: ProcessingStepType, parameters: Dict[str, Any], halo: int,
+            shape: Tuple[int, ...], read: Callable[[Region], np.ndarray],
+            write: Callable[[Region, np.ndarray], None], alignment: int = 1) -> int:
+        """Lit, traite et écrit toutes les tuiles ; retourne le nombre de tuiles"""
+        tile_size, in_flight = self.plan(shape, halo, alignment)
+        pending = tiles(shape, tile_size, halo)
+        count = 0
+        with nullcontext(self.pool) if self.pool is not None else tile_pool(in_flight) as pool:
+            running = {}
+
+            def submit_next() -> bool:
+                tile = next(pending, None)
+                if tile is None:
+                    return False
+                block = np.asarray(read(tile.read), dtype=np.float32)
+                running[pool.submit(_run_tile, step_type.value, parameters, block, tile.crop)] = tile
+                return True
+
+            # Au plus in_flight tuiles chargées à la fois : la mémoire reste bornée
+            while len(running) < in_flight and submit_next():
+                pass
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile = running.pop(future)
+                    write(tile.core, future.result())
+                    count += 1
+                    submit_next()
+        return count
@@ -1,5 +1,11 @@
+from app.core.config import settings
 from .service import StorageService
+from .manifest import StorageManifest
+from .local_cache import FitsDiskCache
+from .arrays import ChunkedArrayStore
 
-storage_service = StorageService()
+storage_service = StorageService(manifest=StorageManifest())
+fits_cache = FitsDiskCache(storage_service, settings.FITS_CACHE_DIR, settings.FITS_CACHE_MAX_BYTES)
+array_store = ChunkedArrayStore(storage_service.backend, default_chunk=settings.ARRAY_CHUNK_SIZE)
 
-__all__ = ['storage_service']
+__all__ = ['storage_service', 'fits_cache', 'array_store']
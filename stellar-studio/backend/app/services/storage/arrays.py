@@ -0,0 +1,311 @@
+# app/services/storage/arrays.py
+import io
+import json
+import zlib
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from .backends import ObjectNotFound, StorageBackend, StorageError
+
+ARRAY_PREFIX = "arrays"
+MANIFEST_NAME = "manifest.json"
+FORMAT_NAME = "stellar-chunked"
+FORMAT_VERSION = 1
+
+Region = Tuple[slice, ...]
+
+def _normalize_region(region: Optional[Sequence[slice]], shape: Tuple[int, ...]) -> Region:
+    """Région en slices explicites (start, stop), pas de 1, bornées à shape"""
+    region = tuple(region or ())
+    region += (slice(None),) * (len(shape) - len(region))
+    normalized = []
+    for sel, size in zip(region, shape):
+        if isinstance(sel, (int, np.integer)):
+            sel = slice(sel, sel + 1 if sel != -1 else None)
+        start, stop, step = sel.indices(size)
+        if step != 1:
+            raise ValueError("Chunked arrays only support contiguous regions")
+        normalized.append(slice(start, max(start, stop)))
+    return tuple(normalized)
+
+def _shuffle(raw: bytes, itemsize: int) -> bytes:
+    """Regroupe les octets de même rang : les octets de poids fort se compressent bien mieux"""
+    if itemsize == 1:
+        return raw
+    return np.frombuffer(raw, dtype=np.uint8).reshape(-1, itemsize).T.tobytes()
+
+def _unshuffle(raw: bytes, itemsize: int) -> bytes:
+    if itemsize == 1:
+        return raw
+    return np.frombuffer(raw, dtype=np.uint8).reshape(itemsize, -1).T.tobytes()
+
+class ChunkedArray:
+    """Tableau N-dimensionnel découpé en blocs compressés, un objet par bloc.
+
+    Le manifeste JSON décrit forme, type, taille des blocs, attributs et blocs
+    écrits ; un bloc jamais écrit vaut fill_value, un bloc écrit mais absent
+    du stockage est une erreur. Lire ou réécrire une région ne transfère que
+    les blocs qu'elle recoupe.
+    """
+
+    def __init__(self, backend: StorageBackend, name: str, manifest: Dict[str, Any], max_workers: int = 8):
+        self.backend = backend
+        self.name = name
+        self.manifest = manifest
+        self.shape = tuple(manifest["shape"])
+        self.chunks = tuple(manifest["chunks"])
+        # Stockage petit-boutiste, quel que soit l'hôte
+        self.dtype = np.dtype(manifest["dtype"]).newbyteorder("<")
+        self.fill_value = manifest.get("fill_value", 0)
+        self.max_workers = max_workers
+        # Blocs écrits par cette instance, consignés dans le manifeste au commit
+        self._written = set()
+        self._lock = threading.Lock()
+
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        return self.manifest.get("attrs", {})
+
+    @staticmethod
+    def chunk_id(index: Tuple[int, ...]) -> str:
+        return '.'.join(str(i) for i in index)
+
+    def chunk_key(self, index: Tuple[int, ...]) -> str:
+        return f"{ARRAY_PREFIX}/{self.name}/c/{self.chunk_id(index)}"
+
+    @property
+    def chunk_count(self) -> int:
+        return int(np.prod([-(-size // c) for size, c in zip(self.shape, self.chunks)], dtype=np.int64))
+
+    def is_written(self, index: Tuple[int, ...]) -> bool:
+        """Vrai si le manifeste garantit l'existence du bloc (manifestes anciens : jamais)"""
+        written = self.manifest.get("written")
+        if written == "all":
+            return True
+        return written is not None and self.chunk_id(index) in written
+
+    def written_chunks(self) -> Any:
+        """Blocs écrits à consigner dans le manifeste : "all" ou leurs identifiants"""
+        with self._lock:
+            written = set(self._written)
+        previous = self.manifest.get("written")
+        if previous == "all":
+            return "all"
+        written.update(previous or ())
+        return "all" if len(written) == self.chunk_count else sorted(written)
+
+    def chunk_region(self, index: Tuple[int, ...]) -> Region:
+        return tuple(
+            slice(i * c, min((i + 1) * c, size))
+            for i, c, size in zip(index, self.chunks, self.shape)
+        )
+
+    def chunk_indices(self, region: Optional[Sequence[slice]] = None) -> Iterator[Tuple[int, ...]]:
+        """Blocs recoupant une région (tout le tableau par défaut)"""
+        region = _normalize_region(region, self.shape)
+        ranges = [
+            range(sel.start // c, -(-sel.stop // c)) if sel.stop > sel.start else range(0)
+            for sel, c in zip(region, self.chunks)
+        ]
+        return itertools.product(*ranges)
+
+    def _decode(self, payload: bytes, shape: Tuple[int, ...]) -> np.ndarray:
+        raw = payload
+        if self.manifest.get("compression") == "zlib":
+            raw = zlib.decompress(raw)
+        if self.manifest.get("shuffle"):
+            raw = _unshuffle(raw, self.dtype.itemsize)
+        return np.frombuffer(raw, dtype=self.dtype).reshape(shape)
+
+    def _encode(self, block: np.ndarray) -> bytes:
+        raw = np.ascontiguousarray(block, dtype=self.dtype).tobytes()
+        if self.manifest.get("shuffle"):
+            raw = _shuffle(raw, self.dtype.itemsize)
+        if self.manifest.get("compression") == "zlib":
+            raw = zlib.compress(raw, self.manifest.get("compression_level", 1))
+        return raw
+
+    def read_chunk(self, index: Tuple[int, ...]) -> np.ndarray:
+        region = self.chunk_region(index)
+        shape = tuple(sel.stop - sel.start for sel in region)
+        try:
+            payload = self._read_object(self.chunk_key(index))
+        except ObjectNotFound:
+            if self.is_written(index):
+                # Bloc perdu (nettoyage partiel, écriture interrompue) : pas de fill_value silencieux
+                raise ObjectNotFound(f"Chunk {self.chunk_id(index)} of array {self.name} is missing")
+            return np.full(shape, self.fill_value, dtype=self.dtype)
+        return self._decode(payload, shape)
+
+    def _read_object(self, key: str) -> bytes:
+        with self.backend.open(key) as reader:
+            return reader.read()
+
+    def write_chunk(self, index: Tuple[int, ...], block: np.ndarray) -> None:
+        payload = self._encode(block)
+        self.backend.put_stream(self.chunk_key(index), io.BytesIO(payload), length=len(payload))
+        with self._lock:
+            self._written.add(self.chunk_id(index))
+
+    def _map(self, function, items: List) -> List:
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        # Les blocs sont indépendants : les requêtes partent en parallèle
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(function, items))
+
+    def read(self, region: Optional[Sequence[slice]] = None) -> np.ndarray:
+        """Lit une région (slices contiguës), en ne récupérant que les blocs concernés"""
+        region = _normalize_region(region, self.shape)
+        output = np.empty(tuple(sel.stop - sel.start for sel in region), dtype=self.dtype.newbyteorder("="))
+        indices = list(self.chunk_indices(region))
+
+        def load(index):
+            chunk_region = self.chunk_region(index)
+            block = self.read_chunk(index)
+            source, target = [], []
+            for sel, chunk_sel in zip(region, chunk_region):
+                start, stop = max(sel.start, chunk_sel.start), min(sel.stop, chunk_sel.stop)
+                source.append(slice(start - chunk_sel.start, stop - chunk_sel.start))
+                target.append(slice(start - sel.start, stop - sel.start))
+            output[tuple(target)] = block[tuple(source)]
+
+        self._map(load, indices)
+        return output
+
+    def __getitem__(self, region) -> np.ndarray:
+        region = region if isinstance(region, tuple) else (region,)
+        data = self.read(region)
+        # Un index entier retire l'axe, comme avec numpy
+        squeezed = tuple(0 if isinstance(sel, (int, np.integer)) else slice(None) for sel in region)
+        return data[squeezed]
+
+    def write(self, region: Optional[Sequence[slice]], data: np.ndarray) -> None:
+        """Réécrit une région ; seuls les blocs partiellement couverts sont relus"""
+        region = _normalize_region(region, self.shape)
+        data = np.broadcast_to(data, tuple(sel.stop - sel.start for sel in region))
+
+        def store(index):
+            chunk_region = self.chunk_region(index)
+            source, target = [], []
+            full = True
+            for sel, chunk_sel in zip(region, chunk_region):
+                start, stop = max(sel.start, chunk_sel.start), min(sel.stop, chunk_sel.stop)
+                full = full and start == chunk_sel.start and stop == chunk_sel.stop
+                source.append(slice(start - sel.start, stop - sel.start))
+                target.append(slice(start - chunk_sel.start, stop - chunk_sel.start))
+            if full:
+                block = data[tuple(source)]
+            else:
+                block = np.array(self.read_chunk(index))
+                block[tuple(target)] = data[tuple(source)]
+            self.write_chunk(index, block)
+
+        self._map(store, list(self.chunk_indices(region)))
+
+    def __setitem__(self, region, data) -> None:
+        self.write(region if isinstance(region, tuple) else (region,), data)
+
+class ChunkedArrayStore:
+    """Stockage des intermédiaires de traitement en tableaux découpés en blocs"""
+
+    def __init__(self, backend: StorageBackend, default_chunk: int = 512,
+                 compression: str = "zlib", compression_level: int = 1):
+        self.backend = backend
+        self.default_chunk = default_chunk
+        self.compression = compression
+        self.compression_level = compression_level
+
+    def manifest_key(self, name: str) -> str:
+        return f"{ARRAY_PREFIX}/{name}/{MANIFEST_NAME}"
+
+    def default_chunks(self, shape: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Blocs carrés sur les deux derniers axes (image), un plan par bloc sur les autres (canaux)"""
+        return tuple(
+            min(size, self.default_chunk) if axis >= len(shape) - 2 else 1
+            for axis, size in enumerate(shape)
+        )
+
+    def create(self, name: str, shape: Sequence[int], dtype, chunks: Optional[Sequence[int]] = None,
+               fill_value: Any = 0, attrs: Optional[Dict[str, Any]] = None,
+               deferred: bool = False) -> ChunkedArray:
+        """Crée un tableau vide : seul le manifeste est écrit, les blocs le seront à la demande.
+
+        Avec deferred, le manifeste n'est écrit que par commit : tant que les
+        blocs ne sont pas tous écrits, open ne voit pas le tableau.
+        """
+        shape = tuple(int(size) for size in shape)
+        manifest = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "shape": list(shape),
+            "dtype": np.dtype(dtype).newbyteorder("<").str,
+            "chunks": list(chunks or self.default_chunks(shape)),
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "shuffle": np.dtype(dtype).itemsize > 1,
+            "fill_value": fill_value.item() if isinstance(fill_value, np.generic) else fill_value,
+            "attrs": attrs or {}
+        }
+        array = ChunkedArray(self.backend, name, manifest)
+        if not deferred:
+            self.commit(array)
+        return array
+
+    def commit(self, array: ChunkedArray) -> None:
+        """Écrit le manifeste, qui rend le tableau visible et liste les blocs écrits"""
+        array.manifest["written"] = array.written_chunks()
+        payload = json.dumps(array.manifest).encode()
+        self.backend.put_stream(self.manifest_key(array.name), io.BytesIO(payload), length=len(payload),
+                                content_type="application/json")
+
+    def save(self, name: str, data: np.ndarray, chunks: Optional[Sequence[int]] = None,
+             attrs: Optional[Dict[str, Any]] = None) -> ChunkedArray:
+        """Enregistre un tableau complet ; le manifeste est écrit après les blocs"""
+        array = self.create(name, data.shape, data.dtype, chunks=chunks, attrs=attrs, deferred=True)
+        array.write(None, data)
+        self.commit(array)
+        return array
+
+    def open(self, name: str) -> Optional[ChunkedArray]:
+        """Ouvre un tableau existant, None s'il n'existe pas"""
+        try:
+            with self.backend.open(self.manifest_key(name)) as reader:
+                manifest = json.loads(reader.read())
+        except ObjectNotFound:
+            return None
+        if manifest.get("format") != FORMAT_NAME:
+            logging.error(f"Unknown array format for {name}: {manifest.get('format')}")
+            return None
+        return ChunkedArray(self.backend, name, manifest)
+
+    def touch(self, name: str, min_age: int) -> None:
+        """Réécrit le manifeste s'il date de plus de min_age secondes.
+
+        Sa date est celle que juge le GC : un tableau réutilisé n'est pas balayé.
+        """
+        key = self.manifest_key(name)
+        try:
+            info = self.backend.stat(key)
+            if info is None or info.last_modified is None:
+                return
+            last_modified = info.last_modified
+            if last_modified.tzinfo is None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) - last_modified < timedelta(seconds=min_age):
+                return
+            with self.backend.open(key) as reader:
+                payload = reader.read()
+            self.backend.put_stream(key, io.BytesIO(payload), length=len(payload),
+                                    content_type="application/json")
+        except StorageError as e:
+            logging.warning(f"Could not refresh array {name}: {str(e)}")
+
+    def delete(self, name: str) -> Dict[str, str]:
+        """Supprime le manifeste et tous les blocs d'un tableau, retourne les échecs"""
+        keys = [info.name for info in self.backend.list(f"{ARRAY_PREFIX}/{name}/")]
+        return self.backend.remove_many(keys) if keys else {}
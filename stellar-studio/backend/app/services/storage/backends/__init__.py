@@ -0,0 +1,27 @@
+# app/services/storage/backends/__init__.py
+import os
+from app.core.config import settings
+from .base import ObjectInfo, ObjectNotFound, ObjectReader, StorageBackend, StorageError
+from .filesystem import FilesystemBackend
+from .memory import MemoryBackend
+
+def create_backend(name: str = None) -> StorageBackend:
+    """Backend de stockage configuré pour ce déploiement (STORAGE_BACKEND)"""
+    name = name or settings.STORAGE_BACKEND
+    if name == "filesystem":
+        return FilesystemBackend(settings.STORAGE_ROOT)
+    if name == "memory":
+        return MemoryBackend()
+    if name != "minio":
+        raise ValueError(f"Unknown storage backend: {name}")
+
+    from app.services.minio_service import get_minio_client, get_signing_client
+    from .minio_backend import MinioBackend
+    # Utiliser la variable d'environnement pour le nom du bucket
+    bucket = os.getenv('MINIO_BUCKET_NAME', 'fits-files')
+    return MinioBackend(get_minio_client(), bucket, get_signing_client())
+
+__all__ = [
+    'create_backend', 'StorageBackend', 'ObjectInfo', 'ObjectReader',
+    'StorageError', 'ObjectNotFound', 'FilesystemBackend', 'MemoryBackend'
+]
@@ -0,0 +1,146 @@
+# app/services/storage/backends/base.py
+import io
+import uuid
+import hashlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+class StorageError(Exception):
+    """Erreur d'un backend de stockage, quel qu'il soit"""
+
+class ObjectNotFound(StorageError):
+    """L'objet demandé n'existe pas"""
+
+@dataclass
+class ObjectInfo:
+    """Description d'un objet stocké, indépendante du backend"""
+    name: str
+    size: int
+    etag: str
+    last_modified: Optional[datetime] = None
+    content_type: Optional[str] = None
+    # Métadonnées utilisateur, sans préfixe propre au backend (x-amz-meta-...)
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+class ObjectReader(ABC):
+    """Flux de lecture d'un objet (ou d'une plage d'octets)"""
+
+    @abstractmethod
+    def read(self, size: int = -1) -> bytes:
+        ...
+
+    def stream(self, chunk_size: int) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class StorageBackend(ABC):
+    """Interface commune des backends : MinIO, système de fichiers local, mémoire.
+
+    Les clés sont des chemins relatifs au bucket (ou à la racine du backend).
+    Les erreurs sont levées en StorageError, ObjectNotFound pour un objet absent.
+    """
+
+    name = "abstract"
+    # L'upload de parts en parallèle accélère-t-il l'écriture d'un gros fichier ?
+    parallel_uploads = False
+
+    @abstractmethod
+    def ensure_bucket(self) -> None:
+        """Prépare l'espace de stockage (bucket, répertoire racine)"""
+
+    @abstractmethod
+    def put_stream(self, object_name: str, stream: BinaryIO, length: int = -1,
+                   content_type: Optional[str] = None,
+                   metadata: Optional[Dict[str, str]] = None) -> None:
+        """Écrit un flux, de taille inconnue si length vaut -1"""
+
+    @abstractmethod
+    def put_file(self, object_name: str, file_path: str, content_type: Optional[str] = None) -> None:
+        """Écrit le contenu d'un fichier local"""
+
+    @abstractmethod
+    def stat(self, object_name: str) -> Optional[ObjectInfo]:
+        """Décrit un objet, None s'il n'existe pas"""
+
+    @abstractmethod
+    def open(self, object_name: str, offset: int = 0, length: Optional[int] = None) -> ObjectReader:
+        """Ouvre [offset, offset + length) d'un objet en lecture"""
+
+    def read_range(self, object_name: str, offset: int, length: int) -> bytes:
+        """Octets [offset, offset + length) d'un objet"""
+        with self.open(object_name, offset, length) as reader:
+            return reader.read()
+
+    @abstractmethod
+    def compose(self, object_name: str, sources: List[str], content_type: Optional[str] = None) -> None:
+        """Concatène des objets existants en un nouvel objet"""
+
+    # Upload multipart. Par défaut, chaque part est un objet temporaire et la
+    # finalisation les assemble avec compose ; MinIO utilise l'API S3 native.
+
+    def _multipart_prefix(self, object_name: str, upload_id: str) -> str:
+        return f"{object_name}.parts/{upload_id}/"
+
+    def create_multipart(self, object_name: str, content_type: Optional[str] = None) -> str:
+        """Ouvre un upload multipart, retourne son identifiant"""
+        return uuid.uuid4().hex
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """Envoie une part (numérotée à partir de 1), retourne son ETag"""
+        part_name = f"{self._multipart_prefix(object_name, upload_id)}{part_number:05d}"
+        self.put_stream(part_name, io.BytesIO(data), length=len(data))
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart(self, object_name: str, upload_id: str, parts: List[Tuple[int, str]],
+                           content_type: Optional[str] = None) -> None:
+        """Assemble les parts (numéro, ETag) dans l'ordre en un objet final"""
+        prefix = self._multipart_prefix(object_name, upload_id)
+        names = [f"{prefix}{number:05d}" for number, _ in sorted(parts)]
+        self.compose(object_name, names, content_type=content_type)
+        self.remove_many(names)
+
+    def abort_multipart(self, object_name: str, upload_id: str) -> None:
+        """Abandonne un upload et libère ses parts"""
+        prefix = self._multipart_prefix(object_name, upload_id)
+        self.remove_many([info.name for info in self.list(prefix)])
+
+    @abstractmethod
+    def remove(self, object_name: str) -> None:
+        """Supprime un objet (sans erreur s'il n'existe pas)"""
+
+    def remove_many(self, object_names: List[str]) -> Dict[str, str]:
+        """Supprime plusieurs objets, retourne les échecs (clé -> raison)"""
+        errors = {}
+        for object_name in object_names:
+            try:
+                self.remove(object_name)
+            except StorageError as e:
+                errors[object_name] = str(e)
+        return errors
+
+    @abstractmethod
+    def list(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[ObjectInfo]:
+        """Parcourt récursivement les objets sous prefix, dans l'ordre des clés"""
+
+    def presigned_url(self, object_name: str, expires: timedelta,
+                      response_headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """URL de téléchargement direct, None si le backend ne sait pas en produire"""
+        return None
+
+    def local_path(self, object_name: str) -> Optional[str]:
+        """Chemin local de l'objet si le backend en a un (lecture sans copie)"""
+        return None
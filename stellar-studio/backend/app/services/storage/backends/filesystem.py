@@ -0,0 +1,193 @@
+# app/services/storage/backends/filesystem.py
+import os
+import json
+import mmap
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from .base import ObjectInfo, ObjectNotFound, ObjectReader, StorageBackend, StorageError
+
+META_DIR = ".meta"
+TMP_DIR = ".tmp"
+COPY_CHUNK = 16 * 1024 * 1024
+
+def _sendfile(source_fd: int, target_fd: int, count: int) -> None:
+    """Copie noyau à noyau (sans passer par l'espace utilisateur) quand la plateforme le permet"""
+    offset = 0
+    try:
+        while offset < count:
+            sent = os.sendfile(target_fd, source_fd, offset, count - offset)
+            if sent == 0:
+                break
+            offset += sent
+    except (AttributeError, OSError):
+        # sendfile fichier vers fichier n'existe pas partout (macOS) : copie classique
+        os.lseek(source_fd, offset, os.SEEK_SET)
+        with os.fdopen(os.dup(source_fd), "rb") as source, os.fdopen(os.dup(target_fd), "ab") as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK)
+
+class MmapReader(ObjectReader):
+    """Lecture d'un fichier par projection mémoire : pas d'appel système par lecture"""
+
+    def __init__(self, path: str, offset: int, length: Optional[int]):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.position = min(offset, size)
+        self.end = size if length is None else min(size, offset + length)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.map is None or self.position >= self.end:
+            return b""
+        stop = self.end if size < 0 else min(self.end, self.position + size)
+        data = self.map[self.position:stop]
+        self.position = stop
+        return data
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+class FilesystemBackend(StorageBackend):
+    """Objets stockés en fichiers sous une racine locale.
+
+    Les métadonnées (type de contenu, métadonnées utilisateur) vivent dans un
+    fichier JSON à côté, sous .meta/. Les écritures passent par un fichier
+    temporaire renommé atomiquement ; copies et assemblages utilisent sendfile.
+    """
+
+    name = "filesystem"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._root_ready = False
+
+    def ensure_bucket(self) -> None:
+        os.makedirs(os.path.join(self.root, TMP_DIR), exist_ok=True)
+        os.makedirs(os.path.join(self.root, META_DIR), exist_ok=True)
+        self._root_ready = True
+
+    def _path(self, object_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, object_name))
+        if not path.startswith(self.root + os.sep) or object_name.split("/")[0] in (META_DIR, TMP_DIR):
+            raise StorageError(f"Invalid object name {object_name}")
+        return path
+
+    def _meta_path(self, object_name: str) -> str:
+        return os.path.join(self.root, META_DIR, f"{object_name}.json")
+
+    def _write(self, object_name: str, fill, content_type: Optional[str],
+               metadata: Optional[Dict[str, str]]) -> None:
+        """Écrit un objet via fill(fd) dans un fichier temporaire, puis le publie"""
+        path = self._path(object_name)
+        if not self._root_ready:
+            self.ensure_bucket()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, TMP_DIR))
+        try:
+            fill(fd)
+            os.close(fd)
+            fd = None
+            meta_path = self._meta_path(object_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            with open(meta_path, "w") as meta:
+                json.dump({"content_type": content_type, "metadata": metadata or {}}, meta)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            raise StorageError(f"Error writing {object_name}: {str(e)}")
+        finally:
+            if fd is not None:
+                os.close(fd)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_stream(self, object_name: str, stream: BinaryIO, length: int = -1,
+                   content_type: Optional[str] = None,
+                   metadata: Optional[Dict[str, str]] = None) -> None:
+        def fill(fd):
+            remaining = length
+            with os.fdopen(os.dup(fd), "wb") as target:
+                while remaining != 0:
+                    chunk = stream.read(COPY_CHUNK if remaining < 0 else min(COPY_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    if remaining > 0:
+                        remaining -= len(chunk)
+        self._write(object_name, fill, content_type, metadata)
+
+    def put_file(self, object_name: str, file_path: str, content_type: Optional[str] = None) -> None:
+        def fill(fd):
+            with open(file_path, "rb") as source:
+                _sendfile(source.fileno(), fd, os.fstat(source.fileno()).st_size)
+        self._write(object_name, fill, content_type, None)
+
+    def stat(self, object_name: str) -> Optional[ObjectInfo]:
+        try:
+            st = os.stat(self._path(object_name))
+        except FileNotFoundError:
+            return None
+        try:
+            with open(self._meta_path(object_name)) as meta:
+                extra = json.load(meta)
+        except (FileNotFoundError, ValueError):
+            extra = {}
+        return ObjectInfo(
+            name=object_name,
+            size=st.st_size,
+            # Change à chaque réécriture, sans relire le contenu
+            etag=f"{st.st_mtime_ns:x}-{st.st_size:x}",
+            last_modified=datetime.fromtimestamp(st.st_mtime, timezone.utc),
+            content_type=extra.get("content_type") or "application/octet-stream",
+            metadata=extra.get("metadata", {})
+        )
+
+    def open(self, object_name: str, offset: int = 0, length: Optional[int] = None) -> ObjectReader:
+        try:
+            return MmapReader(self._path(object_name), offset, length)
+        except FileNotFoundError:
+            raise ObjectNotFound(object_name)
+
+    def compose(self, object_name: str, sources: List[str], content_type: Optional[str] = None) -> None:
+        if content_type is None and sources:
+            info = self.stat(sources[0])
+            content_type = info.content_type if info else None
+
+        def fill(fd):
+            for source in sources:
+                try:
+                    with open(self._path(source), "rb") as part:
+                        _sendfile(part.fileno(), fd, os.fstat(part.fileno()).st_size)
+                except FileNotFoundError:
+                    raise ObjectNotFound(source)
+        self._write(object_name, fill, content_type, None)
+
+    def remove(self, object_name: str) -> None:
+        for path in (self._path(object_name), self._meta_path(object_name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                raise StorageError(f"Error removing {object_name}: {str(e)}")
+
+    def list(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[ObjectInfo]:
+        base = os.path.normpath(os.path.join(self.root, os.path.dirname(prefix)))
+        names = []
+        for directory, subdirs, files in os.walk(base):
+            if directory == self.root:
+                subdirs[:] = [d for d in subdirs if d not in (META_DIR, TMP_DIR)]
+            for filename in files:
+                object_name = os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, "/")
+                if object_name.startswith(prefix) and (start_after is None or object_name > start_after):
+                    names.append(object_name)
+        for object_name in sorted(names):
+            info = self.stat(object_name)
+            if info is not None:
+                yield info
+
+    def local_path(self, object_name: str) -> Optional[str]:
+        path = self._path(object_name)
+        return path if os.path.exists(path) else None
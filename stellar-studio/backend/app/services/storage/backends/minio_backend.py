@@ -0,0 +1,204 @@
+# app/services/storage/backends/minio_backend.py
+import io
+import logging
+import threading
+from datetime import timedelta
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from minio import Minio
+from minio.commonconfig import ComposeSource
+from minio.datatypes import Part
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+from app.core.config import settings
+from .base import ObjectInfo, ObjectNotFound, ObjectReader, StorageBackend, StorageError
+
+USER_META_PREFIX = "x-amz-meta-"
+
+class MinioReader(ObjectReader):
+    def __init__(self, response):
+        self.response = response
+
+    def read(self, size: int = -1) -> bytes:
+        return self.response.read(None if size < 0 else size)
+
+    def stream(self, chunk_size: int) -> Iterator[bytes]:
+        return self.response.stream(chunk_size)
+
+    def close(self) -> None:
+        self.response.close()
+        self.response.release_conn()
+
+def _info(object_name: str, stat) -> ObjectInfo:
+    metadata = {
+        key[len(USER_META_PREFIX):].lower(): value
+        for key, value in (stat.metadata or {}).items()
+        if key.lower().startswith(USER_META_PREFIX)
+    }
+    return ObjectInfo(
+        name=object_name,
+        size=stat.size,
+        etag=stat.etag,
+        last_modified=stat.last_modified,
+        content_type=stat.content_type,
+        metadata=metadata
+    )
+
+class MinioBackend(StorageBackend):
+    """Objets stockés dans un bucket MinIO (ou tout stockage compatible S3)"""
+
+    name = "minio"
+    parallel_uploads = True
+
+    def __init__(self, client: Minio, bucket: str, public_client: Optional[Minio] = None):
+        self.client = client
+        self.bucket = bucket
+        # Client de signature : les URLs présignées doivent viser l'adresse publique
+        self.public_client = public_client or client
+        self._bucket_verified = False
+        self._bucket_lock = threading.Lock()
+
+    def ensure_bucket(self) -> None:
+        try:
+            if not self.client.bucket_exists(self.bucket):
+                self.client.make_bucket(self.bucket)
+                logging.info(f"Bucket '{self.bucket}' created")
+            self._bucket_verified = True
+        except S3Error as e:
+            raise StorageError(f"Error ensuring bucket exists: {str(e)}")
+
+    def _bucket_ready(self) -> None:
+        """Vérifie le bucket une seule fois, avant la première écriture"""
+        if self._bucket_verified:
+            return
+        with self._bucket_lock:
+            if not self._bucket_verified:
+                self.ensure_bucket()
+
+    def put_stream(self, object_name: str, stream: BinaryIO, length: int = -1,
+                   content_type: Optional[str] = None,
+                   metadata: Optional[Dict[str, str]] = None) -> None:
+        self._bucket_ready()
+        try:
+            # Taille inconnue : MinIO lit le flux part par part, la mémoire reste bornée à une part
+            self.client.put_object(
+                self.bucket,
+                object_name,
+                stream,
+                length=length,
+                part_size=settings.STORAGE_PART_SIZE if length < 0 else 0,
+                content_type=content_type or "application/octet-stream",
+                metadata=metadata
+            )
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def put_file(self, object_name: str, file_path: str, content_type: Optional[str] = None) -> None:
+        self._bucket_ready()
+        try:
+            self.client.fput_object(
+                self.bucket,
+                object_name,
+                file_path,
+                content_type=content_type or "application/octet-stream"
+            )
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def stat(self, object_name: str) -> Optional[ObjectInfo]:
+        try:
+            return _info(object_name, self.client.stat_object(self.bucket, object_name))
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise StorageError(str(e))
+
+    def open(self, object_name: str, offset: int = 0, length: Optional[int] = None) -> ObjectReader:
+        try:
+            return MinioReader(self.client.get_object(self.bucket, object_name, offset=offset, length=length or 0))
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise ObjectNotFound(object_name)
+            raise StorageError(str(e))
+
+    def compose(self, object_name: str, sources: List[str], content_type: Optional[str] = None) -> None:
+        try:
+            # compose_object gère aussi les copies de plus de 5 GiB
+            self.client.compose_object(
+                self.bucket,
+                object_name,
+                [ComposeSource(self.bucket, source) for source in sources],
+                metadata={"Content-Type": content_type} if content_type else None
+            )
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    # Multipart S3 natif : les parts sont assemblées sans copie côté serveur.
+    # Le SDK n'expose ces appels qu'en privé, mais put_object les utilise lui-même.
+
+    def create_multipart(self, object_name: str, content_type: Optional[str] = None) -> str:
+        self._bucket_ready()
+        try:
+            return self.client._create_multipart_upload(
+                self.bucket, object_name, {"Content-Type": content_type or "application/octet-stream"}
+            )
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        try:
+            return self.client._upload_part(self.bucket, object_name, data, None, upload_id, part_number)
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def complete_multipart(self, object_name: str, upload_id: str, parts: List[Tuple[int, str]],
+                           content_type: Optional[str] = None) -> None:
+        try:
+            self.client._complete_multipart_upload(
+                self.bucket, object_name, upload_id,
+                [Part(number, etag) for number, etag in sorted(parts)]
+            )
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def abort_multipart(self, object_name: str, upload_id: str) -> None:
+        try:
+            self.client._abort_multipart_upload(self.bucket, object_name, upload_id)
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def remove(self, object_name: str) -> None:
+        try:
+            self.client.remove_object(self.bucket, object_name)
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def remove_many(self, object_names: List[str]) -> Dict[str, str]:
+        # Suppression groupée (1000 clés par requête) ; remove_objects est paresseux :
+        # il faut consommer les erreurs pour lancer la suppression
+        try:
+            errors = self.client.remove_objects(self.bucket, [DeleteObject(name) for name in object_names])
+            return {error.name: error.message or error.code for error in errors}
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def list(self, prefix: str = "", start_after: Optional[str] = None) -> Iterator[ObjectInfo]:
+        try:
+            for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True,
+                                                start_after=start_after):
+                yield ObjectInfo(
+                    name=obj.object_name,
+                    size=obj.size,
+                    etag=obj.etag,
+                    last_modified=obj.last_modified
+                )
+        except S3Error as e:
+            raise StorageError(str(e))
+
+    def presigned_url(self, object_name: str, expires: timedelta,
+                      response_headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        return self.public_client.presigned_get_object(
+            self.bucket,
+            object_name,
+            expires=expires,
+            response_headers=response_headers
+        )
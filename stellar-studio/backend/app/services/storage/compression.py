@@ -0,0 +1,61 @@
+# app/services/storage/compression.py
+from typing import Optional
+import numpy as np
+from astropy.io import fits
+
+# Modes de compression des données flottantes
+FLOAT_QUANTIZED = "quantized"  # RICE_1 après quantification (avec perte, contrôlée par quantize_level)
+FLOAT_LOSSLESS = "lossless"  # GZIP_2 sans quantification
+MOVED_PRIMARY_KEYWORD = "ZPRIMARY"
+
+def compression_options(data: np.ndarray, float_mode: str, quantize_level: float) -> dict:
+    """Paramètres CompImageHDU adaptés au type des données"""
+    if np.issubdtype(data.dtype, np.integer):
+        return {'compression_type': 'RICE_1'}
+    if float_mode == FLOAT_LOSSLESS:
+        return {'compression_type': 'GZIP_2', 'quantize_level': 0.0}
+    # SUBTRACTIVE_DITHER_2 préserve les zéros exacts (zones hors champ des mosaïques)
+    return {
+        'compression_type': 'RICE_1',
+        'quantize_level': quantize_level,
+        'quantize_method': 2
+    }
+
+def compress_hdul(hdul: fits.HDUList, float_mode: str = FLOAT_QUANTIZED,
+                  quantize_level: float = 16.0) -> Optional[fits.HDUList]:
+    """Version compressée par tuiles d'un HDUList, None s'il n'y a rien à compresser"""
+    output = fits.HDUList()
+    compressed = False
+    for index, hdu in enumerate(hdul):
+        if isinstance(hdu, fits.CompImageHDU):
+            return None
+        is_image = isinstance(hdu, (fits.PrimaryHDU, fits.ImageHDU))
+        if not is_image or hdu.data is None or hdu.data.ndim < 2:
+            output.append(hdu.copy() if index else fits.PrimaryHDU(header=hdu.header))
+            continue
+
+        if index == 0:
+            # Une image compressée ne peut pas être primaire : elle passe en extension
+            primary = fits.PrimaryHDU()
+            primary.header[MOVED_PRIMARY_KEYWORD] = (True, 'Primary image stored in HDU 1')
+            output.append(primary)
+        output.append(fits.CompImageHDU(
+            data=hdu.data,
+            header=hdu.header,
+            **compression_options(hdu.data, float_mode, quantize_level)
+        ))
+        compressed = True
+    return output if compressed else None
+
+def decompressed(hdul: fits.HDUList) -> fits.HDUList:
+    """Remet une image primaire compressée à sa place, pour que l'appelant ne voie pas la différence.
+
+    Les extensions compressées sont déjà décompressées à la volée par astropy.
+    La liste est modifiée en place : la refermer libère toujours le fichier
+    (et la projection mémoire) d'origine.
+    """
+    if len(hdul) > 1 and hdul[0].header.get(MOVED_PRIMARY_KEYWORD):
+        image = hdul[1]
+        hdul[0] = fits.PrimaryHDU(data=image.data, header=image.header)
+        del hdul[1]
+    return hdul
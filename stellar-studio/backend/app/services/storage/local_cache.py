@@ -0,0 +1,102 @@
+# app/services/storage/local_cache.py
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Optional
+from astropy.io import fits
+from app.core.monitoring import FITS_CACHE_REQUESTS, FITS_CACHE_BYTES_SAVED, FITS_CACHE_EVICTIONS
+from .compression import decompressed
+
+class FitsDiskCache:
+    """Cache disque LRU des FITS, local à un worker et borné en taille.
+
+    Les entrées sont indexées par (clé de contenu, ETag) : un objet modifié
+    n'est jamais servi périmé. Les fichiers sont ouverts avec memmap=True, seules
+    les pages réellement lues sont chargées. L'ordre LRU repose sur la date de
+    modification, rafraîchie à chaque accès ; les écritures passent par un
+    renommage atomique, ce qui rend le cache sûr entre process prefork.
+    """
+
+    def __init__(self, storage, directory: str, max_bytes: int):
+        self.storage = storage
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, content_name: str, etag: str) -> str:
+        key = hashlib.sha256(f"{content_name}:{etag}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.fits")
+
+    def get_path(self, object_name: str) -> Optional[str]:
+        """Chemin local d'un fichier stocké, téléchargé seulement s'il n'est pas en cache"""
+        info = self.storage.stat_fits_file(object_name)
+        if info is None:
+            return None
+        # Backend local : le fichier est déjà sur disque, inutile de le copier
+        local_path = self.storage.backend.local_path(info["content_name"])
+        if local_path is not None:
+            return local_path
+        path = self._path(info["content_name"], info["etag"])
+
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+                FITS_CACHE_REQUESTS.labels(result="hit").inc()
+                FITS_CACHE_BYTES_SAVED.inc(info["size"])
+                return path
+            except FileNotFoundError:
+                # Évincé par un autre process entre les deux appels
+                pass
+
+        FITS_CACHE_REQUESTS.labels(result="miss").inc()
+        self._make_room(info["size"])
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                for chunk in self.storage.iter_fits_range(info["content_name"], 0, info["size"]):
+                    output.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Error caching {object_name} locally: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        return path
+
+    def open(self, object_name: str) -> fits.HDUList:
+        """Ouvre un fichier stocké depuis le cache local, en mémoire mappée.
+
+        Lève FileNotFoundError si l'objet n'existe pas ou n'a pas pu être mis en cache.
+        """
+        path = self.get_path(object_name)
+        if path is None:
+            raise FileNotFoundError(f"Input file {object_name} not found")
+        return decompressed(fits.open(path, memmap=True))
+
+    def _make_room(self, incoming: int) -> None:
+        """Évince les entrées les moins récemment utilisées pour accueillir incoming octets"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith(".fits"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total + incoming <= self.max_bytes:
+                break
+            try:
+                # Un process qui a encore le fichier ouvert (memmap) garde son inode
+                os.remove(path)
+                FITS_CACHE_EVICTIONS.inc()
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,114 @@
+# app/services/storage/manifest.py
+import re
+import uuid
+import logging
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import func
+from app.db.session import SessionLocal
+from app.infrastructure.repositories.models.stored_file import StoredFile
+
+# Suffixe de produit MAST : jw02739-o001_t001_nircam_clear-f444w_i2d.fits -> i2d
+PRODUCT_TYPE_PATTERN = re.compile(r"_([a-z0-9]+)\.fits(?:\.gz)?$", re.IGNORECASE)
+
+def normalize_target(name: str) -> str:
+    """Forme canonique d'un nom de cible : « M 16 » et « m 16 » désignent la même"""
+    return " ".join(name.split()).lower()
+
+def describe_key(object_key: str) -> Optional[Dict[str, Any]]:
+    """Télescope, cible et type de produit d'une clé {télescope}/{cible}/{fichier}"""
+    parts = object_key.split("/")
+    if len(parts) < 3:
+        return None
+    match = PRODUCT_TYPE_PATTERN.search(parts[-1])
+    return {
+        'telescope': parts[0],
+        'target': normalize_target(parts[1]),
+        'product_type': match.group(1).lower() if match else None
+    }
+
+class StorageManifest:
+    """Index en base des fichiers FITS stockés, tenu à jour à chaque écriture et suppression.
+
+    L'index est une aide à la lecture : un échec d'écriture est journalisé sans
+    faire échouer le stockage, le bucket restant la référence.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def _id(self, object_key: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"storage:{object_key}"))
+
+    def record(self, object_key: str, size: int, content_hash: Optional[str] = None) -> None:
+        """Ajoute ou met à jour l'entrée d'un fichier stocké"""
+        described = describe_key(object_key)
+        if described is None:
+            return
+        try:
+            with self.session_factory() as db:
+                entry = db.get(StoredFile, self._id(object_key))
+                if entry is None:
+                    entry = StoredFile(id=self._id(object_key), object_key=object_key, **described)
+                    db.add(entry)
+                entry.size = size
+                entry.content_hash = content_hash
+                db.commit()
+        except Exception as e:
+            logging.error(f"Error indexing {object_key}: {str(e)}")
+
+    def annotate(self, object_key: str, filter: Optional[str] = None, instrument: Optional[str] = None) -> None:
+        """Complète une entrée avec les informations lues dans les en-têtes"""
+        try:
+            with self.session_factory() as db:
+                entry = db.get(StoredFile, self._id(object_key))
+                if entry is None:
+                    return
+                if filter is not None:
+                    entry.filter = filter
+                if instrument is not None:
+                    entry.instrument = instrument
+                db.commit()
+        except Exception as e:
+            logging.error(f"Error annotating {object_key}: {str(e)}")
+
+    def remove(self, object_key: str) -> None:
+        try:
+            with self.session_factory() as db:
+                db.query(StoredFile).filter(StoredFile.id == self._id(object_key)).delete()
+                db.commit()
+        except Exception as e:
+            logging.error(f"Error unindexing {object_key}: {str(e)}")
+
+    def inventory(self, telescope: str, target: str, product_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fichiers déjà stockés pour une cible, via l'index (telescope, target, product_type)"""
+        with self.session_factory() as db:
+            query = db.query(StoredFile).filter(
+                StoredFile.telescope == telescope,
+                StoredFile.target == normalize_target(target)
+            )
+            if product_type:
+                query = query.filter(StoredFile.product_type == product_type.lower())
+            return [entry.to_dict() for entry in query.order_by(StoredFile.object_key)]
+
+    def usage(self, telescope: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """Nombre de fichiers et octets stockés par télescope (calcul de quotas)"""
+        with self.session_factory() as db:
+            query = db.query(StoredFile.telescope, func.count(StoredFile.id), func.sum(StoredFile.size))
+            if telescope:
+                query = query.filter(StoredFile.telescope == telescope)
+            return {
+                name: {'files': count, 'bytes': int(total or 0)}
+                for name, count, total in query.group_by(StoredFile.telescope)
+            }
+
+    def find_by_hash(self, content_hash: str) -> List[str]:
+        """Clés qui partagent un même contenu"""
+        with self.session_factory() as db:
+            rows = db.query(StoredFile.object_key).filter(StoredFile.content_hash == content_hash)
+            return [object_key for object_key, in rows]
+
+    def content_hashes(self) -> Set[str]:
+        """Contenus désignés par au moins un fichier indexé"""
+        with self.session_factory() as db:
+            rows = db.query(StoredFile.content_hash).filter(StoredFile.content_hash.isnot(None)).distinct()
+            return {content_hash for content_hash, in rows}
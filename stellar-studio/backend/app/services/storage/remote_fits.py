@@ -0,0 +1,182 @@
+# app/services/storage/remote_fits.py
+import math
+from typing import Iterator, List, Optional, Tuple, Union
+import numpy as np
+from astropy.io import fits
+from .backends import StorageBackend
+
+BLOCK_SIZE = 2880  # Taille d'un bloc FITS
+CARD_SIZE = 80
+END_CARD = b"END" + b" " * 77
+
+BITPIX_DTYPES = {
+    8: "uint8",
+    16: "int16",
+    32: "int32",
+    64: "int64",
+    -32: "float32",
+    -64: "float64"
+}
+
+def padded_size(size: int) -> int:
+    """Taille arrondie au bloc FITS supérieur"""
+    return math.ceil(size / BLOCK_SIZE) * BLOCK_SIZE
+
+def data_size(header: fits.Header) -> int:
+    """Taille sur disque (avec bourrage) de la zone de données décrite par un en-tête"""
+    naxis = header.get('NAXIS', 0)
+    if naxis == 0:
+        return 0
+    elements = 1
+    for axis in range(1, naxis + 1):
+        elements *= header.get(f'NAXIS{axis}', 0)
+    size = abs(header['BITPIX']) // 8 * header.get('GCOUNT', 1) * (header.get('PCOUNT', 0) + elements)
+    return padded_size(size)
+
+def image_header(header: fits.Header) -> fits.Header:
+    """En-tête image équivalent, y compris pour une image compressée par tuiles (ZIMAGE)"""
+    if not header.get('ZIMAGE'):
+        return header
+    image = header.copy()
+    image['BITPIX'] = header['ZBITPIX']
+    image['NAXIS'] = header['ZNAXIS']
+    for axis in range(1, header['ZNAXIS'] + 1):
+        image[f'NAXIS{axis}'] = header[f'ZNAXIS{axis}']
+    return image
+
+def header_dtype(header: fits.Header) -> Optional[str]:
+    """Type numpy des données une fois BZERO appliqué"""
+    bitpix = header.get('BITPIX')
+    if bitpix == 16 and header.get('BZERO') == 32768:
+        return "uint16"
+    if bitpix == 32 and header.get('BZERO') == 2147483648:
+        return "uint32"
+    return BITPIX_DTYPES.get(bitpix)
+
+def scaled(raw: np.ndarray, header: fits.Header) -> np.ndarray:
+    """Applique BSCALE/BZERO comme astropy (entiers non signés compris)"""
+    bscale = header.get('BSCALE', 1)
+    bzero = header.get('BZERO', 0)
+    dtype = header_dtype(header)
+    if dtype in ("uint16", "uint32") and bscale == 1:
+        return (raw.astype(raw.dtype.newbyteorder('=')).view(dtype) ^ np.array(bzero, dtype=dtype))
+    if bscale == 1 and bzero == 0:
+        return raw.astype(raw.dtype.newbyteorder('='))
+    output = np.float32 if abs(header['BITPIX']) <= 16 or header['BITPIX'] == -32 else np.float64
+    data = raw.astype(output)
+    data *= bscale
+    data += bzero
+    return data
+
+def section_header(header: fits.Header, shape: Tuple[int, ...], offsets: Tuple[int, ...]) -> fits.Header:
+    """En-tête d'une découpe : dimensions réduites et WCS décalé (offsets en ordre numpy)"""
+    section = header.copy()
+    naxis = len(shape)
+    for index, (length, offset) in enumerate(zip(shape, offsets)):
+        axis = naxis - index
+        section[f'NAXIS{axis}'] = length
+        if offset and f'CRPIX{axis}' in section:
+            section[f'CRPIX{axis}'] = section[f'CRPIX{axis}'] - offset
+    return section
+
+class RemoteFitsReader:
+    """Lit la structure d'un FITS stocké par petites requêtes Range.
+
+    Seuls les blocs d'en-tête sont transférés : les zones de données sont
+    sautées grâce à leur taille, calculée depuis l'en-tête qui les précède.
+    Une découpe d'image ne télécharge que les lignes demandées.
+    """
+
+    def __init__(self, backend: StorageBackend, object_name: str, size: int,
+                 read_ahead: int = 8 * BLOCK_SIZE):
+        self.backend = backend
+        self.object_name = object_name
+        self.size = size
+        self.read_ahead = read_ahead
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """Octets [offset, offset + length) de l'objet"""
+        length = min(length, self.size - offset)
+        if length <= 0:
+            return b""
+        return self.backend.read_range(self.object_name, offset, length)
+
+    def read_header(self, offset: int) -> Tuple[fits.Header, int]:
+        """En-tête commençant à offset, et sa longueur sur disque"""
+        buffer = b""
+        scanned = 0
+        while True:
+            chunk = self.read_range(offset + len(buffer), self.read_ahead)
+            if not chunk:
+                raise IOError(f"Truncated FITS header in {self.object_name} at offset {offset}")
+            buffer += chunk
+            for position in range(scanned, len(buffer) - CARD_SIZE + 1, CARD_SIZE):
+                if buffer[position:position + CARD_SIZE] == END_CARD:
+                    header = fits.Header.fromstring(buffer[:position + CARD_SIZE].decode("ascii"))
+                    return header, padded_size(position + CARD_SIZE)
+            scanned = len(buffer) - len(buffer) % CARD_SIZE
+
+    def hdus(self) -> Iterator[Tuple[fits.Header, int, int]]:
+        """Parcourt les HDU : (en-tête, offset des données, taille des données)"""
+        offset = 0
+        while offset < self.size:
+            header, header_length = self.read_header(offset)
+            data_offset = offset + header_length
+            size = data_size(header)
+            yield header, data_offset, size
+            offset = data_offset + size
+
+    def headers(self, max_hdus: Optional[int] = None) -> List[fits.Header]:
+        """En-têtes des max_hdus premiers HDU (tous par défaut)"""
+        headers = []
+        for header, _, _ in self.hdus():
+            headers.append(header)
+            if max_hdus is not None and len(headers) >= max_hdus:
+                break
+        return headers
+
+    def find_hdu(self, ext: Union[int, str] = 0) -> Tuple[fits.Header, int, int]:
+        """Localise un HDU par index ou EXTNAME : (en-tête, offset des données, taille des données)"""
+        for index, (header, data_offset, size) in enumerate(self.hdus()):
+            if ext == index or (isinstance(ext, str) and header.get('EXTNAME') == ext):
+                return header, data_offset, size
+        raise KeyError(f"HDU {ext} not found in {self.object_name}")
+
+    def read_section(self, ext: Union[int, str] = 0, rows: Optional[Tuple[int, int]] = None,
+                     cols: Optional[Tuple[int, int]] = None) -> Tuple[fits.Header, np.ndarray]:
+        """Découpe d'une image non compressée, localisée par index ou EXTNAME"""
+        header, data_offset, _ = self.find_hdu(ext)
+        return self.read_image_section(header, data_offset, rows, cols)
+
+    def read_image_section(self, header: fits.Header, data_offset: int,
+                           rows: Optional[Tuple[int, int]] = None,
+                           cols: Optional[Tuple[int, int]] = None) -> Tuple[fits.Header, np.ndarray]:
+        """Lignes [start, stop) et colonnes [start, stop) d'une image non compressée.
+
+        Les lignes suivent le premier axe numpy (le dernier axe FITS) : elles sont
+        contiguës sur disque et un seul GET Range suffit. Les colonnes sont
+        découpées ensuite en mémoire.
+        """
+        if header.get('ZIMAGE') or header.get('XTENSION', 'IMAGE').strip() != 'IMAGE':
+            raise ValueError(f"HDU of {self.object_name} is not an uncompressed image")
+        naxis = header.get('NAXIS', 0)
+        if naxis < 2:
+            raise ValueError(f"HDU of {self.object_name} is not a 2D image")
+
+        shape = tuple(header[f'NAXIS{axis}'] for axis in range(naxis, 0, -1))
+        start, stop = rows if rows is not None else (0, shape[0])
+        start, stop = max(0, start), min(shape[0], stop)
+        if start >= stop:
+            raise ValueError(f"Empty row range {rows} for shape {shape}")
+
+        raw_dtype = np.dtype(BITPIX_DTYPES[header['BITPIX']]).newbyteorder('>')
+        row_bytes = raw_dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+        buffer = self.read_range(data_offset + start * row_bytes, (stop - start) * row_bytes)
+        raw = np.frombuffer(buffer, dtype=raw_dtype).reshape((stop - start,) + shape[1:])
+
+        offsets = [start] + [0] * (naxis - 1)
+        if cols is not None:
+            col_start, col_stop = max(0, cols[0]), min(shape[-1], cols[1])
+            raw = raw[..., col_start:col_stop]
+            offsets[-1] = col_start
+        return section_header(header, raw.shape, tuple(offsets)), scaled(raw, header)
@@ -1,78 +1,667 @@
 # app/services/storage/service.py
+import io
 import os
-from minio import Minio
-from minio.error import S3Error
+import json
+import math
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Callable, List, Iterator, Set, Tuple, Union
+import numpy as np
+from astropy.io import fits
 from app.core.config import settings
+from redis import Redis
+from app.core.redis import redis_client
+from .backends import ObjectInfo, StorageBackend, StorageError, create_backend
+from .manifest import StorageManifest
+from .remote_fits import RemoteFitsReader, image_header, section_header
+from .compression import MOVED_PRIMARY_KEYWORD, compress_hdul, decompressed
+from .arrays import ARRAY_PREFIX
+
+# Contenu adressé par hash : un même produit MAST n'est stocké qu'une fois
+CONTENT_PREFIX = "objects/sha256"
+PRODUCT_REF_PREFIX = "refs/mast"
+STAGING_PREFIX = "staging"
+# Premiers segments des clés internes (contenu, références produit, transferts,
+# intermédiaires) : jamais servies telles quelles aux utilisateurs
+INTERNAL_PREFIXES = {CONTENT_PREFIX.split("/")[0], PRODUCT_REF_PREFIX.split("/")[0], STAGING_PREFIX, ARRAY_PREFIX}
+# Métadonnées utilisateur des références
+CONTENT_HASH_META = "content-sha256"
+CONTENT_SIZE_META = "content-size"
+# Taille du produit d'origine quand le contenu stocké en diffère (compression par tuiles)
+SOURCE_SIZE_META = "source-size"
+# Journal des références récentes (empreinte -> date), lu par le GC pendant un balayage
+REFERENCE_JOURNAL_KEY = "storage:references:recent"
+REFERENCE_JOURNAL_TTL = 24 * 3600
+
+class HashingReader:
+    """Enveloppe un flux et calcule son SHA-256 au fil de la lecture"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.sha256.hexdigest()
 
 class StorageService:
-    def __init__(self):
-        self.client = Minio(
-            settings.MINIO_URL.replace('http://', ''),
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=False
-        )
-        # Utiliser la variable d'environnement pour le nom du bucket
-        self.fits_bucket = os.getenv('MINIO_BUCKET_NAME', 'fits-files')
-        self._ensure_bucket_exists(self.fits_bucket)
+    """Stockage des fichiers FITS et dérivés, sur le backend configuré (MinIO par défaut)"""
 
-    def _ensure_bucket_exists(self, bucket_name: str) -> None:
-        """S'assure que le bucket existe, le crée si nécessaire"""
-        try:
-            if not self.client.bucket_exists(bucket_name):
-                self.client.make_bucket(bucket_name)
-                logging.info(f"Bucket '{bucket_name}' created")
-        except S3Error as e:
-            logging.error(f"Error ensuring bucket exists: {str(e)}")
-            raise
+    def __init__(self, backend: Optional[StorageBackend] = None, manifest: Optional[StorageManifest] = None,
+                 client: Redis = redis_client):
+        # Le bucket est vérifié à la première écriture, pas à l'import
+        self.backend = backend or create_backend()
+        # Index en base des fichiers FITS (optionnel : absent dans les benchmarks et les tests)
+        self.manifest = manifest
+        self.client = client
 
-    def store_fits_file(self, file_path: str, object_name: str) -> bool:
-        """Stocke un fichier FITS dans MinIO"""
+    def store_fits_file(self, file_path: str, object_name: str,
+                        progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """Stocke un fichier FITS local ; au-delà d'une part, l'upload est parallélisé si le backend en profite"""
         try:
             if not os.path.exists(file_path):
                 logging.error(f"File not found: {file_path}")
                 return False
 
-            self.client.fput_object(
-                self.fits_bucket,
-                object_name,
-                file_path,
-                content_type="application/fits"
-            )
-            logging.info(f"Successfully stored {object_name} in MinIO")
+            size = os.path.getsize(file_path)
+            if self.backend.parallel_uploads and size > settings.UPLOAD_PART_SIZE:
+                if not self.upload_file_parallel(file_path, object_name, "application/fits", progress=progress):
+                    return False
+            else:
+                self.backend.put_file(object_name, file_path, content_type="application/fits")
+                if progress is not None:
+                    progress(size, size)
+            self._index(object_name, size)
+            logging.info(f"Successfully stored {object_name}")
             return True
-        except S3Error as e:
+        except StorageError as e:
             logging.error(f"Error storing FITS file {object_name}: {str(e)}")
             return False
         except Exception as e:
             logging.error(f"Unexpected error storing file {object_name}: {str(e)}")
             return False
 
+    def upload_file_parallel(self, file_path: str, object_name: str,
+                             content_type: str = "application/octet-stream",
+                             part_size: Optional[int] = None, concurrency: Optional[int] = None,
+                             progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """Upload multipart d'un fichier local, parts envoyées en parallèle et réessayées une à une.
+
+        La mémoire reste bornée à concurrency parts. progress(envoyés, total) est
+        appelé après chaque part. Si une part échoue définitivement, l'upload est
+        abandonné pour ne pas laisser de parts orphelines.
+        """
+        size = os.path.getsize(file_path)
+        # S3 limite un upload à 10 000 parts
+        part_size = max(part_size or settings.UPLOAD_PART_SIZE, math.ceil(size / 10000))
+        concurrency = concurrency or settings.UPLOAD_CONCURRENCY
+        part_count = max(1, math.ceil(size / part_size))
+        lock = threading.Lock()
+        uploaded = 0
+
+        try:
+            upload_id = self.backend.create_multipart(object_name, content_type)
+        except StorageError as e:
+            logging.error(f"Error starting upload of {object_name}: {str(e)}")
+            return False
+
+        def send(fd: int, part_number: int) -> Tuple[int, str]:
+            nonlocal uploaded
+            offset = (part_number - 1) * part_size
+            length = min(part_size, size - offset)
+            for attempt in range(settings.UPLOAD_PART_RETRIES + 1):
+                try:
+                    etag = self.backend.upload_part(object_name, upload_id, part_number, os.pread(fd, length, offset))
+                    break
+                except Exception as e:
+                    if attempt == settings.UPLOAD_PART_RETRIES:
+                        raise
+                    logging.warning(f"Part {part_number} of {object_name} failed ({str(e)}), retrying")
+                    time.sleep(settings.UPLOAD_RETRY_DELAY * 2 ** attempt)
+            with lock:
+                uploaded += length
+                if progress is not None:
+                    progress(uploaded, size)
+            return part_number, etag
+
+        started = time.monotonic()
+        fd = os.open(file_path, os.O_RDONLY)
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, part_count))
+        try:
+            futures = [executor.submit(send, fd, number) for number in range(1, part_count + 1)]
+            parts = [future.result() for future in as_completed(futures)]
+            self.backend.complete_multipart(object_name, upload_id, parts, content_type=content_type)
+        except Exception as e:
+            logging.error(f"Error uploading {object_name}: {str(e)}")
+            executor.shutdown(wait=True, cancel_futures=True)
+            try:
+                self.backend.abort_multipart(object_name, upload_id)
+            except StorageError as abort_error:
+                logging.error(f"Error aborting upload of {object_name}: {str(abort_error)}")
+            return False
+        finally:
+            executor.shutdown(wait=True)
+            os.close(fd)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        logging.info(
+            f"Uploaded {object_name}: {size / 2**20:.1f} MiB in {part_count} parts "
+            f"at {size / 2**20 / elapsed:.1f} MiB/s"
+        )
+        return True
+
+    def store_object(self, object_name: str, data: bytes, content_type: str = "application/octet-stream") -> bool:
+        """Stocke un petit objet déjà en mémoire (aperçus, mosaïques)"""
+        try:
+            self.backend.put_stream(object_name, io.BytesIO(data), length=len(data), content_type=content_type)
+            return True
+        except StorageError as e:
+            logging.error(f"Error storing object {object_name}: {str(e)}")
+            return False
+
+    def store_fits_stream(self, stream: BinaryIO, object_name: str) -> bool:
+        """Stocke un flux FITS de taille inconnue, sans passer par le disque.
+
+        Sert au transit (staging/) avant promotion : l'objet n'est pas indexé,
+        c'est la référence créée par link_content qui le sera.
+        """
+        try:
+            self.backend.put_stream(object_name, stream, length=-1, content_type="application/fits")
+            logging.info(f"Successfully streamed {object_name}")
+            return True
+        except StorageError as e:
+            logging.error(f"Error streaming FITS file {object_name}: {str(e)}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error streaming file {object_name}: {str(e)}")
+            return False
+
+    def _index(self, object_name: str, size: int, digest: Optional[str] = None) -> None:
+        """Indexe un nom final ; les clés internes (contenu, transit, tableaux) ne le sont jamais"""
+        if self.manifest is not None and self.is_user_visible(object_name):
+            self.manifest.record(object_name, size, digest)
+
+    def _stat(self, object_name: str) -> Optional[ObjectInfo]:
+        """stat tolérant : None si l'objet n'existe pas ou n'est pas accessible"""
+        try:
+            return self.backend.stat(object_name)
+        except StorageError as e:
+            logging.error(f"Error checking object {object_name}: {str(e)}")
+            return None
+
+    def fits_file_exists(self, object_name: str, size: Optional[int] = None) -> bool:
+        """Vérifie qu'un fichier est présent dans le bucket, avec la taille attendue si fournie"""
+        stat = self._stat(object_name)
+        if stat is None:
+            return False
+        if size is None:
+            return True
+        # Une référence est vide : la taille du produit d'origine (ou du contenu) est dans ses métadonnées
+        stored_size = stat.metadata.get(SOURCE_SIZE_META) or stat.metadata.get(CONTENT_SIZE_META)
+        return int(stored_size) == size if stored_size is not None else stat.size == size
+
+    def is_user_visible(self, object_name: str) -> bool:
+        """Vrai pour les fichiers que l'API peut servir : noms de fichiers et mosaïques.
+
+        Les clés internes (contenu adressé par hash, transferts, parts,
+        intermédiaires de traitement) ne s'atteignent qu'au travers d'un nom.
+        """
+        segments = object_name.split("/")
+        if not object_name or object_name.startswith("/") or ".." in segments:
+            return False
+        if segments[0] in INTERNAL_PREFIXES:
+            return False
+        return not any(segment.endswith(".parts") for segment in segments[:-1])
+
+    def _part_name(self, object_name: str, part_number: int) -> str:
+        return f"{object_name}.parts/{part_number:05d}"
+
+    def store_fits_part(self, object_name: str, part_number: int, data: bytes) -> bool:
+        """Stocke une part d'un fichier en cours de transfert, en tant qu'objet temporaire"""
+        part_name = self._part_name(object_name, part_number)
+        try:
+            self.backend.put_stream(part_name, io.BytesIO(data), length=len(data))
+            return True
+        except StorageError as e:
+            logging.error(f"Error storing part {part_name}: {str(e)}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error storing part {part_name}: {str(e)}")
+            return False
+
+    def compose_fits_parts(self, object_name: str, part_count: int) -> bool:
+        """Assemble côté serveur les parts stockées en un seul objet, puis les supprime"""
+        part_names = [self._part_name(object_name, n) for n in range(part_count)]
+        try:
+            self.backend.compose(object_name, part_names)
+        except StorageError as e:
+            logging.error(f"Error composing FITS file {object_name}: {str(e)}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error composing file {object_name}: {str(e)}")
+            return False
+
+        for part_name, reason in self.backend.remove_many(part_names).items():
+            logging.error(f"Error deleting part {part_name}: {reason}")
+        logging.info(f"Successfully composed {object_name} from {part_count} parts")
+        return True
+
+    # Stockage adressé par contenu
+
+    def content_name(self, digest: str) -> str:
+        """Clé du contenu d'empreinte SHA-256 digest"""
+        return f"{CONTENT_PREFIX}/{digest[:2]}/{digest}"
+
+    def staging_name(self, object_name: str) -> str:
+        """Clé de transit d'un fichier en cours de transfert, stable entre les tentatives"""
+        return f"{STAGING_PREFIX}/{object_name}"
+
+    def resolve(self, object_name: str) -> str:
+        """Retourne la clé qui porte réellement les octets d'un fichier.
+
+        Les fichiers stockés avant l'adressage par contenu ne portent pas de
+        métadonnée de hash et restent lisibles à leur emplacement d'origine.
+        """
+        digest = self.content_digest(object_name)
+        return self.content_name(digest) if digest else object_name
+
+    def content_digest(self, object_name: str) -> Optional[str]:
+        """Empreinte du contenu désigné par une référence, None pour un fichier ordinaire"""
+        stat = self._stat(object_name)
+        return stat.metadata.get(CONTENT_HASH_META) if stat else None
+
+    def product_digests(self) -> Set[str]:
+        """Contenus désignés par les références de produits MAST (préfixe refs/ seul).
+
+        Les références de noms, elles, passent par l'index stored_files. Un backend qui ne liste pas les métadonnées (MinIO) les
+        relit une à une. Lève StorageError si le parcours échoue.
+        """
+        digests = set()
+        for info in self.backend.list(f"{PRODUCT_REF_PREFIX}/"):
+            digest = info.metadata.get(CONTENT_HASH_META)
+            if digest is None:
+                stat = self.backend.stat(info.name)
+                digest = stat.metadata.get(CONTENT_HASH_META) if stat else None
+            if digest:
+                digests.add(digest)
+        return digests
+
+    def compute_sha256(self, object_name: str) -> Optional[str]:
+        """Calcule le SHA-256 d'un objet en le relisant depuis le stockage"""
+        sha256 = hashlib.sha256()
+        try:
+            with self.backend.open(object_name) as reader:
+                for chunk in reader.stream(settings.STORAGE_PART_SIZE):
+                    sha256.update(chunk)
+            return sha256.hexdigest()
+        except StorageError as e:
+            logging.error(f"Error hashing object {object_name}: {str(e)}")
+            return None
+
+    def store_content_stream(self, stream: BinaryIO, staging_name: str) -> Optional[str]:
+        """Stocke un flux sous son hash, retourne l'empreinte ou None en cas d'échec"""
+        reader = HashingReader(stream)
+        if not self.store_fits_stream(reader, staging_name):
+            return None
+        digest = reader.hexdigest()
+        return digest if self.promote_content(staging_name, digest) else None
+
+    def promote_content(self, staging_name: str, digest: str) -> bool:
+        """Déplace un objet de transit vers sa clé de contenu, sauf si ce contenu existe déjà"""
+        content_name = self.content_name(digest)
+        try:
+            if self._stat(content_name) is None:
+                self.backend.compose(content_name, [staging_name])
+            else:
+                logging.info(f"Content {digest} already stored, dropping duplicate upload")
+            self.backend.remove(staging_name)
+            return True
+        except StorageError as e:
+            logging.error(f"Error promoting {staging_name} to {content_name}: {str(e)}")
+            return False
+
+    def link_content(self, object_name: str, digest: str, source_size: Optional[int] = None) -> bool:
+        """Crée la référence légère object_name -> contenu digest, et l'indexe.
+
+        content-size et l'index portent la taille réellement stockée ;
+        source_size, la taille du produit d'origine, n'est gardée que si elle
+        en diffère (contenu compressé), pour reconnaître un produit déjà stocké.
+        """
+        content = self._stat(self.content_name(digest))
+        if content is None:
+            logging.error(f"Cannot link {object_name}: content {digest} not found")
+            return False
+        if not self._put_reference(object_name, digest, content.size, source_size):
+            return False
+        self._index(object_name, content.size, digest)
+        return True
+
+    def _put_reference(self, object_name: str, digest: str, size: Optional[int] = None,
+                       source_size: Optional[int] = None) -> bool:
+        metadata = {CONTENT_HASH_META: digest}
+        if size is not None:
+            metadata[CONTENT_SIZE_META] = str(size)
+        if source_size is not None and source_size != size:
+            metadata[SOURCE_SIZE_META] = str(source_size)
+        try:
+            self.backend.put_stream(
+                object_name,
+                io.BytesIO(b""),
+                length=0,
+                content_type="application/fits",
+                metadata=metadata
+            )
+        except StorageError as e:
+            logging.error(f"Error linking {object_name} to {digest}: {str(e)}")
+            return False
+        self._journal_reference(digest)
+        return True
+
+    def _journal_reference(self, digest: str) -> None:
+        """Signale au GC en cours qu'un contenu vient d'être référencé"""
+        now = time.time()
+        try:
+            pipe = self.client.pipeline()
+            pipe.zadd(REFERENCE_JOURNAL_KEY, {digest: now})
+            pipe.zremrangebyscore(REFERENCE_JOURNAL_KEY, "-inf", now - REFERENCE_JOURNAL_TTL)
+            pipe.expire(REFERENCE_JOURNAL_KEY, REFERENCE_JOURNAL_TTL)
+            pipe.execute()
+        except Exception as e:
+            logging.warning(f"Could not journal reference to {digest}: {str(e)}")
+
+    def referenced_since(self, since: float) -> Set[str]:
+        """Contenus référencés depuis since (horodatage Unix), d'après le journal"""
+        return {digest.decode() if isinstance(digest, bytes) else digest
+                for digest in self.client.zrangebyscore(REFERENCE_JOURNAL_KEY, since, "+inf")}
+
+    def _product_ref_name(self, product_key: str) -> str:
+        return f"{PRODUCT_REF_PREFIX}/{product_key}"
+
+    def find_product(self, product_key: str) -> Optional[str]:
+        """Empreinte du contenu déjà stocké pour un produit MAST, None si inconnu"""
+        stat = self._stat(self._product_ref_name(product_key))
+        if stat is None:
+            return None
+        digest = stat.metadata.get(CONTENT_HASH_META)
+        # Le contenu a pu être supprimé depuis : on ne s'y fie que s'il existe encore
+        if digest and self._stat(self.content_name(digest)) is not None:
+            return digest
+        return None
+
+    def register_product(self, product_key: str, digest: str) -> bool:
+        """Associe un produit MAST (URI et taille) à son contenu, avant tout téléchargement futur"""
+        return self._put_reference(self._product_ref_name(product_key), digest)
+
+    def compress_content(self, digest: str) -> Optional[str]:
+        """Réécrit un contenu en FITS compressé par tuiles, retourne l'empreinte du résultat.
+
+        Retourne l'empreinte d'origine s'il n'y a rien à compresser, None en cas d'échec.
+        Le contenu non compressé reste en place tant que d'autres références le visent.
+        """
+        source = self.content_name(digest)
+        spool_size = settings.FITS_SPOOL_SIZE
+        try:
+            with ExitStack() as stack:
+                raw = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=spool_size))
+                with self.backend.open(source) as reader:
+                    for chunk in reader.stream(settings.STORAGE_PART_SIZE):
+                        raw.write(chunk)
+                original_size = raw.tell()
+                raw.seek(0)
+                # astropy écrit dans un fichier nommé ou un BytesIO, pas dans un
+                # SpooledTemporaryFile encore en mémoire (son name vaut None)
+                packed = stack.enter_context(
+                    io.BytesIO() if original_size <= spool_size else tempfile.NamedTemporaryFile(suffix=".fits")
+                )
+
+                with fits.open(raw, memmap=False) as hdul:
+                    compressed = compress_hdul(
+                        hdul,
+                        float_mode=settings.FITS_FLOAT_COMPRESSION,
+                        quantize_level=settings.FITS_QUANTIZE_LEVEL
+                    )
+                    if compressed is None:
+                        return digest
+                    compressed.writeto(packed)
+
+                compressed_size = packed.tell()
+                packed.seek(0)
+                new_digest = self.store_content_stream(packed, self.staging_name(f"compressed/{digest}"))
+                if new_digest:
+                    logging.info(
+                        f"Compressed {digest}: {original_size} -> {compressed_size} bytes "
+                        f"(ratio {original_size / max(compressed_size, 1):.2f})"
+                    )
+                return new_digest
+        except StorageError as e:
+            logging.error(f"Error compressing content {digest}: {str(e)}")
+            return None
+        except Exception as e:
+            logging.error(f"Unexpected error compressing content {digest}: {str(e)}")
+            return None
+
+    def open_fits(self, object_name: str) -> Optional[fits.HDUList]:
+        """Ouvre un FITS stocké, compressé par tuiles ou non, comme un HDUList ordinaire"""
+        # Backend local : projection mémoire du fichier, sans copie
+        local_path = self.backend.local_path(self.resolve(object_name))
+        if local_path is not None:
+            return decompressed(fits.open(local_path, memmap=True))
+        fits_file = self.get_fits_file(object_name)
+        if fits_file is None:
+            return None
+        return decompressed(fits.open(io.BytesIO(fits_file["data"])))
+
+    def read_fits_headers(self, object_name: str, max_hdus: Optional[int] = None) -> Optional[List[fits.Header]]:
+        """Lit les en-têtes d'un FITS stocké sans télécharger ses données"""
+        content_name = self.resolve(object_name)
+        stat = self._stat(content_name)
+        if stat is None:
+            return None
+        try:
+            reader = RemoteFitsReader(self.backend, content_name, stat.size)
+            return reader.headers(max_hdus)
+        except StorageError as e:
+            logging.error(f"Error reading FITS headers of {object_name}: {str(e)}")
+            return None
+        except Exception as e:
+            logging.error(f"Unexpected error reading headers of {object_name}: {str(e)}")
+            return None
+
+    def read_fits_header(self, object_name: str, ext: Union[int, str] = 0) -> Optional[fits.Header]:
+        """En-tête d'un HDU (index ou EXTNAME), lu par petites requêtes Range"""
+        content_name = self.resolve(object_name)
+        stat = self._stat(content_name)
+        if stat is None:
+            return None
+        try:
+            reader = RemoteFitsReader(self.backend, content_name, stat.size)
+            header, _, _ = reader.find_hdu(ext)
+            return header
+        except KeyError as e:
+            logging.error(str(e))
+            return None
+        except Exception as e:
+            logging.error(f"Unexpected error reading header {ext} of {object_name}: {str(e)}")
+            return None
+
+    def read_fits_section(self, object_name: str, ext: Union[int, str] = 0,
+                          rows: Optional[Tuple[int, int]] = None,
+                          cols: Optional[Tuple[int, int]] = None) -> Optional[Tuple[fits.Header, np.ndarray]]:
+        """Découpe d'une image stockée sans télécharger le fichier entier.
+
+        Seuls les en-têtes et les lignes demandées transitent. Une image
+        compressée par tuiles n'a pas d'offsets fixes : elle est alors lue en
+        entier puis découpée.
+        """
+        content_name = self.resolve(object_name)
+        stat = self._stat(content_name)
+        if stat is None:
+            return None
+        reader = RemoteFitsReader(self.backend, content_name, stat.size)
+        try:
+            header, data_offset, _ = reader.find_hdu(ext)
+            if not header.get('ZIMAGE') and not header.get(MOVED_PRIMARY_KEYWORD):
+                return reader.read_image_section(header, data_offset, rows, cols)
+        except (KeyError, ValueError) as e:
+            logging.error(f"Cannot read section of {object_name}: {str(e)}")
+            return None
+        except Exception as e:
+            logging.error(f"Unexpected error reading section of {object_name}: {str(e)}")
+            return None
+
+        hdul = self.open_fits(object_name)
+        if hdul is None:
+            return None
+        with hdul:
+            try:
+                hdu = hdul[ext]
+            except KeyError:
+                logging.error(f"HDU {ext} not found in {object_name}")
+                return None
+            if hdu.data is None or hdu.data.ndim < 2:
+                return None
+            row_slice = slice(*rows) if rows is not None else slice(None)
+            col_slice = slice(*cols) if cols is not None else slice(None)
+            data = np.array(hdu.data[row_slice, ..., col_slice])
+            offsets = [row_slice.start or 0] + [0] * (data.ndim - 2) + [col_slice.start or 0]
+            return section_header(image_header(hdu.header), data.shape, tuple(offsets)), data
+
+    def stat_fits_file(self, object_name: str) -> Optional[Dict[str, Any]]:
+        """Décrit un fichier stocké (clé réelle, taille, ETag) sans lire ses données"""
+        stat = self._stat(object_name)
+        if stat is None:
+            return None
+        digest = stat.metadata.get(CONTENT_HASH_META)
+        if digest:
+            content_name = self.content_name(digest)
+            content = self._stat(content_name)
+            if content is None:
+                logging.error(f"Dangling reference {object_name} -> {digest}")
+                return None
+            # Le contenu est immuable : son empreinte fait un ETag fort
+            return {
+                "content_name": content_name,
+                "size": content.size,
+                "etag": f'"{digest}"',
+                "last_modified": content.last_modified,
+                "content_type": content.content_type
+            }
+        return {
+            "content_name": object_name,
+            "size": stat.size,
+            "etag": f'"{stat.etag}"',
+            "last_modified": stat.last_modified,
+            "content_type": stat.content_type
+        }
+
+    def iter_fits_range(self, content_name: str, start: int, length: int,
+                        chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Itère sur [start, start + length) d'un objet, par morceaux (GET Range sur MinIO)"""
+        with self.backend.open(content_name, start, length) as reader:
+            for chunk in reader.stream(chunk_size):
+                yield chunk
+
+    def get_presigned_url(self, object_name: str, user_id: str) -> Optional[Dict[str, str]]:
+        """URL présignée de courte durée pour télécharger un fichier directement depuis MinIO.
+
+        None si le fichier n'existe pas ou si le backend ne sait pas signer d'URL.
+
+        La signature est mise en cache par (utilisateur, fichier) jusqu'à peu avant
+        son expiration, pour ne pas re-signer à chaque rafraîchissement du client.
+        """
+        cache_key = f"presign:{user_id}:{object_name}"
+        cached = self.client.get(cache_key)
+        if cached:
+            return json.loads(cached)
+
+        info = self.stat_fits_file(object_name)
+        if info is None:
+            return None
+        expiry = settings.PRESIGNED_URL_EXPIRY
+        try:
+            url = self.backend.presigned_url(
+                info["content_name"],
+                expires=timedelta(seconds=expiry),
+                # Le client reçoit le nom lisible, pas la clé de contenu
+                response_headers={
+                    "response-content-disposition": f'attachment; filename="{os.path.basename(object_name)}"',
+                    "response-content-type": info["content_type"] or "application/octet-stream"
+                }
+            )
+        except Exception as e:
+            logging.error(f"Error presigning {object_name}: {str(e)}")
+            return None
+        if url is None:
+            logging.info(f"Backend {self.backend.name} cannot presign URLs")
+            return None
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=expiry)
+        presigned = {"url": url, "expires_at": expires_at.isoformat()}
+        cache_ttl = expiry - settings.PRESIGNED_URL_RENEW_MARGIN
+        if cache_ttl > 0:
+            self.client.setex(cache_key, cache_ttl, json.dumps(presigned))
+        return presigned
+
     def get_fits_file(self, object_name: str) -> Optional[Dict[str, Any]]:
-        """Récupère un fichier FITS depuis MinIO"""
+        """Récupère un fichier FITS entier"""
+        content_name = self.resolve(object_name)
+        info = self._stat(content_name)
+        if info is None:
+            logging.error(f"FITS file {object_name} not found")
+            return None
         try:
-            obj = self.client.get_object(self.fits_bucket, object_name)
+            with self.backend.open(content_name) as reader:
+                data = reader.read()
             return {
-                "data": obj.read(),
-                "size": obj.size,
-                "content_type": obj.content_type
+                "data": data,
+                "size": len(data),
+                "content_type": info.content_type
             }
-        except S3Error as e:
+        except StorageError as e:
             logging.error(f"Error retrieving FITS file {object_name}: {str(e)}")
             return None
         except Exception as e:
             logging.error(f"Unexpected error retrieving file {object_name}: {str(e)}")
             return None
 
+    def _forget_download(self, object_name: str) -> None:
+        """Retire un fichier supprimé du checkpoint de téléchargement de sa cible"""
+        # Import local : le package task dépend déjà du stockage
+        from app.services.task.checkpoint import DownloadCheckpoint
+        checkpoint = DownloadCheckpoint.for_storage_path(object_name, self.client)
+        if checkpoint is None:
+            return
+        try:
+            checkpoint.forget_file(os.path.basename(object_name))
+        except Exception as e:
+            logging.warning(f"Could not clear download checkpoint for {object_name}: {str(e)}")
+
     def delete_fits_file(self, object_name: str) -> bool:
-        """Supprime un fichier FITS de MinIO"""
+        """Supprime un fichier FITS.
+
+        Pour un fichier adressé par contenu, seule la référence est supprimée :
+        le contenu peut être partagé par d'autres noms.
+        """
         try:
-            self.client.remove_object(self.fits_bucket, object_name)
-            logging.info(f"Successfully deleted {object_name} from MinIO")
+            self.backend.remove(object_name)
+            if self.manifest is not None:
+                self.manifest.remove(object_name)
+            self._forget_download(object_name)
+            logging.info(f"Successfully deleted {object_name}")
             return True
-        except S3Error as e:
+        except StorageError as e:
             logging.error(f"Error deleting FITS file {object_name}: {str(e)}")
             return False
         except Exception as e:
@@ -0,0 +1,58 @@
+# app/services/task/checkpoint.py
+from typing import Optional
+from redis import Redis
+from app.core.config import settings
+from app.core.redis import redis_client
+
+class DownloadCheckpoint:
+    """État de reprise d'un téléchargement, conservé dans Redis entre les tentatives.
+
+    La clé dépend de (télescope, objet) et non de l'id de tâche : une relance
+    manuelle profite aussi des fichiers et des parts déjà stockés.
+    """
+
+    def __init__(self, telescope: str, object_name: str, client: Redis = redis_client):
+        self.client = client
+        self.key = f"download:checkpoint:{telescope}:{object_name}"
+
+    def _touch(self, pipe) -> None:
+        pipe.expire(self.key, settings.DOWNLOAD_CHECKPOINT_TTL)
+
+    def stored_path(self, filename: str) -> Optional[str]:
+        """Chemin de stockage d'un fichier déjà terminé, None sinon"""
+        value = self.client.hget(self.key, f"file:{filename}")
+        return value.decode() if value else None
+
+    def mark_file_done(self, filename: str, storage_path: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, f"file:{filename}", storage_path)
+        pipe.hdel(self.key, f"parts:{filename}")
+        self._touch(pipe)
+        pipe.execute()
+
+    def forget_file(self, filename: str) -> None:
+        """Oublie un fichier terminé : le prochain passage le retélécharge"""
+        self.client.hdel(self.key, f"file:{filename}", f"parts:{filename}")
+
+    @classmethod
+    def for_storage_path(cls, storage_path: str, client: Redis = redis_client) -> Optional["DownloadCheckpoint"]:
+        """Checkpoint d'un chemin '<télescope>/<objet>/<fichier>', None pour un autre nom"""
+        telescope, _, rest = storage_path.partition("/")
+        object_name, _, filename = rest.rpartition("/")
+        if not telescope or not object_name or not filename:
+            return None
+        return cls(telescope, object_name, client)
+
+    def next_part(self, filename: str) -> int:
+        """Nombre de parts consécutives déjà stockées pour un fichier"""
+        value = self.client.hget(self.key, f"parts:{filename}")
+        return int(value) if value else 0
+
+    def mark_part_done(self, filename: str, part_number: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, f"parts:{filename}", part_number + 1)
+        self._touch(pipe)
+        pipe.execute()
+
+    def reset_parts(self, filename: str) -> None:
+        self.client.hdel(self.key, f"parts:{filename}")
@@ -0,0 +1,70 @@
+# app/services/task/concurrency.py
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+from redis import Redis
+from app.core.redis import redis_client
+
+class RedisSemaphore:
+    """Sémaphore partagé dans Redis, visible de tous les process.
+
+    Chaque détenteur est une entrée d'un ensemble trié, notée par son
+    expiration : une place prise par un worker tué sans release se libère
+    d'elle-même au bout de ttl secondes. Une tentative refusée ne laisse
+    aucune trace et ne prolonge donc pas les places existantes.
+    """
+
+    def __init__(self, key: str, limit: int, client: Redis = redis_client,
+                 ttl: int = 3600, poll_interval: float = 0.2):
+        self.key = key
+        self.limit = limit
+        self.client = client
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+
+    def try_acquire(self) -> Optional[str]:
+        """Réserve une place si possible, sans attendre ; retourne le jeton à rendre à release"""
+        token = str(uuid.uuid4())
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(self.key, "-inf", now)
+        pipe.zadd(self.key, {token: now + self.ttl})
+        pipe.zrank(self.key, token)
+        pipe.expire(self.key, self.ttl)
+        _, _, rank, _ = pipe.execute()
+        if rank is not None and rank < self.limit:
+            return token
+        self.client.zrem(self.key, token)
+        return None
+
+    def acquire(self) -> str:
+        """Attend qu'une place se libère puis la réserve"""
+        while True:
+            token = self.try_acquire()
+            if token is not None:
+                return token
+            time.sleep(self.poll_interval)
+
+    def release(self, token: str) -> None:
+        """Libère la place du jeton"""
+        self.client.zrem(self.key, token)
+
+    @contextmanager
+    def slot(self):
+        token = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(token)
+
+class WorkerSlots(RedisSemaphore):
+    """Limite les téléchargements simultanés d'un même worker.
+
+    Les process prefork de Celery ne partagent pas de mémoire : le compteur vit
+    donc dans Redis, sous une clé propre à l'hôte du worker.
+    """
+
+    def __init__(self, limit: int, prefix: str = "download:slots:", **kwargs):
+        super().__init__(f"{prefix}{socket.gethostname()}", limit, **kwargs)
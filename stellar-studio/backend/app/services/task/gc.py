@@ -0,0 +1,282 @@
+# app/services/task/gc.py
+import time
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from redis import Redis
+from app.core.redis import redis_client
+from app.core.monitoring import GC_OBJECTS_DELETED, GC_BYTES_RECLAIMED
+from app.db.session import SessionLocal
+from app.infrastructure.repositories.models.observation import Observation
+from app.infrastructure.repositories.models.processing import ProcessingJob, JobStatus
+from app.infrastructure.repositories.models.task import Task
+from ..storage.backends import ObjectInfo, StorageBackend, StorageError
+from ..storage.service import CONTENT_PREFIX, STAGING_PREFIX, StorageService
+from ..storage.arrays import ARRAY_PREFIX, MANIFEST_NAME
+from ..processing.executor import STEP_CACHE_PREFIX
+
+MOSAIC_PREFIX = "mosaics"
+# Marge sur le journal des références, pour l'écart d'horloge entre worker et GC
+REFERENCE_CLOCK_MARGIN = 300
+# États de tâche après lesquels leurs intermédiaires ne servent plus
+FINISHED_TASK_STATES = {'success', 'failure', 'revoked', 'completed', 'failed', 'error'}
+
+@dataclass
+class LiveSet:
+    """Objets atteignables depuis la base (phase mark)"""
+    names: Set[str] = field(default_factory=set)
+    digests: Set[str] = field(default_factory=set)
+    active_ids: Set[str] = field(default_factory=set)
+    # Faux pendant un téléchargement : ses références ne sont pas encore en base
+    sweep_content: bool = True
+    # Début de la phase mark : les références créées depuis sont lues dans le journal
+    marked_at: float = field(default_factory=time.time)
+
+def _strings(value: Any) -> Iterable[str]:
+    """Toutes les chaînes d'une structure JSON"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+def _object_keys(value: str) -> List[str]:
+    """Clés candidates d'une valeur stockée en base (clé brute ou URL MinIO)"""
+    if "://" not in value:
+        return [value.lstrip("/")]
+    path = urlparse(value).path.lstrip("/")
+    # URL de chemin S3 : le premier segment est le bucket
+    return [path, path.partition("/")[2]]
+
+def mark_live_objects(storage: StorageService, active_downloads: bool) -> LiveSet:
+    """Phase mark : objets référencés par la base, et contenus désignés par une référence"""
+    live = LiveSet(sweep_content=not active_downloads)
+    with SessionLocal() as db:
+        for fits_files, preview_url in db.query(Observation.fits_files, Observation.preview_url):
+            for value in list(_strings(fits_files)) + ([preview_url] if preview_url else []):
+                live.names.update(_object_keys(value))
+
+        for job_id, status, result_url in db.query(ProcessingJob.id, ProcessingJob.status, ProcessingJob.result_url):
+            if status in (JobStatus.PENDING, JobStatus.PROCESSING):
+                live.active_ids.add(job_id)
+            if result_url:
+                live.names.update(_object_keys(result_url))
+
+        for task_id, status, parameters, result in db.query(Task.id, Task.status, Task.parameters, Task.result):
+            if (status or "").lower() not in FINISHED_TASK_STATES:
+                live.active_ids.add(task_id)
+            for value in list(_strings(parameters)) + list(_strings(result)):
+                live.names.update(_object_keys(value))
+
+    # Les références mènent au contenu adressé par hash qu'elles désignent
+    for name in live.names:
+        if name.startswith(f"{ARRAY_PREFIX}/"):
+            # Un tableau référencé garde tous ses blocs
+            live.active_ids.add(name.split("/")[1])
+            continue
+        if name.startswith(f"{CONTENT_PREFIX}/"):
+            live.digests.add(name.rsplit("/", 1)[-1])
+            continue
+        digest = storage.content_digest(name)
+        if digest:
+            live.digests.add(digest)
+
+    # Toute référence est une racine, même absente des tables métier : noms
+    # indexés (stored_files) et références de produits (refs/), sans parcourir
+    # le bucket. Celles créées pendant le balayage sont lues dans le journal.
+    if live.sweep_content:
+        if storage.manifest is None:
+            logging.warning("GC has no stored_files index: content is not swept")
+            live.sweep_content = False
+            return live
+        try:
+            live.digests.update(storage.manifest.content_hashes())
+            live.digests.update(storage.product_digests())
+        except Exception as e:
+            # Racines incomplètes : le contenu n'est pas balayé à ce passage
+            logging.error(f"GC could not list content references: {str(e)}")
+            live.sweep_content = False
+    return live
+
+class GarbageCollector:
+    """Phase sweep : parcourt le bucket par lots et supprime les objets orphelins.
+
+    Seuls les préfixes gérés par l'application sont balayés (transferts
+    interrompus, contenu adressé par hash, intermédiaires, mosaïques) ; les
+    autres objets, dont les fichiers d'avant l'adressage par contenu, ne sont
+    jamais supprimés. Le parcours reprend là où le précédent s'est arrêté.
+
+    Un tableau (arrays/{nom}/) est jugé en entier, sur l'âge de son manifeste :
+    le manifeste est supprimé avant les blocs, pour qu'un passage interrompu
+    ne laisse jamais un manifeste désigner des blocs disparus. Un contenu
+    orphelin n'est supprimé qu'après relecture du journal des références :
+    sans journal (referenced_since), le contenu n'est jamais balayé.
+    """
+
+    def __init__(self, backend: StorageBackend, retention: Dict[str, int],
+                 client: Redis = redis_client, key_prefix: str = "storage:gc:",
+                 referenced_since: Optional[Callable[[float], Set[str]]] = None):
+        self.backend = backend
+        # Contenus référencés depuis une date (StorageService.referenced_since)
+        self.referenced_since = referenced_since
+        self.retention = {rule: timedelta(seconds=seconds) for rule, seconds in retention.items()}
+        self.client = client
+        self.cursor_key = f"{key_prefix}cursor"
+
+    @staticmethod
+    def array_owner(name: str) -> Optional[str]:
+        """Nom du tableau d'un objet arrays/{nom}/..., None hors des tableaux"""
+        if not name.startswith(f"{ARRAY_PREFIX}/"):
+            return None
+        return name.split("/")[1]
+
+    def _expired(self, rule: str, last_modified: Optional[datetime], now: datetime) -> bool:
+        if last_modified is None:
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return now - last_modified > self.retention[rule]
+
+    def rule_for(self, info: ObjectInfo, live: LiveSet, now: datetime) -> Optional[str]:
+        """Règle qui condamne l'objet, None s'il doit être conservé (tableaux : array_rule)"""
+        name = info.name
+        if name in live.names:
+            return None
+        if name.startswith(f"{STAGING_PREFIX}/") or ".parts/" in name:
+            rule = "transfer"
+        elif name.startswith(f"{CONTENT_PREFIX}/"):
+            if not live.sweep_content or name.rsplit("/", 1)[-1] in live.digests:
+                return None
+            rule = "content"
+        elif name.startswith(f"{MOSAIC_PREFIX}/"):
+            rule = "mosaic"
+        else:
+            return None
+        return rule if self._expired(rule, info.last_modified, now) else None
+
+    def array_rule(self, owner: str, objects: List[ObjectInfo], live: LiveSet, now: datetime) -> Optional[str]:
+        """Règle qui condamne un tableau entier, None s'il doit être conservé.
+
+        L'âge est celui du manifeste, rafraîchi à chaque réutilisation ; sans
+        manifeste (écriture interrompue), celui du bloc le plus récent.
+        """
+        # arrays/{id de job ou de tâche}/... ou arrays/step-{clé}/... (cache de résultats)
+        if owner in live.active_ids:
+            return None
+        rule = "step_cache" if owner.startswith(STEP_CACHE_PREFIX) else "intermediate"
+        manifest_name = f"{ARRAY_PREFIX}/{owner}/{MANIFEST_NAME}"
+        dated = [info for info in objects if info.name == manifest_name] or objects
+        if any(info.last_modified is None for info in dated):
+            return None
+        return rule if self._expired(rule, max(info.last_modified for info in dated), now) else None
+
+    def _spare_new_references(self, doomed: List[Tuple[ObjectInfo, str]], live: LiveSet) -> None:
+        """Retire du lot le contenu référencé depuis la phase mark, juste avant sa suppression"""
+        if not any(rule == "content" for _, rule in doomed):
+            return
+        if self.referenced_since is None:
+            doomed[:] = [(info, rule) for info, rule in doomed if rule != "content"]
+            return
+        try:
+            recent = self.referenced_since(live.marked_at - REFERENCE_CLOCK_MARGIN)
+        except Exception as e:
+            logging.error(f"GC could not read recent references: {str(e)}")
+            doomed[:] = [(info, rule) for info, rule in doomed if rule != "content"]
+            return
+        live.digests.update(recent)
+        doomed[:] = [
+            (info, rule) for info, rule in doomed
+            if rule != "content" or info.name.rsplit("/", 1)[-1] not in recent
+        ]
+
+    def _flush(self, doomed: List[Tuple[ObjectInfo, str]], report: Dict[str, Any],
+               live: Optional[LiveSet] = None) -> Dict[str, str]:
+        if live is not None:
+            self._spare_new_references(doomed, live)
+        if not doomed:
+            return {}
+        try:
+            failed = self.backend.remove_many([info.name for info, _ in doomed])
+        except StorageError as e:
+            # Requête groupée refusée : tout le lot compte comme un échec
+            failed = {info.name: str(e) for info, _ in doomed}
+        for name, reason in failed.items():
+            logging.error(f"GC could not delete {name}: {reason}")
+        for info, rule in doomed:
+            if info.name in failed:
+                report["failed"] += 1
+                continue
+            stats = report["by_rule"].setdefault(rule, {"objects": 0, "bytes": 0})
+            stats["objects"] += 1
+            stats["bytes"] += info.size
+            report["deleted"] += 1
+            report["bytes_reclaimed"] += info.size
+            GC_OBJECTS_DELETED.labels(rule=rule).inc()
+            GC_BYTES_RECLAIMED.labels(rule=rule).inc(info.size)
+        doomed.clear()
+        return failed
+
+    def _sweep_array(self, owner: str, objects: List[ObjectInfo], live: LiveSet, now: datetime,
+                     doomed: List[Tuple[ObjectInfo, str]], report: Dict[str, Any], batch_size: int) -> None:
+        """Condamne un tableau : manifeste d'abord, blocs seulement si le manifeste a disparu"""
+        rule = self.array_rule(owner, objects, live, now)
+        if rule is None:
+            return
+        manifest_name = f"{ARRAY_PREFIX}/{owner}/{MANIFEST_NAME}"
+        manifests = [(info, rule) for info in objects if info.name == manifest_name]
+        if manifests and self._flush(manifests, report):
+            return
+        for info in objects:
+            if info.name != manifest_name:
+                doomed.append((info, rule))
+                if len(doomed) >= batch_size:
+                    self._flush(doomed, report, live)
+
+    def sweep(self, live: LiveSet, batch_size: int, max_objects: int) -> Dict[str, Any]:
+        """Balaye au plus max_objects objets, supprimés par lots de batch_size"""
+        cursor = self.client.get(self.cursor_key)
+        cursor = cursor.decode() if cursor else None
+        now = datetime.now(timezone.utc)
+        report = {"scanned": 0, "deleted": 0, "failed": 0, "bytes_reclaimed": 0,
+                  "by_rule": {}, "started_after": cursor, "complete": True}
+        doomed: List[Tuple[ObjectInfo, str]] = []
+        # Objets du tableau en cours : le listage lexicographique les donne à la suite
+        owner, group = None, []
+
+        for info in self.backend.list("", start_after=cursor):
+            info_owner = self.array_owner(info.name)
+            if group and info_owner != owner:
+                self._sweep_array(owner, group, live, now, doomed, report, batch_size)
+                group = []
+                # Un passage ne s'arrête jamais au milieu d'un tableau
+                if report["scanned"] >= max_objects:
+                    report["complete"] = False
+                    break
+            report["scanned"] += 1
+            cursor = info.name
+            if info_owner is not None:
+                owner = info_owner
+                group.append(info)
+                continue
+            rule = self.rule_for(info, live, now)
+            if rule is not None:
+                doomed.append((info, rule))
+                if len(doomed) >= batch_size:
+                    self._flush(doomed, report, live)
+            if report["scanned"] >= max_objects:
+                report["complete"] = False
+                break
+        if group:
+            self._sweep_array(owner, group, live, now, doomed, report, batch_size)
+        self._flush(doomed, report, live)
+
+        if report["complete"]:
+            self.client.delete(self.cursor_key)
+        else:
+            self.client.set(self.cursor_key, cursor)
+        return report
@@ -0,0 +1,74 @@
+# app/services/task/progress.py
+import time
+from typing import Any, Dict, Optional
+from redis import Redis
+from app.core.config import settings
+from app.core.redis import redis_client
+
+class DownloadProgress:
+    """Compteurs agrégés d'un téléchargement découpé en sous-tâches par produit"""
+
+    FIELDS = ('total', 'completed', 'failed', 'total_bytes', 'bytes')
+
+    def __init__(self, task_id: str, client: Redis = redis_client):
+        self.client = client
+        self.key = f"download:progress:{task_id}"
+
+    def start(self, total: int, total_bytes: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, mapping={
+            'total': total,
+            'completed': 0,
+            'failed': 0,
+            'total_bytes': total_bytes,
+            'bytes': 0
+        })
+        pipe.expire(self.key, settings.DOWNLOAD_CHECKPOINT_TTL)
+        pipe.execute()
+
+    def record(self, success: bool, size: Optional[int]) -> None:
+        """Comptabilise un produit terminé, avec ou sans succès"""
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.key, 'completed', 1)
+        if not success:
+            pipe.hincrby(self.key, 'failed', 1)
+        elif size:
+            pipe.hincrby(self.key, 'bytes', size)
+        pipe.execute()
+
+    def snapshot(self) -> Optional[Dict[str, int]]:
+        """État courant, None si la tâche n'a pas été découpée"""
+        values = self.client.hmget(self.key, self.FIELDS)
+        if values[0] is None:
+            return None
+        return {field: int(value or 0) for field, value in zip(self.FIELDS, values)}
+
+class UploadProgress:
+    """Publie l'avancement et le débit d'un upload dans les métadonnées PROGRESS d'une tâche.
+
+    S'utilise comme callback progress de StorageService.store_fits_file.
+    """
+
+    def __init__(self, task, object_name: str, min_interval: float = 1.0):
+        self.task = task
+        self.object_name = object_name
+        self.min_interval = min_interval
+        self.started = time.monotonic()
+        self.last_report = 0.0
+
+    def __call__(self, uploaded: int, total: int) -> None:
+        now = time.monotonic()
+        if uploaded < total and now - self.last_report < self.min_interval:
+            return
+        self.last_report = now
+        self.task.update_state(state='PROGRESS', meta={'upload': self.snapshot(uploaded, total, now)})
+
+    def snapshot(self, uploaded: int, total: int, now: float) -> Dict[str, Any]:
+        elapsed = max(now - self.started, 1e-6)
+        return {
+            'object': self.object_name,
+            'uploaded_bytes': uploaded,
+            'total_bytes': total,
+            'percent': round(100 * uploaded / total, 1) if total else 100.0,
+            'throughput_bytes_per_s': int(uploaded / elapsed)
+        }
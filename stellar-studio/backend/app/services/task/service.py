@@ -1,26 +1,160 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
-import tempfile
+import math
+import hashlib
 import logging
+from celery import chord
+from celery.exceptions import Ignore, Retry
 from app.db.session import SessionLocal
 from app.core.celery import celery_app
-from astroquery.mast import Observations
+from app.core.config import settings
+from app.core.redis import redis_client
 from ..storage import storage_service
+from ..mast import mast_service
+from ..observation import observation_service
+from ..observation.headers import extract_fits_metadata
+from .concurrency import RedisSemaphore, WorkerSlots
+from .checkpoint import DownloadCheckpoint
+from .singleflight import SingleFlight
+from .progress import DownloadProgress
+from .gc import GarbageCollector, mark_live_objects
 from app.infrastructure.repositories.models.target import Target
 
-@celery_app.task(name='download_fits')
-def download_fits(object_name: str, telescope: str) -> Dict[str, Any]:
-    """Télécharge les fichiers FITS et les stocke via le storage service"""
+worker_slots = WorkerSlots(settings.DOWNLOAD_MAX_CONCURRENCY_PER_WORKER)
+
+def _product_size(product) -> Optional[int]:
+    """Taille annoncée par MAST pour un produit, None si inconnue"""
+    try:
+        return int(product['size'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _read_exact(stream, length: int) -> bytes:
+    """Lit exactement length octets, sauf fin de flux prématurée"""
+    buffer = bytearray()
+    while len(buffer) < length:
+        chunk = stream.read(length - len(buffer))
+        if not chunk:
+            break
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+def _resumable_transfer(data_uri: str, staging_name: str, size: int,
+                        checkpoint: DownloadCheckpoint, filename: str) -> Optional[str]:
+    """Transfère un gros produit part par part, en reprenant après la dernière part stockée.
+
+    Retourne le SHA-256 du fichier assemblé, ou None en cas d'échec de stockage.
+    """
+    part_size = settings.STORAGE_PART_SIZE
+    part_count = math.ceil(size / part_size)
+    next_part = checkpoint.next_part(filename)
+    # Parts déjà assemblées lors d'une tentative interrompue avant la promotion
+    if next_part >= part_count and storage_service.fits_file_exists(staging_name, size):
+        return storage_service.compute_sha256(staging_name)
+    # Le hash n'est calculé au vol que si le fichier est lu depuis son début
+    sha256 = hashlib.sha256() if next_part == 0 else None
+
+    if next_part < part_count:
+        with mast_service.open_product_stream(data_uri, start=next_part * part_size) as stream:
+            if next_part and stream.status_code != 206:
+                logging.warning(f"Requête Range ignorée par MAST pour {filename}, reprise depuis le début")
+                checkpoint.reset_parts(filename)
+                next_part = 0
+                sha256 = hashlib.sha256()
+            elif next_part:
+                logging.info(f"Reprise de {filename} à la part {next_part}/{part_count}")
+
+            for part_number in range(next_part, part_count):
+                length = min(part_size, size - part_number * part_size)
+                data = _read_exact(stream, length)
+                if len(data) != length:
+                    raise IOError(f"Flux MAST interrompu pour {filename} (part {part_number})")
+                if not storage_service.store_fits_part(staging_name, part_number, data):
+                    return None
+                if sha256 is not None:
+                    sha256.update(data)
+                checkpoint.mark_part_done(filename, part_number)
+
+    if not storage_service.compose_fits_parts(staging_name, part_count):
+        return None
+    if sha256 is not None:
+        return sha256.hexdigest()
+    # Transfert repris : le début du fichier n'a pas été lu par ce process
+    return storage_service.compute_sha256(staging_name)
+
+def _transfer_content(data_uri: str, storage_path: str, size: Optional[int],
+                      checkpoint: DownloadCheckpoint, filename: str) -> Optional[str]:
+    """Télécharge un produit vers le stockage adressé par contenu, retourne son empreinte"""
+    staging_name = storage_service.staging_name(storage_path)
+    if size is not None and size > settings.STORAGE_PART_SIZE:
+        digest = _resumable_transfer(data_uri, staging_name, size, checkpoint, filename)
+        if digest and storage_service.promote_content(staging_name, digest):
+            return digest
+        return None
+
+    with mast_service.open_product_stream(data_uri) as stream:
+        return storage_service.store_content_stream(stream, staging_name)
+
+def _fetch_and_store(product, telescope: str, object_name: str,
+                     checkpoint: DownloadCheckpoint) -> Optional[str]:
+    """Transfère un produit MAST directement dans MinIO, retourne le chemin de stockage"""
+    data_uri = product['dataURI']
+    filename = os.path.basename(data_uri)
+    storage_path = f"{telescope}/{object_name}/{filename}"
+    size = _product_size(product)
+
+    # Fichier déjà stocké lors d'une tentative précédente. Le checkpoint n'est qu'un indice :
+    # le fichier a pu être supprimé ou remplacé depuis, seul MinIO fait foi.
+    if storage_service.fits_file_exists(storage_path, size):
+        logging.info(f"{filename} déjà présent dans MinIO, téléchargement ignoré")
+        checkpoint.mark_file_done(filename, storage_path)
+        return storage_path
+    if checkpoint.stored_path(filename):
+        logging.warning(f"{filename} marqué comme stocké mais absent de MinIO, nouveau téléchargement")
+        checkpoint.forget_file(filename)
+
+    # Produit déjà téléchargé pour un autre nom de cible : simple référence, sans téléchargement
+    product_key = f"{data_uri}@{size}" if size is not None else None
+    digest = storage_service.find_product(product_key) if product_key else None
+    if digest:
+        logging.info(f"{filename} déjà stocké sous {digest}, création d'une référence")
+    else:
+        with worker_slots.slot():
+            digest = _transfer_content(data_uri, storage_path, size, checkpoint, filename)
+        if digest and settings.FITS_TILE_COMPRESSION:
+            # En cas d'échec on garde la version non compressée, déjà stockée
+            digest = storage_service.compress_content(digest) or digest
+        if digest and product_key:
+            storage_service.register_product(product_key, digest)
+
+    if digest and storage_service.link_content(storage_path, digest, source_size=size):
+        checkpoint.mark_file_done(filename, storage_path)
+        return storage_path
+    logging.error(f"Échec du stockage de {filename} dans MinIO")
+    return None
+
+@celery_app.task(
+    name='download_fits',
+    bind=True,
+    # Un worker tué en cours de route remet la tâche en file au lieu de la perdre
+    acks_late=True,
+    reject_on_worker_lost=True
+)
+def download_fits(self, object_name: str, telescope: str) -> Dict[str, Any]:
+    """Planifie le téléchargement : une sous-tâche par produit FITS, agrégées par un chord.
+
+    La tâche est remplacée par le chord : son id reste celui que le client interroge,
+    et porte le résultat final de finalize_download.
+    """
     try:
         # Mise à jour du statut initial
-        current_task = celery_app.current_task
-        current_task.update_state(
+        self.update_state(
             state='PROGRESS',
             meta={'status': f'Recherche des observations pour {object_name}...'}
         )
 
         # 1. Recherche des observations
-        obs_table = Observations.query_object(object_name, radius=".02 deg")
+        obs_table = mast_service.query_object(object_name, radius=".02 deg")
         
         # 2. Filtrage par télescope
         obs_filtered = obs_table[obs_table['obs_collection'] == telescope]
@@ -31,14 +165,14 @@ def download_fits(object_name: str, telescope: str) -> Dict[str, Any]:
             }
 
         # 3. Obtention des produits
-        current_task.update_state(
+        self.update_state(
             state='PROGRESS',
             meta={'status': 'Récupération des produits...'}
         )
-        products = Observations.get_product_list(obs_filtered[0])
+        products = mast_service.get_product_list(obs_filtered[0])
 
         # 4. Filtrage des produits FITS
-        filtered_products = Observations.filter_products(
+        filtered_products = mast_service.filter_products(
             products,
             productType=["SCIENCE"],
             extension="fits"
@@ -50,55 +184,187 @@ def download_fits(object_name: str, telescope: str) -> Dict[str, Any]:
                 'message': f"Aucun fichier FITS trouvé pour {object_name} avec {telescope}"
             }
 
-        # 5. Téléchargement et stockage
-        current_task.update_state(
+        # 5. Découpage en sous-tâches (le sérialiseur JSON impose des dicts simples)
+        product_infos = [
+            {'dataURI': str(product['dataURI']), 'size': _product_size(product)}
+            for product in filtered_products
+        ]
+        DownloadProgress(self.request.id).start(
+            total=len(product_infos),
+            total_bytes=sum(info['size'] or 0 for info in product_infos)
+        )
+        self.update_state(
             state='PROGRESS',
-            meta={'status': 'Téléchargement et stockage des fichiers...'}
+            meta={'status': f'Téléchargement et stockage de {len(product_infos)} fichiers...'}
         )
 
-        uploaded_files = []
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            for product in filtered_products:
-                filename = os.path.basename(product['dataURI'])
-                local_path = os.path.join(tmp_dir, filename)
-                
-                result = Observations.download_file(
-                    product['dataURI'],
-                    local_path=local_path
-                )
-                
-                if result[0] == 'COMPLETE':
-                    storage_path = f"{telescope}/{object_name}/{filename}"
-                    if storage_service.store_fits_file(local_path, storage_path):
-                        uploaded_files.append(storage_path)
-                    else:
-                        logging.error(f"Échec du stockage de {filename} dans MinIO")
-
-        if not uploaded_files:
-            return {
-                'status': 'error',
-                'message': "Échec du téléchargement ou du stockage des fichiers"
-            }
+        workflow = chord(
+            [download_product.s(info, telescope, object_name, self.request.id) for info in product_infos],
+            finalize_download.s(object_name, telescope, str(obs_filtered[0]['obsid']))
+        )
+        raise self.replace(workflow)
 
+    except (Ignore, Retry):
+        raise
+    except Exception as e:
+        logging.error(f"Erreur lors du téléchargement: {str(e)}")
         return {
-            'status': 'success',
-            'message': f"{len(uploaded_files)} fichiers traités avec succès pour {object_name}",
-            'files': uploaded_files
+            'status': 'error',
+            'message': f"Erreur lors du téléchargement: {str(e)}"
         }
 
+@celery_app.task(
+    name='download_product',
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=None
+)
+def download_product(self, product: Dict[str, Any], telescope: str, object_name: str,
+                     parent_id: str, attempt: int = 0) -> Dict[str, Any]:
+    """Télécharge et stocke un produit ; ne lève jamais pour ne pas faire échouer le chord"""
+    filename = os.path.basename(product['dataURI'])
+
+    # Limite par téléchargement parent : on rend la main au pool plutôt que d'attendre
+    task_slots = RedisSemaphore(f"download:task-slots:{parent_id}", settings.DOWNLOAD_MAX_CONCURRENCY_PER_TASK)
+    slot = task_slots.try_acquire()
+    if slot is None:
+        if self.request.retries < settings.DOWNLOAD_SLOT_MAX_RETRIES:
+            raise self.retry(countdown=settings.DOWNLOAD_SLOT_RETRY_DELAY)
+        # Places jamais libérées : le produit est compté en échec plutôt que d'attendre sans fin
+        logging.error(f"Aucune place de téléchargement libérée pour {filename}, abandon")
+        DownloadProgress(parent_id).record(False, product.get('size'))
+        return {'file': filename, 'path': None, 'size': product.get('size'), 'metadata': None}
+
+    try:
+        storage_path = _fetch_and_store(product, telescope, object_name,
+                                        DownloadCheckpoint(telescope, object_name))
     except Exception as e:
-        logging.error(f"Erreur lors du téléchargement: {str(e)}")
+        logging.error(f"Erreur lors du traitement de {filename}: {str(e)}")
+        # Erreurs réseau : on relance, les parts déjà stockées seront reprises
+        if attempt < settings.DOWNLOAD_MAX_RETRIES:
+            raise self.retry(
+                args=(product, telescope, object_name, parent_id, attempt + 1),
+                countdown=settings.DOWNLOAD_RETRY_DELAY
+            )
+        storage_path = None
+    finally:
+        task_slots.release(slot)
+
+    metadata = _read_metadata(storage_path) if storage_path else None
+    if metadata and storage_service.manifest is not None:
+        storage_service.manifest.annotate(
+            storage_path,
+            filter=", ".join(metadata['filters']) or None,
+            instrument=metadata.get('instrument')
+        )
+    DownloadProgress(parent_id).record(storage_path is not None, product.get('size'))
+    return {'file': filename, 'path': storage_path, 'size': product.get('size'), 'metadata': metadata}
+
+def _read_metadata(storage_path: str) -> Optional[Dict[str, Any]]:
+    """Extrait une fois pour toutes les en-têtes d'un fichier tout juste stocké"""
+    try:
+        # Produits calibrés HST/JWST : en-tête primaire puis SCI en première extension
+        headers = storage_service.read_fits_headers(storage_path, max_hdus=2)
+        return extract_fits_metadata(headers) if headers else None
+    except Exception as e:
+        logging.error(f"Erreur lors de la lecture des en-têtes de {storage_path}: {str(e)}")
+        return None
+
+@celery_app.task(name='finalize_download')
+def finalize_download(results: List[Dict[str, Any]], object_name: str,
+                      telescope: str, obsid: str) -> Dict[str, Any]:
+    """Agrège les résultats des sous-tâches (dans l'ordre des produits MAST)"""
+    uploaded_files = [result['path'] for result in results if result['path']]
+    observation_id = observation_service.save_ingested_observation(obsid, telescope, object_name, results)
+
+    if not uploaded_files:
         return {
             'status': 'error',
-            'message': f"Erreur lors du téléchargement: {str(e)}"
+            'message': "Échec du téléchargement ou du stockage des fichiers"
         }
 
+    return {
+        'status': 'success',
+        'message': f"{len(uploaded_files)} fichiers traités avec succès pour {object_name}",
+        'files': uploaded_files,
+        'observation_id': observation_id
+    }
+
+DOWNLOAD_FLIGHT_PREFIX = "download:flight:"
+GC_LOCK_KEY = "storage:gc:lock"
+
+@celery_app.task(name='collect_storage_garbage')
+def collect_storage_garbage() -> Dict[str, Any]:
+    """Ramasse-miettes du stockage : mark depuis la base, puis sweep incrémental du bucket"""
+    # Un seul passage à la fois, même si beat empile des exécutions en retard
+    if not redis_client.set(GC_LOCK_KEY, "1", nx=True, ex=settings.GC_INTERVAL):
+        return {"status": "skipped", "message": "Garbage collection already running"}
+    try:
+        flights = SingleFlight(
+            prefix=DOWNLOAD_FLIGHT_PREFIX,
+            inflight_ttl=settings.DOWNLOAD_INFLIGHT_TTL,
+            freshness=settings.DOWNLOAD_RESULT_FRESHNESS
+        )
+        live = mark_live_objects(storage_service, active_downloads=bool(flights.in_flight()))
+        collector = GarbageCollector(storage_service.backend, retention={
+            "transfer": settings.GC_TRANSFER_RETENTION,
+            "content": settings.GC_CONTENT_RETENTION,
+            "intermediate": settings.GC_INTERMEDIATE_RETENTION,
+            "mosaic": settings.GC_MOSAIC_RETENTION,
+            "step_cache": settings.GC_STEP_CACHE_RETENTION
+        }, referenced_since=storage_service.referenced_since)
+        report = collector.sweep(live, settings.GC_BATCH_SIZE, settings.GC_MAX_OBJECTS_PER_RUN)
+        logging.info(
+            f"Storage GC: {report['deleted']}/{report['scanned']} objects deleted, "
+            f"{report['bytes_reclaimed'] / 2**20:.1f} MiB reclaimed"
+            f"{'' if report['complete'] else ' (partial pass)'}"
+        )
+        return {"status": "success", **report}
+    except Exception as e:
+        logging.error(f"Storage GC failed: {str(e)}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        redis_client.delete(GC_LOCK_KEY)
+
+def _normalize_object_name(object_name: str) -> str:
+    """Forme canonique d'un nom de cible pour le regroupement des requêtes"""
+    return " ".join(object_name.split()).lower()
+
 class TaskService:
+    def __init__(self):
+        self.download_flights = SingleFlight(
+            prefix=DOWNLOAD_FLIGHT_PREFIX,
+            inflight_ttl=settings.DOWNLOAD_INFLIGHT_TTL,
+            freshness=settings.DOWNLOAD_RESULT_FRESHNESS
+        )
+
+    def submit_download(self, object_name: str, telescope: str) -> Dict[str, Any]:
+        """Lance download_fits, ou rattache la requête à un téléchargement identique"""
+        key = f"{telescope}:{_normalize_object_name(object_name)}"
+        task_id, shared = self.download_flights.submit(
+            key,
+            lambda new_id: download_fits.apply_async(
+                kwargs={'object_name': object_name, 'telescope': telescope},
+                task_id=new_id
+            )
+        )
+        if shared:
+            logging.info(f"Téléchargement {key} rattaché à la tâche {task_id}")
+        return {"task_id": task_id, "shared": shared}
+
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
-        """Récupère le statut d'une tâche"""
+        """Récupère le statut d'une tâche, avec la progression agrégée des sous-tâches"""
         task = celery_app.AsyncResult(task_id)
-        return {
+        status = {
             "task_id": task_id,
             "status": task.status,
             "result": task.result if task.ready() else None
         }
+        progress = DownloadProgress(task_id).snapshot()
+        if progress:
+            status["progress"] = progress
+        elif task.state == 'PROGRESS' and isinstance(task.info, dict):
+            # Avancement publié par la tâche elle-même (upload de résultats)
+            status["progress"] = task.info
+        return status
@@ -0,0 +1,109 @@
+# app/services/task/singleflight.py
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+from celery.result import AsyncResult
+from redis import Redis
+from app.core.celery import celery_app
+from app.core.redis import redis_client
+
+# États d'une tâche encore en cours (PROGRESS est l'état personnalisé de download_fits)
+IN_FLIGHT_STATES = {'PENDING', 'RECEIVED', 'STARTED', 'PROGRESS', 'RETRY'}
+
+# Remplace la clé seulement si elle pointe toujours vers la tâche observée
+_COMPARE_AND_SET = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Supprime la clé seulement si elle pointe toujours vers la tâche donnée
+_COMPARE_AND_DELETE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """Regroupe les soumissions identiques de tâches Celery derrière un même id.
+
+    Une requête identique à une tâche en cours récupère l'id de celle-ci ; un
+    résultat réussi est réutilisé tant qu'il a moins de freshness secondes.
+    """
+
+    def __init__(self, prefix: str, inflight_ttl: int, freshness: int,
+                 client: Redis = redis_client):
+        self.prefix = prefix
+        self.inflight_ttl = inflight_ttl
+        self.freshness = freshness
+        self.client = client
+        self._compare_and_set = client.register_script(_COMPARE_AND_SET)
+        self._compare_and_delete = client.register_script(_COMPARE_AND_DELETE)
+
+    def _is_reusable(self, result: AsyncResult) -> bool:
+        state = result.state
+        if state in IN_FLIGHT_STATES:
+            return True
+        if state != 'SUCCESS':
+            return False
+        # download_fits signale ses échecs métier dans le résultat, pas par une exception
+        value = result.result
+        if isinstance(value, dict) and value.get('status') == 'error':
+            return False
+        date_done = result.date_done
+        if date_done is None:
+            return False
+        if date_done.tzinfo is None:
+            date_done = date_done.replace(tzinfo=timezone.utc)
+        age = (datetime.now(timezone.utc) - date_done).total_seconds()
+        return age < self.freshness
+
+    def _launch(self, flight_key: str, task_id: str, launch: Callable[[str], None]) -> None:
+        """Lance la tâche ; en cas d'échec (broker injoignable), libère la clé.
+
+        Sans cela, la clé désignerait une tâche jamais envoyée, que Celery voit
+        PENDING : les requêtes identiques s'y rattacheraient jusqu'à expiration.
+        """
+        try:
+            launch(task_id)
+        except Exception:
+            self._compare_and_delete(keys=[flight_key], args=[task_id])
+            raise
+
+    def submit(self, key: str, launch: Callable[[str], None]) -> Tuple[str, bool]:
+        """Retourne (task_id, partagé) ; launch(task_id) n'est appelé que pour une nouvelle tâche"""
+        flight_key = f"{self.prefix}{key}"
+        task_id = str(uuid.uuid4())
+
+        # Quelques essais suffisent : on ne perd une course que face à une autre soumission
+        for _ in range(3):
+            if self.client.set(flight_key, task_id, nx=True, ex=self.inflight_ttl):
+                self._launch(flight_key, task_id, launch)
+                return task_id, False
+
+            current = self.client.get(flight_key)
+            if current is None:
+                continue
+            current_id = current.decode()
+            if self._is_reusable(celery_app.AsyncResult(current_id)):
+                return current_id, True
+
+            if self._compare_and_set(keys=[flight_key], args=[current_id, task_id, self.inflight_ttl]):
+                self._launch(flight_key, task_id, launch)
+                return task_id, False
+
+        # Contention extrême : on lance une tâche indépendante plutôt que d'échouer
+        launch(task_id)
+        return task_id, False
+
+    def in_flight(self) -> List[str]:
+        """Clés dont la tâche associée n'est pas terminée"""
+        active = []
+        for flight_key in self.client.scan_iter(match=f"{self.prefix}*", count=500):
+            current = self.client.get(flight_key)
+            if current and celery_app.AsyncResult(current.decode()).state in IN_FLIGHT_STATES:
+                active.append(flight_key.decode()[len(self.prefix):])
+        return active
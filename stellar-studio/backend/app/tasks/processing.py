@@ -1,9 +1,66 @@
 # tasks/processing.py
+import base64
+import logging
+from typing import Any, Dict, Optional
 from app.core.celery import celery_app
-from app.services.minio_service import get_minio_client
-from astroquery.mast import Observations
+from app.core.config import settings
+from app.services.processing import processing_service
+from app.services.task.concurrency import RedisSemaphore
+from app.services.task.progress import UploadProgress
 
-@celery_app.task(name="app.tasks.process_fits")
-def process_fits(observation_id: int, workflow: str):
-    # Logique de traitement
-    pass
+# Aperçus en cours sur tous les workers : une place abandonnée expire avec le délai de l'API
+preview_slots = RedisSemaphore("processing:preview-slots", settings.PREVIEW_CONCURRENCY,
+                               ttl=settings.PREVIEW_TIMEOUT)
+
+@celery_app.task(name="app.tasks.process_fits", bind=True)
+def process_fits(self, observation_id: str, workflow: str,
+                 parameters: Optional[Dict[str, Dict[str, Any]]] = None,
+                 memory_limit: Optional[int] = None) -> Dict[str, Any]:
+    """Exécute un workflow sur une observation ; les étapes inchangées sont reprises du cache"""
+    progress = {'computed': 0, 'cached': 0}
+
+    def report(node, outcome):
+        progress[outcome] += 1
+        self.update_state(
+            state='PROGRESS',
+            meta={'status': f'Étape {node.id}', 'steps': dict(progress)}
+        )
+
+    try:
+        result = processing_service.run_workflow(
+            observation_id, workflow, parameters,
+            progress=report, memory_limit=memory_limit,
+            # Export des sorties : avancement et débit publiés dans l'état de la tâche
+            upload_progress=lambda object_name: UploadProgress(self, object_name)
+        )
+        return {'status': 'success', **result}
+    except Exception as e:
+        logging.error(f"Erreur lors du traitement de {observation_id}: {str(e)}")
+        return {'status': 'error', 'message': f"Erreur lors du traitement: {str(e)}"}
+
+@celery_app.task(name="app.tasks.preview_fits")
+def preview_fits(observation_id: str, workflow: str,
+                 parameters: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Aperçu PNG (base64) calculé sur un worker, jamais dans le process de l'API"""
+    slot = preview_slots.try_acquire()
+    if slot is None:
+        return {'status': 'busy', 'message': "Trop d'aperçus en cours"}
+    try:
+        result = processing_service.preview(observation_id, workflow, parameters)
+        return {
+            'status': 'success',
+            'image': base64.b64encode(result['image']).decode('ascii'),
+            'computed': result['computed'],
+            'cached': result['cached'],
+            'elapsed': result['elapsed']
+        }
+    except FileNotFoundError as e:
+        return {'status': 'not_found', 'message': str(e)}
+    except ValueError as e:
+        # Workflow ou paramètres inapplicables à l'observation
+        return {'status': 'invalid', 'message': str(e)}
+    except Exception as e:
+        logging.error(f"Erreur lors de l'aperçu de {observation_id}: {str(e)}")
+        return {'status': 'error', 'message': f"Erreur lors de l'aperçu: {str(e)}"}
+    finally:
+        preview_slots.release(slot)
@@ -1,4 +1,8 @@
 #!/bin/bash
 
+# Métriques Prometheus partagées entre les process prefork
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start Celery worker
 exec celery -A app.core.celery worker --loglevel=info
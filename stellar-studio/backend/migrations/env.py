@@ -28,6 +28,7 @@ try:
     from app.infrastructure.repositories.models.processing import ProcessingJob
     from app.infrastructure.repositories.models.task import Task
     from app.infrastructure.repositories.models.target import Target
+    from app.infrastructure.repositories.models.stored_file import StoredFile
     print("Models imported successfully!")
     print(f"Tables in metadata: {Base.metadata.tables.keys()}")
 except Exception as e:
@@ -0,0 +1,26 @@
+"""add_observation_fits_metadata
+
+Revision ID: 4f2a9c1d7e30
+Revises: xxx
+Create Date: 2026-10-17 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c1d7e30'
+down_revision: Union[str, None] = 'xxx'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('observations', sa.Column('fits_metadata', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('observations', 'fits_metadata')
@@ -0,0 +1,45 @@
+"""add_stored_files_manifest
+
+Revision ID: 7b3e5d2a9c41
+Revises: 4f2a9c1d7e30
+Create Date: 2026-10-17 15:47:09.318264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e5d2a9c41'
+down_revision: Union[str, None] = '4f2a9c1d7e30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stored_files',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('object_key', sa.String(length=512), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('telescope', sa.String(length=50), nullable=False),
+        sa.Column('target', sa.String(length=255), nullable=False),
+        sa.Column('product_type', sa.String(length=50), nullable=True),
+        sa.Column('filter', sa.String(length=100), nullable=True),
+        sa.Column('instrument', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('object_key')
+    )
+    op.create_index('ix_stored_files_inventory', 'stored_files', ['telescope', 'target', 'product_type'])
+    op.create_index('ix_stored_files_content_hash', 'stored_files', ['content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stored_files_content_hash', table_name='stored_files')
+    op.drop_index('ix_stored_files_inventory', table_name='stored_files')
+    op.drop_table('stored_files')
@@ -0,0 +1,82 @@
+# scripts/benchmark_compression.py
+"""Benchmark de la compression FITS par tuiles utilisée à l'ingestion.
+
+Usage :
+    python -m scripts.benchmark_compression [fichier.fits ...]
+
+Sans argument, des images synthétiques (fond bruité + étoiles) sont utilisées,
+en float32 (type des produits i2d/drz) et en int16 (type des masques DQ).
+Pour chaque mode, le rapport donne le taux de compression, le temps d'écriture,
+le temps de lecture complète des données et l'erreur maximale introduite.
+"""
+import io
+import sys
+import time
+import numpy as np
+from astropy.io import fits
+from app.services.storage.compression import (
+    FLOAT_LOSSLESS, FLOAT_QUANTIZED, compress_hdul, decompressed
+)
+
+def synthetic_image(shape=(4096, 4096), dtype=np.float32, seed=42) -> np.ndarray:
+    """Fond de ciel bruité avec quelques milliers de sources gaussiennes"""
+    rng = np.random.default_rng(seed)
+    image = rng.normal(100.0, 5.0, shape).astype(np.float32)
+    ys = rng.integers(0, shape[0], 3000)
+    xs = rng.integers(0, shape[1], 3000)
+    image[ys, xs] += rng.exponential(2000.0, 3000).astype(np.float32)
+    if np.issubdtype(dtype, np.integer):
+        return np.clip(image, 0, np.iinfo(dtype).max).astype(dtype)
+    return image
+
+def _serialize(hdul: fits.HDUList) -> bytes:
+    buffer = io.BytesIO()
+    hdul.writeto(buffer)
+    return buffer.getvalue()
+
+def _read_all(payload: bytes) -> np.ndarray:
+    with fits.open(io.BytesIO(payload)) as hdul:
+        hdul = decompressed(hdul)
+        return np.array(hdul[0].data if hdul[0].data is not None else hdul[1].data)
+
+def benchmark(name: str, hdul: fits.HDUList) -> None:
+    raw = _serialize(hdul)
+    start = time.perf_counter()
+    reference = _read_all(raw)
+    raw_read = time.perf_counter() - start
+    print(f"\n{name} : {len(raw) / 2**20:.1f} MiB non compressé, lecture {raw_read * 1000:.0f} ms")
+    print(f"  {'mode':<24}{'ratio':>8}{'écriture':>12}{'lecture':>12}{'erreur max':>14}")
+
+    modes = [("RICE_1 quantifié q=16", FLOAT_QUANTIZED, 16.0),
+             ("RICE_1 quantifié q=4", FLOAT_QUANTIZED, 4.0),
+             ("GZIP_2 sans perte", FLOAT_LOSSLESS, 0.0)]
+    if np.issubdtype(reference.dtype, np.integer):
+        modes = [("RICE_1 sans perte", FLOAT_LOSSLESS, 0.0)]
+
+    for label, float_mode, level in modes:
+        start = time.perf_counter()
+        compressed = compress_hdul(hdul, float_mode=float_mode, quantize_level=level)
+        payload = _serialize(compressed)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        data = _read_all(payload)
+        read_time = time.perf_counter() - start
+
+        error = float(np.nanmax(np.abs(data.astype(np.float64) - reference)))
+        print(f"  {label:<24}{len(raw) / len(payload):>8.2f}{write_time * 1000:>10.0f}ms"
+              f"{read_time * 1000:>10.0f}ms{error:>14.4g}")
+
+def main(paths) -> None:
+    if paths:
+        for path in paths:
+            with fits.open(path) as hdul:
+                hdul.readall()
+                benchmark(path, hdul)
+        return
+    for dtype in (np.float32, np.int16):
+        image = synthetic_image(dtype=dtype)
+        benchmark(f"Synthétique {image.shape} {image.dtype}", fits.HDUList([fits.PrimaryHDU(image)]))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+# scripts/benchmark_storage.py
+"""Benchmark des backends de stockage sur les accès du pipeline.
+
+Usage :
+    python -m scripts.benchmark_storage [minio] [filesystem] [memory]
+
+Sans argument, tous les backends sont mesurés (MinIO doit être joignable).
+Pour chaque backend, le rapport donne le débit d'écriture en flux (ingestion),
+de lecture complète (traitement), et la latence moyenne d'une lecture de
+quelques blocs FITS (en-têtes, découpes).
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+from app.services.storage.backends import FilesystemBackend, create_backend
+
+SIZE = 256 * 1024 * 1024
+RANGE_READS = 200
+RANGE_LENGTH = 8 * 2880
+
+def _throughput(size: int, elapsed: float) -> str:
+    return f"{size / 2**20 / elapsed:>8.0f} MiB/s"
+
+def benchmark(name: str, payload: bytes) -> None:
+    if name == "filesystem":
+        # Racine temporaire : ne touche pas au stockage du déploiement
+        backend = FilesystemBackend(tempfile.mkdtemp(prefix="storage-bench-"))
+    else:
+        backend = create_backend(name)
+    backend.ensure_bucket()
+    object_name = "benchmark/payload.bin"
+
+    start = time.perf_counter()
+    backend.put_stream(object_name, io.BytesIO(payload), length=-1)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with backend.open(object_name) as reader:
+        for _ in reader.stream(16 * 1024 * 1024):
+            pass
+    read_time = time.perf_counter() - start
+
+    step = (len(payload) - RANGE_LENGTH) // RANGE_READS
+    start = time.perf_counter()
+    for index in range(RANGE_READS):
+        backend.read_range(object_name, index * step, RANGE_LENGTH)
+    range_time = (time.perf_counter() - start) / RANGE_READS
+
+    backend.remove(object_name)
+    print(f"  {name:<12}{_throughput(len(payload), write_time)}{_throughput(len(payload), read_time)}"
+          f"{range_time * 1000:>10.2f} ms")
+
+def main(names) -> None:
+    payload = os.urandom(SIZE)
+    print(f"Objet de {SIZE / 2**20:.0f} MiB, lectures Range de {RANGE_LENGTH} octets")
+    print(f"  {'backend':<12}{'écriture':>14}{'lecture':>14}{'Range':>13}")
+    for name in names or ("memory", "filesystem", "minio"):
+        try:
+            benchmark(name, payload)
+        except Exception as e:
+            print(f"  {name:<12}indisponible : {e}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+# scripts/benchmark_stretch.py
+"""Benchmark des courbes d'étirement sur des images de 100 MP.
+
+Usage :
+    python -m scripts.benchmark_stretch [largeur] [hauteur]
+
+Par défaut, une image float32 de 10000 x 10000 pixels (fond bruité + étoiles).
+Pour chaque courbe, le rapport compare l'étirement en place par blocs à une
+écriture numpy directe (temporaires pleine taille, percentiles par tri complet),
+puis la sortie 16 bits par table de correspondance à l'évaluation directe.
+"""
+import sys
+import time
+import numpy as np
+from app.services.processing import stretch as stretching
+
+def synthetic_image(shape, seed=42) -> np.ndarray:
+    """Fond de ciel bruité avec quelques milliers de sources"""
+    rng = np.random.default_rng(seed)
+    image = rng.normal(100.0, 5.0, shape).astype(np.float32)
+    count = max(1, image.size // 30000)
+    ys = rng.integers(0, shape[0], count)
+    xs = rng.integers(0, shape[1], count)
+    image[ys, xs] += rng.exponential(2000.0, count).astype(np.float32)
+    return image
+
+def naive_stretch(data: np.ndarray, method: str, factor: float = 10.0) -> np.ndarray:
+    """Version de référence : expressions numpy sur l'image entière"""
+    low, high = np.nanpercentile(data, [0.5, 99.5])
+    x = np.clip((data - low) / (high - low), 0, 1)
+    if method == 'asinh':
+        return np.arcsinh(factor * x) / np.arcsinh(factor)
+    if method == 'log':
+        return np.log1p(factor * x) / np.log1p(factor)
+    if method == 'mtf':
+        median = np.median(x)
+        sigma = stretching.MAD_TO_SIGMA * np.median(np.abs(x - median))
+        shadows = max(median + stretching.DEFAULT_SHADOWS_CLIP * sigma, 0.0)
+        x = np.clip((x - shadows) / (1 - shadows), 0, 1)
+        m = stretching.mtf(stretching.DEFAULT_TARGET_BACKGROUND, (median - shadows) / (1 - shadows))
+        return stretching.mtf(m, x)
+    return x
+
+def _timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def main(arguments) -> None:
+    width, height = (int(value) for value in (arguments + ["10000", "10000"])[:2])
+    image = synthetic_image((height, width))
+    pixels = image.size
+    print(f"Image float32 de {width} x {height} ({pixels / 1e6:.0f} MP)")
+    print(f"  {'courbe':<10}{'numpy':>10}{'en place':>12}{'uint16 direct':>16}{'uint16 table':>15}")
+    for method in ('linear', 'asinh', 'log', 'mtf'):
+        factor = 1000.0 if method == 'log' else 10.0
+        naive = _timed(lambda: naive_stretch(image, method, factor))
+        buffer = image.copy()
+        in_place = _timed(lambda: stretching.stretch(buffer, method=method, factor=factor))
+
+        buffer = image.copy()
+        direct = _timed(lambda: (stretching.stretch(buffer, method=method, factor=factor) * 65535
+                                 + 0.5).astype(np.uint16))
+        buffer = image.copy()
+        table = _timed(lambda: stretching.stretch_to_uint(buffer, method=method, factor=factor))
+        print(f"  {method:<10}{naive:>9.2f}s{in_place:>11.2f}s{direct:>15.2f}s{table:>14.2f}s")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
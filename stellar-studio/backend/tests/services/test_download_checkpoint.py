@@ -0,0 +1,29 @@
+# tests/services/test_download_checkpoint.py
+import io
+import fakeredis
+import pytest
+from app.services.storage.backends import MemoryBackend
+from app.services.storage.service import StorageService
+from app.services.task.checkpoint import DownloadCheckpoint
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+@pytest.fixture
+def storage(client):
+    return StorageService(backend=MemoryBackend(), client=client)
+
+class TestDownloadCheckpoint:
+    def test_deleting_a_file_clears_its_checkpoint_entry(self, storage, client):
+        digest = storage.store_content_stream(io.BytesIO(b"fits" * 100), "staging/jwst/m16/jw01_cal.fits")
+        storage.link_content("jwst/m16/jw01_cal.fits", digest)
+        checkpoint = DownloadCheckpoint("jwst", "m16", client)
+        checkpoint.mark_file_done("jw01_cal.fits", "jwst/m16/jw01_cal.fits")
+
+        assert storage.delete_fits_file("jwst/m16/jw01_cal.fits")
+
+        assert checkpoint.stored_path("jw01_cal.fits") is None
+
+    def test_other_names_have_no_checkpoint(self):
+        assert DownloadCheckpoint.for_storage_path("mosaic.fits") is None
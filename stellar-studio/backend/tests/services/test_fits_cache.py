@@ -0,0 +1,43 @@
+# tests/services/test_fits_cache.py
+import io
+import numpy as np
+import pytest
+from astropy.io import fits
+from app.services.storage.backends import MemoryBackend
+from app.services.storage.compression import compress_hdul
+from app.services.storage.local_cache import FitsDiskCache
+from app.services.storage.service import StorageService
+
+DATA = (np.arange(64 * 48, dtype=np.int32).reshape(64, 48) % 300).astype(np.int16)
+
+@pytest.fixture
+def storage():
+    return StorageService(backend=MemoryBackend())
+
+@pytest.fixture
+def cache(storage, tmp_path):
+    return FitsDiskCache(storage, str(tmp_path / "fits-cache"), 2**30)
+
+def store(storage: StorageService, object_name: str, hdul: fits.HDUList) -> None:
+    buffer = io.BytesIO()
+    hdul.writeto(buffer)
+    digest = storage.store_content_stream(io.BytesIO(buffer.getvalue()), f"staging/{object_name}")
+    storage.link_content(object_name, digest)
+
+class TestFitsDiskCache:
+    def test_missing_object_raises_file_not_found(self, cache):
+        with pytest.raises(FileNotFoundError):
+            with cache.open("jwst/m16/missing_cal.fits"):
+                pass
+
+    @pytest.mark.parametrize("compressed", [False, True])
+    def test_open_reads_the_primary_image_and_closes_the_file(self, storage, cache, compressed):
+        hdul = fits.HDUList([fits.PrimaryHDU(DATA)])
+        store(storage, "jwst/m16/jw01_cal.fits", compress_hdul(hdul) if compressed else hdul)
+
+        with cache.open("jwst/m16/jw01_cal.fits") as opened:
+            assert np.array_equal(opened[0].data, DATA)
+            assert len(opened) == 1
+
+        # Le fichier mappé d'origine est refermé avec la liste
+        assert opened._file.closed
@@ -0,0 +1,59 @@
+# tests/services/test_fits_compression.py
+import io
+import numpy as np
+import pytest
+from astropy.io import fits
+from app.core.config import settings
+from app.services.storage.backends import MemoryBackend
+from app.services.storage.service import CONTENT_SIZE_META, SOURCE_SIZE_META, StorageService
+
+@pytest.fixture
+def storage():
+    return StorageService(backend=MemoryBackend())
+
+def fits_bytes(data: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    fits.HDUList([fits.PrimaryHDU(data), fits.ImageHDU(data[:8], name='ERR')]).writeto(buffer)
+    return buffer.getvalue()
+
+class TestCompressContent:
+    # Petit seuil : le fichier de travail passe sur disque
+    @pytest.mark.parametrize("spool_size", [256 * 1024 * 1024, 1024])
+    def test_compressed_content_reads_back_unchanged(self, storage, monkeypatch, spool_size):
+        monkeypatch.setattr(settings, "FITS_SPOOL_SIZE", spool_size)
+        data = (np.arange(128 * 96, dtype=np.int32).reshape(128, 96) % 500).astype(np.int16)
+        raw = fits_bytes(data)
+        digest = storage.store_content_stream(io.BytesIO(raw), "staging/jwst/m16/jw01_cal.fits")
+
+        compressed = storage.compress_content(digest)
+
+        assert compressed not in (None, digest)
+        assert storage.backend.stat(storage.content_name(compressed)).size < len(raw)
+        assert storage.link_content("jwst/m16/jw01_cal.fits", compressed, source_size=len(raw))
+        with storage.open_fits("jwst/m16/jw01_cal.fits") as hdul:
+            assert np.array_equal(hdul[0].data, data)
+            assert np.array_equal(hdul['ERR'].data, data[:8])
+        _, section = storage.read_fits_section("jwst/m16/jw01_cal.fits", rows=(10, 20), cols=(5, 9))
+        assert np.array_equal(section, data[10:20, 5:9])
+
+    def test_reference_carries_stored_and_product_sizes(self, storage):
+        data = np.zeros((64, 64), dtype=np.int16)
+        raw = fits_bytes(data)
+        digest = storage.compress_content(
+            storage.store_content_stream(io.BytesIO(raw), "staging/jwst/m16/jw01_cal.fits")
+        )
+
+        storage.link_content("jwst/m16/jw01_cal.fits", digest, source_size=len(raw))
+
+        metadata = storage.backend.stat("jwst/m16/jw01_cal.fits").metadata
+        assert int(metadata[CONTENT_SIZE_META]) == storage.backend.stat(storage.content_name(digest)).size
+        assert int(metadata[SOURCE_SIZE_META]) == len(raw)
+        # Un produit déjà stocké se reconnaît à sa taille MAST
+        assert storage.fits_file_exists("jwst/m16/jw01_cal.fits", len(raw))
+
+    def test_nothing_to_compress_keeps_the_digest(self, storage):
+        buffer = io.BytesIO()
+        fits.PrimaryHDU().writeto(buffer)
+        digest = storage.store_content_stream(io.BytesIO(buffer.getvalue()), "staging/empty.fits")
+
+        assert storage.compress_content(digest) == digest
@@ -0,0 +1,55 @@
+# tests/services/test_mast_cache.py
+import fakeredis
+import numpy as np
+import pytest
+from astropy.table import MaskedColumn, Table
+from astroquery.mast import Observations
+from app.services.mast.cache import MastCache
+
+@pytest.fixture
+def cache():
+    return MastCache(max_entries=2, client=fakeredis.FakeRedis(), prefix="test:mast:")
+
+def product_table() -> Table:
+    return Table({
+        'obsID': ['1001', '1002'],
+        'productType': ['SCIENCE', 'PREVIEW'],
+        'productFilename': ['jw01_i2d.fits', 'jw01_i2d.jpg'],
+        'dataURI': ['mast:JWST/product/jw01_i2d.fits', 'mast:JWST/product/jw01_i2d.jpg'],
+        'size': MaskedColumn([1024, 0], mask=[False, True])
+    })
+
+class TestMastCache:
+    def test_round_trip_keeps_text_columns_and_masks(self, cache):
+        cache.set('products', 'jw01', product_table(), ttl=60)
+        cached = cache.get('products', 'jw01')
+
+        assert cached['productType'].dtype.kind == 'U'
+        assert list(cached['productFilename']) == ['jw01_i2d.fits', 'jw01_i2d.jpg']
+        assert cached['size'].mask.tolist() == [False, True]
+
+    def test_cached_table_filters_like_the_original(self, cache):
+        original = product_table()
+        cache.set('products', 'jw01', original, ttl=60)
+        cached = cache.get('products', 'jw01')
+
+        filtered = Observations.filter_products(cached, productType=["SCIENCE"], extension="fits")
+        expected = Observations.filter_products(original, productType=["SCIENCE"], extension="fits")
+        assert len(filtered) == len(expected) == 1
+
+    def test_miss_returns_none(self, cache):
+        assert cache.get('products', 'unknown') is None
+
+    def test_least_recently_used_entry_is_evicted(self, cache):
+        for key in ('a', 'b', 'c'):
+            cache.set('products', key, product_table(), ttl=60)
+
+        assert cache.get('products', 'a') is None
+        assert cache.get('products', 'c') is not None
+
+    def test_unserializable_table_is_not_cached(self, cache):
+        table = Table({'values': np.array([{'a': 1}, None], dtype=object)})
+
+        cache.set('products', 'objects', table, ttl=60)
+
+        assert cache.get('products', 'objects') is None
@@ -0,0 +1,79 @@
+# tests/services/test_parallel_upload.py
+import numpy as np
+import pytest
+from astropy.io import fits
+from app.core.config import settings
+from app.services.processing.export import write_fits
+from app.services.storage.arrays import ChunkedArrayStore
+from app.services.storage.backends import MemoryBackend, StorageError
+from app.services.storage.service import StorageService
+
+class FlakyPartsBackend(MemoryBackend):
+    """Backend mémoire dont une part échoue un nombre donné de fois"""
+
+    def __init__(self, part_number: int, failures: int):
+        super().__init__()
+        self.part_number = part_number
+        self.failures = failures
+        self.aborted = []
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        if part_number == self.part_number and self.failures > 0:
+            self.failures -= 1
+            raise StorageError(f"part {part_number} lost")
+        return super().upload_part(object_name, upload_id, part_number, data)
+
+    def abort_multipart(self, object_name: str, upload_id: str) -> None:
+        self.aborted.append(upload_id)
+        super().abort_multipart(object_name, upload_id)
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_RETRY_DELAY", 0.0)
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "result.fits"
+    path.write_bytes(bytes(range(256)) * 40)
+    return str(path)
+
+class TestParallelUpload:
+    def test_failed_part_is_retried(self, local_file):
+        backend = FlakyPartsBackend(part_number=3, failures=settings.UPLOAD_PART_RETRIES)
+        storage = StorageService(backend=backend)
+        reports = []
+
+        assert storage.upload_file_parallel(local_file, "jwst/m16/processed/a_processed.fits",
+                                            part_size=1024, concurrency=4,
+                                            progress=lambda sent, total: reports.append((sent, total)))
+
+        with open(local_file, "rb") as source:
+            assert backend.objects["jwst/m16/processed/a_processed.fits"] == source.read()
+        assert reports[-1] == (10240, 10240)
+        assert not backend.aborted
+        # Parts assemblées puis supprimées
+        assert [info.name for info in backend.list("")] == ["jwst/m16/processed/a_processed.fits"]
+
+    def test_lost_part_aborts_the_upload(self, local_file):
+        backend = FlakyPartsBackend(part_number=3, failures=settings.UPLOAD_PART_RETRIES + 1)
+        storage = StorageService(backend=backend)
+
+        assert not storage.upload_file_parallel(local_file, "jwst/m16/processed/a_processed.fits",
+                                                part_size=1024, concurrency=4)
+
+        assert len(backend.aborted) == 1
+        # Ni objet final ni parts orphelines
+        assert list(backend.list("")) == []
+
+class TestFitsExport:
+    def test_export_matches_the_cached_result(self, tmp_path):
+        store = ChunkedArrayStore(MemoryBackend(), default_chunk=16)
+        data = np.random.default_rng(0).normal(size=(3, 40, 50)).astype(np.float32)
+        array = store.save("step-abc", data)
+        path = str(tmp_path / "out.fits")
+
+        write_fits(array, path, {'WORKFLOW': 'wf-1'})
+
+        with fits.open(path) as hdul:
+            assert hdul[0].header['WORKFLOW'] == 'wf-1'
+            assert np.array_equal(hdul[0].data, data)
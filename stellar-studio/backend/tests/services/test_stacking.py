@@ -0,0 +1,62 @@
+# tests/services/test_stacking.py
+import numpy as np
+import pytest
+from app.services.processing.stacking import StackParameters, StackRunner, combine, reject
+
+def exposures(frames: int = 8, shape=(40, 30), seed: int = 0) -> np.ndarray:
+    cube = np.random.default_rng(seed).normal(100.0, 5.0, size=(frames,) + shape).astype(np.float32)
+    cube[3, ..., 5, 7] = 5000.0  # Rayon cosmique
+    cube[6, ..., 20, 11] = -4000.0  # Pixel mort
+    cube[:, ..., 0, 0] = np.nan  # Hors champ dans toutes les images
+    return cube
+
+class TestRejection:
+    @pytest.mark.parametrize("method", ["sigma_clip", "winsorized"])
+    def test_outliers_are_rejected(self, method):
+        cube = exposures()
+        parameters = StackParameters(method=method)
+
+        result = combine(cube.copy(), parameters)
+
+        assert abs(result[5, 7] - 100.0) < 10
+        assert abs(result[20, 11] - 100.0) < 10
+        assert np.isnan(result[0, 0])
+
+    def test_plain_mean_keeps_outliers(self):
+        result = combine(exposures(), StackParameters(method='mean'))
+
+        assert result[5, 7] > 500
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    def test_reject_counts_replaced_values(self):
+        cube = exposures()
+
+        rejected = reject(cube, StackParameters(method='winsorized'))
+
+        assert rejected >= 2
+        assert np.isnan(cube[3, 5, 7]) and np.isnan(cube[6, 20, 11])
+
+    def test_weights_must_match_frames(self):
+        with pytest.raises(ValueError):
+            StackParameters.from_parameters({'method': 'mean', 'weights': [1.0, 2.0]}, frames=3)
+
+class TestStackRunner:
+    @pytest.mark.parametrize("method", ["median", "mean", "sigma_clip", "winsorized"])
+    def test_streamed_bands_match_the_in_memory_cube(self, method):
+        cube = exposures(frames=7, shape=(2, 70, 30))
+        weights = [1.0, 2.0, 1.0, 0.5, 1.0, 1.5, 1.0] if method != 'median' else None
+        parameters = StackParameters(method=method, weights=weights)
+        expected = combine(cube.copy(), parameters)
+        output = np.full(cube.shape[1:], -1.0, dtype=np.float32)
+
+        def write(region, data):
+            output[region] = data
+
+        # Plafond mémoire de quelques bandes : lecture de 16 lignes à la fois
+        runner = StackRunner(memory_limit=5 * 7 * 2 * 30 * 4 * 16, max_workers=2, min_rows=8)
+        assert runner.should_stream(len(cube), cube.shape[1:])
+        reads = [lambda region, frame=frame: frame[region] for frame in cube]
+        bands = runner.run(parameters, cube.shape[1:], reads, write, alignment=8)
+
+        assert bands > 1
+        assert np.array_equal(output, expected, equal_nan=True)
@@ -0,0 +1,176 @@
+# tests/services/test_storage_gc.py
+import io
+import time
+from datetime import datetime, timedelta, timezone
+import fakeredis
+import numpy as np
+import pytest
+from app.services.storage.arrays import ChunkedArrayStore
+from app.services.storage.backends import MemoryBackend, StorageError
+from app.services.storage.service import StorageService
+from app.services.task.gc import REFERENCE_CLOCK_MARGIN, GarbageCollector, LiveSet
+
+DAY = 24 * 3600
+RETENTION = {"transfer": DAY, "content": DAY, "intermediate": DAY, "mosaic": DAY, "step_cache": 7 * DAY}
+
+class FlakyBackend(MemoryBackend):
+    """Backend mémoire dont certaines suppressions échouent"""
+
+    def __init__(self):
+        super().__init__()
+        self.undeletable = set()
+        self.refuse_batches = False
+        # Appelé une fois après le premier objet listé : écriture concurrente d'un balayage
+        self.during_list = None
+
+    def remove(self, object_name: str) -> None:
+        if object_name in self.undeletable:
+            raise StorageError(f"cannot delete {object_name}")
+        super().remove(object_name)
+
+    def remove_many(self, object_names):
+        if self.refuse_batches:
+            raise StorageError("bulk delete refused")
+        return super().remove_many(object_names)
+
+    def list(self, prefix: str = "", start_after=None):
+        for index, info in enumerate(super().list(prefix, start_after)):
+            yield info
+            if index == 0 and self.during_list is not None:
+                self.during_list()
+                self.during_list = None
+
+def age(backend: MemoryBackend, prefix: str, days: float) -> None:
+    """Vieillit les objets sous prefix"""
+    for info in backend.list(prefix):
+        info.last_modified = datetime.now(timezone.utc) - timedelta(days=days)
+
+@pytest.fixture
+def backend():
+    return FlakyBackend()
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis()
+
+@pytest.fixture
+def storage(backend, client):
+    return StorageService(backend=backend, client=client)
+
+@pytest.fixture
+def store(backend):
+    return ChunkedArrayStore(backend, default_chunk=4)
+
+@pytest.fixture
+def collector(backend, storage, client):
+    return GarbageCollector(backend, RETENTION, client=client, key_prefix="test:gc:",
+                            referenced_since=storage.referenced_since)
+
+def names(backend: MemoryBackend, prefix: str = "") -> list:
+    return [info.name for info in backend.list(prefix)]
+
+class TestGarbageCollector:
+    def test_content_named_by_a_product_reference_survives(self, backend, storage, collector):
+        kept = storage.store_content_stream(io.BytesIO(b"kept" * 100), "staging/kept")
+        orphan = storage.store_content_stream(io.BytesIO(b"orphan" * 100), "staging/orphan")
+        storage.register_product("mast:JWST/product/jw01_i2d.fits@400", kept)
+        age(backend, "objects/", 3)
+        # Phase mark postérieure aux écritures ci-dessus
+        live = LiveSet(digests=storage.product_digests(), marked_at=time.time() + 2 * REFERENCE_CLOCK_MARGIN)
+
+        report = collector.sweep(live, batch_size=10, max_objects=100)
+
+        assert report["deleted"] == 1
+        assert storage.content_name(orphan) not in names(backend)
+        assert storage.content_name(kept) in names(backend)
+
+    def test_reference_written_during_a_sweep_keeps_its_content(self, backend, storage, collector):
+        reused = storage.store_content_stream(io.BytesIO(b"reused" * 100), "staging/reused")
+        age(backend, "objects/", 3)
+        live = LiveSet()  # Phase mark : aucune racine
+        backend.during_list = lambda: storage.link_content("jwst/m16/reused_i2d.fits", reused)
+
+        report = collector.sweep(live, batch_size=10, max_objects=100)
+
+        assert report["deleted"] == 0
+        assert storage.content_name(reused) in names(backend)
+
+    def test_content_is_kept_without_a_reference_journal(self, backend, storage):
+        orphan = storage.store_content_stream(io.BytesIO(b"orphan" * 100), "staging/orphan")
+        age(backend, "objects/", 3)
+        collector = GarbageCollector(backend, RETENTION, client=fakeredis.FakeRedis(), key_prefix="test:gc:")
+
+        collector.sweep(LiveSet(), batch_size=10, max_objects=100)
+
+        assert storage.content_name(orphan) in names(backend)
+
+    def test_content_is_kept_while_roots_are_incomplete(self, backend, storage, collector):
+        orphan = storage.store_content_stream(io.BytesIO(b"orphan" * 100), "staging/orphan")
+        age(backend, "objects/", 3)
+
+        collector.sweep(LiveSet(sweep_content=False), batch_size=10, max_objects=100)
+
+        assert storage.content_name(orphan) in names(backend)
+
+    def test_expired_array_is_swept_whole(self, backend, store, collector):
+        store.save("job-1", np.ones((8, 8), dtype=np.float32))
+        age(backend, "arrays/job-1/", 2)
+
+        report = collector.sweep(LiveSet(), batch_size=2, max_objects=100)
+
+        assert names(backend, "arrays/") == []
+        assert report["by_rule"]["intermediate"]["objects"] == 5
+
+    def test_chunks_are_kept_when_the_manifest_cannot_be_deleted(self, backend, store, collector):
+        store.save("job-1", np.ones((8, 8), dtype=np.float32))
+        age(backend, "arrays/job-1/", 2)
+        backend.undeletable.add(store.manifest_key("job-1"))
+
+        report = collector.sweep(LiveSet(), batch_size=10, max_objects=100)
+
+        assert report["failed"] == 1
+        assert np.array_equal(store.open("job-1").read(), np.ones((8, 8), dtype=np.float32))
+
+    def test_refused_batch_keeps_the_array(self, backend, store, collector):
+        store.save("job-1", np.ones((8, 8), dtype=np.float32))
+        age(backend, "arrays/job-1/", 2)
+        backend.refuse_batches = True
+
+        report = collector.sweep(LiveSet(), batch_size=10, max_objects=100)
+
+        assert (report["deleted"], report["failed"]) == (0, 1)
+        assert len(names(backend, "arrays/job-1/")) == 5
+
+    def test_partial_pass_never_stops_inside_an_array(self, backend, store, collector):
+        store.save("job-1", np.ones((8, 8), dtype=np.float32))
+        store.save("job-2", np.ones((8, 8), dtype=np.float32))
+        age(backend, "arrays/", 2)
+
+        report = collector.sweep(LiveSet(), batch_size=10, max_objects=1)
+
+        assert not report["complete"]
+        assert names(backend, "arrays/job-1/") == []
+        assert len(names(backend, "arrays/job-2/")) == 5
+        collector.sweep(LiveSet(), batch_size=10, max_objects=100)
+        assert names(backend, "arrays/") == []
+
+    def test_active_and_recent_arrays_are_kept(self, backend, store, collector):
+        store.save("job-1", np.ones((8, 8), dtype=np.float32))
+        store.save("step-abc", np.ones((8, 8), dtype=np.float32))
+        age(backend, "arrays/job-1/", 2)
+        age(backend, "arrays/step-abc/", 2)
+
+        collector.sweep(LiveSet(active_ids={"job-1"}), batch_size=10, max_objects=100)
+
+        assert len(names(backend, "arrays/job-1/")) == 5
+        assert len(names(backend, "arrays/step-abc/")) == 5
+
+    def test_reused_step_cache_is_refreshed(self, backend, store, collector):
+        store.save("step-abc", np.ones((8, 8), dtype=np.float32))
+        age(backend, "arrays/step-abc/", 8)
+
+        store.touch("step-abc", min_age=3600)
+        collector.sweep(LiveSet(), batch_size=10, max_objects=100)
+
+        # Blocs anciens, manifeste rafraîchi : le tableau entier est conservé
+        assert np.array_equal(store.open("step-abc").read(), np.ones((8, 8), dtype=np.float32))
@@ -0,0 +1,69 @@
+# tests/services/test_workflow_executor.py
+import io
+import numpy as np
+import pytest
+from astropy.io import fits
+from app.domain.models.workflow import ProcessingStep, ProcessingStepType, Workflow
+from app.services.processing.dag import WorkflowDag
+from app.services.processing.executor import WorkflowExecutor
+from app.services.processing.service import apply_overrides
+from app.services.storage.arrays import ChunkedArrayStore
+from app.services.storage.backends import MemoryBackend
+from app.services.storage.local_cache import FitsDiskCache
+from app.services.storage.service import StorageService
+
+FILES = [f"jwst/m16/jw01_{index}_cal.fits" for index in range(3)]
+
+def workflow(*steps: ProcessingStep) -> Workflow:
+    return Workflow(id="wf-1", name="test", description="", steps=list(steps), is_default=False,
+                    target_type="nebula", required_filters=[])
+
+def step(step_type: ProcessingStepType, order: int, **parameters) -> ProcessingStep:
+    return ProcessingStep(type=step_type, order=order, parameters=parameters, description="")
+
+FILTER_CHAIN = workflow(
+    step(ProcessingStepType.CALIBRATION, 0),
+    step(ProcessingStepType.STACKING, 1, method='sigma_clip'),
+    step(ProcessingStepType.NOISE_REDUCTION, 2, sigma=1.0),
+    step(ProcessingStepType.SHARPENING, 3, amount=0.5)
+)
+
+@pytest.fixture
+def storage():
+    storage = StorageService(backend=MemoryBackend())
+    rng = np.random.default_rng(0)
+    for index, object_name in enumerate(FILES):
+        data = rng.normal(100.0, 5.0, size=(64, 48)).astype(np.float32)
+        data[10, 10] += 5000.0 * (index == 1)  # Rayon cosmique sur une seule exposition
+        buffer = io.BytesIO()
+        fits.PrimaryHDU(data).writeto(buffer)
+        digest = storage.store_content_stream(io.BytesIO(buffer.getvalue()), f"staging/{object_name}")
+        storage.link_content(object_name, digest, len(buffer.getvalue()))
+    return storage
+
+@pytest.fixture
+def executor(storage, tmp_path):
+    return WorkflowExecutor(ChunkedArrayStore(storage.backend, default_chunk=16), storage,
+                            FitsDiskCache(storage, str(tmp_path / "fits-cache"), 2**30), max_workers=2)
+
+class TestWorkflowExecutor:
+    def test_unchanged_steps_are_reused(self, executor):
+        first = executor.run(WorkflowDag(FILTER_CHAIN, {'F444W': FILES}))
+        again = executor.run(WorkflowDag(FILTER_CHAIN, {'F444W': FILES}))
+
+        # Trois calibrations, le stacking, la réduction de bruit et l'accentuation
+        assert (first['computed'], first['cached']) == (6, 0)
+        assert (again['computed'], again['cached']) == (0, 6)
+        assert again['outputs'] == first['outputs']
+
+    def test_changing_the_last_step_recomputes_only_it(self, executor):
+        executor.run(WorkflowDag(FILTER_CHAIN, {'F444W': FILES}))
+        changed = apply_overrides(FILTER_CHAIN, {'sharpening': {'amount': 1.5}})
+
+        result = executor.run(WorkflowDag(changed, {'F444W': FILES}))
+
+        assert (result['computed'], result['cached']) == (1, 5)
+
+    def test_missing_source_raises_file_not_found(self, executor):
+        with pytest.raises(FileNotFoundError):
+            executor._load_source("jwst/m16/missing_cal.fits")